@@ -0,0 +1,320 @@
+"""Асинхронный движок опроса как альтернатива циклу main().
+
+Запросы к API и отправка сообщений идут через неблокирующий клиент
+async_http, поэтому ожидание ответа не занимает поток: одновременно
+ожидающих запросов не больше concurrency, а один цикл событий
+обслуживает любое число аккаунтов. Проверка ответа, разбор статусов,
+outbox и планировщик общие с синхронным кодом; они работают с SQLite
+и выполняются в небольшом пуле потоков, чтобы не останавливать цикл.
+Потоковый разбор STREAM_RESPONSES здесь не применяется: тело ответа
+читается целиком.
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import telegram
+
+import async_http
+import homework
+import metrics
+import outbound
+import ratelimit
+import storage
+import text_messages
+from scheduler import DISPATCH_BATCH, AdaptiveScheduler
+from tenants import current_tenant, use_tenant
+
+CONCURRENCY = int(os.getenv('ASYNC_CONCURRENCY', 100))
+THREADS = int(os.getenv('ASYNC_THREADS', 8))
+TELEGRAM_BASE_URL = 'https://api.telegram.org/bot'
+
+
+def telegram_error(status_code, answer):
+    """Исключение python-telegram-bot для ответа Bot API с ошибкой."""
+    description = answer.get('description', '')
+    parameters = answer.get('parameters') or {}
+    if 'retry_after' in parameters:
+        return telegram.error.RetryAfter(parameters['retry_after'])
+    if 'migrate_to_chat_id' in parameters:
+        return telegram.error.ChatMigrated(parameters['migrate_to_chat_id'])
+    if status_code in (401, 403):
+        return telegram.error.Unauthorized(description)
+    if status_code == 400:
+        return telegram.error.BadRequest(description)
+    if status_code == 404:
+        return telegram.error.InvalidToken()
+    if status_code == 409:
+        return telegram.error.Conflict(description)
+    return telegram.error.NetworkError(f'{description} ({status_code})')
+
+
+class AsyncBot:
+    """Неблокирующая отправка сообщений через Bot API."""
+
+    def __init__(self, session, token, base_url=TELEGRAM_BASE_URL):
+        self.session = session
+        self.base_url = base_url + token
+
+    async def send_message(self, chat_id, text):
+        """Отправка сообщения; ошибки Bot API — исключениями telegram."""
+        try:
+            response = await self.session.post(
+                f'{self.base_url}/sendMessage',
+                json={'chat_id': chat_id, 'text': text},
+            )
+        except async_http.RequestError as error:
+            raise telegram.error.NetworkError(str(error))
+        try:
+            answer = response.json()
+        except ValueError:
+            raise telegram.error.NetworkError(
+                f'Invalid server response ({response.status_code})'
+            )
+        if answer.get('ok'):
+            return answer.get('result')
+        raise telegram_error(response.status_code, answer)
+
+
+async def request_api_async(session, params_request):
+    """Неблокирующий запрос к API через ограничитель и автомат защиты."""
+    limiter = ratelimit.get_limiter()
+    if limiter:
+        wait = limiter.reserve(params_request['headers']['Authorization'])
+        if wait > 0:
+            await asyncio.sleep(wait)
+    homework.open_request()
+    try:
+        with metrics.STAGE_LATENCY.time(stage='api_request'):
+            response = await session.get(**params_request)
+    except async_http.RequestError as error:
+        raise homework.request_failed(error, params_request)
+    return homework.record_response(response, params_request)
+
+
+async def get_api_answer_async(session, timestamp):
+    """Асинхронный запрос к API."""
+    params_request = homework.api_request_params(timestamp)
+    response = await request_api_async(session, params_request)
+    homework.check_status(response, params_request)
+    return homework.decode_answer(response, params_request)
+
+
+async def send_message_async(bot, message):
+    """Асинхронная отправка сообщения в Telegram-чат."""
+    tenant = current_tenant.get()
+    chat_id = tenant.chat_id if tenant else homework.TELEGRAM_CHAT_ID
+    try:
+        logging.info(
+            text_messages.LOG_INFO_START_SEND_MESSAGE, {'message': message}
+        )
+        with metrics.STAGE_LATENCY.time(stage='send_message'):
+            await bot.send_message(chat_id=chat_id, text=message)
+        logging.debug(
+            text_messages.LOG_DEBAG_SEND_MESSAGE, {'message': message}
+        )
+        return True
+    except (telegram.error.RetryAfter, *homework.permanent_errors()):
+        raise
+    except telegram.error.TelegramError as error:
+        logging.exception(
+            text_messages.LOG_EXCEPT_SEND_MESSAGE,
+            {'message': message, 'error': error}
+        )
+        return False
+
+
+async def deliver_async(bot, tenant, message_ids, message):
+    """Отправка сообщения аккаунта и отметка результата в outbox."""
+    store = storage.get_store()
+    with use_tenant(tenant):
+        try:
+            sent = await send_message_async(bot, message)
+        except homework.permanent_errors() as error:
+            logging.warning(
+                text_messages.LOG_WARNING_DEAD_MESSAGE,
+                {'chat_id': tenant.chat_id, 'error': error}
+            )
+            await asyncio.to_thread(store.mark_dead, message_ids)
+            return True
+    mark = store.mark_sent if sent else store.mark_failed
+    await asyncio.to_thread(mark, message_ids)
+    return sent
+
+
+async def poll_tenant_async(bot, session, tenant):
+    """Один цикл опроса API и уведомления для аккаунта.
+
+    Ожидание ответа API не занимает поток; проверка ответа и запись
+    изменений выполняются в пуле потоков цикла.
+    """
+    if not await asyncio.to_thread(homework.begin_poll, tenant):
+        return
+    with use_tenant(tenant):
+        try:
+            params_request = homework.api_request_params(
+                homework.poll_timestamp(tenant)
+            )
+            response = await request_api_async(session, params_request)
+            await asyncio.to_thread(
+                homework.process_response,
+                bot, tenant, response, params_request,
+            )
+        except Exception as error:
+            await asyncio.to_thread(homework.handle_error, bot, tenant, error)
+
+
+class AsyncSender:
+    """Отправка сообщений задачами цикла событий без блокировки опроса.
+
+    Создаётся внутри работающего цикла; submit можно вызывать из любого
+    потока. Сообщения отправляет собственный AsyncBot отправителя, бот
+    вызывающего нужен только синхронным путям вроде пробы outbox.
+    Склейка сообщений не выполняется.
+    """
+
+    def __init__(self, bot, concurrency=CONCURRENCY):
+        self.bot = bot
+        self.loop = asyncio.get_running_loop()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.tasks = set()
+
+    def submit(self, bot, tenant, message_ids, message, coalesce=False):
+        """Запуск отправки сообщения отдельной задачей цикла."""
+        self.loop.call_soon_threadsafe(
+            self.start, tenant, message_ids, message
+        )
+
+    def start(self, tenant, message_ids, message):
+        """Создание задачи отправки в потоке цикла."""
+        task = self.loop.create_task(
+            self.deliver(tenant, message_ids, message)
+        )
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def deliver(self, tenant, message_ids, message):
+        """Отправка с ограничением числа одновременных вызовов.
+
+        После RetryAfter или сбоя сообщение остаётся в outbox до
+        повторной отправки.
+        """
+        async with self.semaphore:
+            try:
+                await deliver_async(self.bot, tenant, message_ids, message)
+            except telegram.error.RetryAfter as error:
+                logging.warning(
+                    text_messages.LOG_WARNING_RETRY_AFTER,
+                    {'chat_id': tenant.chat_id, 'seconds': error.retry_after}
+                )
+                await asyncio.to_thread(
+                    storage.get_store().mark_failed, message_ids
+                )
+            except Exception as error:
+                logging.exception(
+                    text_messages.LOG_EXCEPT_SENDER,
+                    {'chat_id': tenant.chat_id, 'error': error}
+                )
+
+    async def join(self):
+        """Ожидание завершения всех отправок."""
+        await asyncio.sleep(0)
+        while self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+class AsyncRunner:
+    """Асинхронный опрос многих аккаунтов с ограниченной конкурентностью."""
+
+    def __init__(self, bot, session, tenants, concurrency=CONCURRENCY,
+                 scheduler=None):
+        self.bot = bot
+        self.session = session
+        self.tenants = tenants
+        self.concurrency = concurrency
+        self.scheduler = scheduler or AdaptiveScheduler()
+        self.polls = 0
+        self.elapsed = 0.0
+        now = time.time()
+        for tenant in tenants:
+            self.scheduler.add(tenant, now)
+
+    @property
+    def throughput(self):
+        """Средняя пропускная способность, опросов в секунду."""
+        return self.polls / self.elapsed if self.elapsed else 0.0
+
+    async def poll(self, tenants):
+        """Опрос переданных аккаунтов и планирование следующих опросов."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(tenant):
+            async with semaphore:
+                await poll_tenant_async(self.bot, self.session, tenant)
+
+        started = time.monotonic()
+        await asyncio.gather(*(bounded(tenant) for tenant in tenants))
+        await asyncio.to_thread(homework.flush_state)
+        elapsed = time.monotonic() - started
+        self.polls += len(tenants)
+        self.elapsed += elapsed
+        for tenant in tenants:
+            self.scheduler.schedule(tenant)
+        logging.info(
+            text_messages.LOG_INFO_RUNNER_ROUND,
+            {
+                'polls': len(tenants),
+                'elapsed': elapsed,
+                'throughput': len(tenants) / elapsed if elapsed else 0.0,
+            }
+        )
+
+    async def run_round(self):
+        """Опрос всех аккаунтов реестра по одному разу."""
+        await self.poll(self.tenants)
+
+    async def run_forever(self):
+        """Опрос аккаунтов по расписанию планировщика."""
+        while True:
+            due = self.scheduler.pop_due(limit=DISPATCH_BATCH)
+            while due:
+                await self.poll(due)
+                due = self.scheduler.pop_due(limit=DISPATCH_BATCH)
+            await asyncio.to_thread(homework.housekeeping, self.bot)
+            await asyncio.sleep(self.scheduler.next_delay())
+
+
+async def run(path, concurrency=CONCURRENCY):
+    """Асинхронный опрос аккаунтов из реестра."""
+    import runner
+    bot = runner.create_bot(1)
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=THREADS)
+    )
+    session = async_http.AsyncSession(pool_size=concurrency)
+    tenants = runner.prepare(path, 1)
+    sender = AsyncSender(AsyncBot(session, bot.token), concurrency)
+    outbound.set_sender(sender)
+    listener = homework.start_commands()
+    server = homework.start_ingest(bot, tenants)
+    logging.info(text_messages.LOG_INFO_RUNNER, {'count': len(tenants)})
+    try:
+        await AsyncRunner(bot, session, tenants, concurrency).run_forever()
+    finally:
+        if listener:
+            listener.close()
+        if server:
+            server.close()
+        await sender.join()
+        outbound.set_sender(None)
+        await session.close()
+        runner.close_leases()
+        storage.get_store().close()
+
+
+if __name__ == '__main__':
+    homework.configure_logging(level=os.getenv('LOG_LEVEL', 'INFO'))
+    asyncio.run(run(sys.argv[1]))
@@ -0,0 +1,240 @@
+"""Неблокирующий HTTP/1.1-клиент на потоках asyncio.
+
+Соединения открываются через asyncio.open_connection и после ответа
+возвращаются в keep-alive пул, поэтому ожидание ответа не занимает
+поток: один цикл событий ведёт столько запросов, сколько разрешает
+вызывающий. Ответ читается целиком и повторяет ту часть интерфейса
+requests.Response, которой пользуется проверка ответа API.
+"""
+import asyncio
+import json
+import ssl
+import time
+from urllib.parse import urlencode, urlsplit
+
+from requests.structures import CaseInsensitiveDict
+
+import http_client
+
+USER_AGENT = 'homework-bot'
+
+
+class RequestError(Exception):
+    """Сбой соединения или нарушение протокола при запросе."""
+
+
+class Response:
+    """Прочитанный ответ: код, заголовки и тело в байтах."""
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        """Разбор тела ответа как JSON."""
+        return json.loads(self.content)
+
+    def close(self):
+        """Тело уже прочитано, освобождать нечего."""
+
+
+class Connection:
+    """Открытое соединение с адресом сервера."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @property
+    def usable(self):
+        """Можно ли отправить по соединению следующий запрос."""
+        return not self.reader.at_eof() and not self.writer.is_closing()
+
+    def close(self):
+        """Закрытие соединения без ожидания."""
+        self.writer.close()
+
+
+def split_timeout(timeout):
+    """Таймауты соединения и чтения из числа или пары, как в requests."""
+    if isinstance(timeout, tuple):
+        return timeout
+    return timeout, timeout
+
+
+def dumps(data):
+    """Тело JSON-запроса в UTF-8."""
+    return json.dumps(data, ensure_ascii=False).encode('UTF-8')
+
+
+async def read_body(reader, headers, method, status_code):
+    """Тело ответа и признак того, что соединение можно переиспользовать."""
+    if method == 'HEAD' or status_code in (204, 304) or status_code < 200:
+        return b'', True
+    if 'chunked' in headers.get('Transfer-Encoding', '').lower():
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if not size:
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        while (await reader.readline()).strip():
+            pass
+        return b''.join(chunks), True
+    length = headers.get('Content-Length')
+    if length is not None:
+        return await reader.readexactly(int(length)), True
+    return await reader.read(), False
+
+
+async def read_response(reader, method):
+    """Чтение строки статуса, заголовков и тела ответа."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError()
+    version, status, _ = (status_line.decode('latin-1') + '  ').split(' ', 2)
+    headers = CaseInsensitiveDict()
+    while True:
+        line = await reader.readline()
+        if not line.strip():
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip()] = value.strip()
+    body, reusable = await read_body(reader, headers, method, int(status))
+    reusable = (
+        reusable and version == 'HTTP/1.1'
+        and headers.get('Connection', '').lower() != 'close'
+    )
+    return Response(int(status), headers, body), reusable
+
+
+class AsyncSession:
+    """Сессия с keep-alive пулом соединений и таймаутами по умолчанию.
+
+    Создаётся и используется внутри одного цикла событий. Если сервер
+    закрыл соединение, пока оно лежало в пуле, запрос повторяется на
+    следующем соединении; сбой нового соединения не повторяется.
+    """
+
+    def __init__(self, pool_size=http_client.POOL_SIZE,
+                 timeout=http_client.TIMEOUT):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.stats = http_client.SessionStats()
+        self.idle = {}
+        self.ssl_context = ssl.create_default_context()
+
+    async def connect(self, scheme, host, port, timeout):
+        """Соединение из пула или новое; признак переиспользования."""
+        idle = self.idle.get((scheme, host, port), [])
+        while idle:
+            connection = idle.pop()
+            if connection.usable:
+                return connection, True
+            connection.close()
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                host, port,
+                ssl=self.ssl_context if scheme == 'https' else None,
+            ),
+            timeout,
+        )
+        self.stats.add_handshake()
+        return Connection(reader, writer), False
+
+    def release(self, key, connection, reusable):
+        """Возврат соединения в пул или его закрытие."""
+        idle = self.idle.setdefault(key, [])
+        if reusable and len(idle) < self.pool_size:
+            idle.append(connection)
+        else:
+            connection.close()
+
+    async def request(self, method, url, params=None, headers=None,
+                      json=None, timeout=None):
+        """Запрос с таймаутом по умолчанию и замером длительности."""
+        parts = urlsplit(url)
+        scheme = parts.scheme
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        target = parts.path or '/'
+        query = '&'.join(
+            filter(None, [parts.query, urlencode(params or {})])
+        )
+        if query:
+            target = f'{target}?{query}'
+        body = b'' if json is None else dumps(json)
+        head = {
+            'Host': parts.netloc, 'User-Agent': USER_AGENT,
+            'Accept-Encoding': 'identity', 'Connection': 'keep-alive',
+            **(headers or {}),
+        }
+        if json is not None:
+            head['Content-Type'] = 'application/json'
+        if body or method in ('POST', 'PUT', 'PATCH'):
+            head['Content-Length'] = str(len(body))
+        data = ''.join(
+            [f'{method} {target} HTTP/1.1\r\n']
+            + [f'{name}: {value}\r\n' for name, value in head.items()]
+            + ['\r\n']
+        ).encode('latin-1') + body
+        connect_timeout, read_timeout = split_timeout(
+            self.timeout if timeout is None else timeout
+        )
+        started = time.perf_counter()
+        try:
+            return await self.send(
+                key, data, method, connect_timeout, read_timeout
+            )
+        finally:
+            self.stats.add_request(time.perf_counter() - started)
+
+    async def send(self, key, data, method, connect_timeout, read_timeout):
+        """Отправка запроса с повтором на закрытом соединении из пула."""
+        while True:
+            try:
+                connection, reused = await self.connect(
+                    *key, connect_timeout
+                )
+            except (OSError, asyncio.TimeoutError) as error:
+                raise RequestError(error) from error
+            try:
+                connection.writer.write(data)
+                await connection.writer.drain()
+                response, reusable = await asyncio.wait_for(
+                    read_response(connection.reader, method), read_timeout
+                )
+            except (OSError, asyncio.IncompleteReadError) as error:
+                connection.close()
+                if reused:
+                    continue
+                raise RequestError(error) from error
+            except (asyncio.TimeoutError, ValueError) as error:
+                connection.close()
+                raise RequestError(error) from error
+            except BaseException:
+                connection.close()
+                raise
+            self.release(key, connection, reusable)
+            return response
+
+    async def get(self, url, **kwargs):
+        """GET-запрос."""
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        """POST-запрос."""
+        return await self.request('POST', url, **kwargs)
+
+    async def close(self):
+        """Закрытие соединений пула."""
+        idle, self.idle = self.idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+                try:
+                    await connection.writer.wait_closed()
+                except OSError:
+                    pass
@@ -0,0 +1,96 @@
+"""Холодный старт: импорт homework и однократный опрос в новом процессе.
+
+Каждый замер запускает отдельный интерпретатор, поэтому в замер входят
+запуск Python, импорт модулей, открытие базы состояния, запрос к
+FakePracticum и, если статус изменился, отправка в FakeTelegram.
+Режим eager заранее импортирует telegram и requests, как до
+отложенной загрузки.
+
+Запуск: python -m benchmarks.bench_cold_start --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_servers import FakePracticum, FakeTelegram
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('requests', 'telegram')
+
+IMPORT_CHILD = '''
+import sys
+if sys.argv[1] == 'eager':
+    import requests, telegram
+import homework, lazy
+print(','.join(name for name in {heavy!r} if lazy.is_loaded(name)))
+'''
+
+ONCE_CHILD = '''
+import sys
+if sys.argv[1] == 'eager':
+    import requests, telegram
+import homework, lazy, storage
+homework.ENDPOINT = sys.argv[2]
+storage.set_store(storage.SQLiteStore(sys.argv[4]))
+bot = lazy.LazyObject(
+    lambda: homework.telegram.Bot(token='1234:abcdefg', base_url=sys.argv[3])
+)
+ok = homework.run_once(bot)
+storage.get_store().close()
+print(','.join(name for name in {heavy!r} if lazy.is_loaded(name)))
+sys.exit(0 if ok else 1)
+'''
+
+
+def run_child(code, args):
+    """Длительность запуска процесса и загруженные тяжёлые модули."""
+    env = dict(
+        os.environ, PRACTICUM_TOKEN='token', TELEGRAM_TOKEN='1234:abcdefg',
+        TELEGRAM_CHAT_ID='12345',
+    )
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', code.format(heavy=HEAVY), *args],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - started, result.stdout.strip() or '-'
+
+
+def measure(name, code, args_for_run, runs):
+    times = []
+    with tempfile.TemporaryDirectory() as directory:
+        for run in range(runs):
+            elapsed, loaded = run_child(code, args_for_run(directory, run))
+            times.append(elapsed)
+    print(f'{name:28} медиана: {statistics.median(times) * 1000:7.1f} мс '
+          f'мин: {min(times) * 1000:7.1f} мс загружены: {loaded}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+    with FakePracticum(homeworks=0) as unchanged, \
+            FakePracticum(homeworks=1) as changed, \
+            FakeTelegram() as fake_telegram:
+        for mode in ('eager', 'lazy'):
+            measure(f'import {mode}', IMPORT_CHILD,
+                    lambda directory, run: [mode], args.runs)
+            for label, practicum in (('без изменений', unchanged),
+                                     ('с уведомлением', changed)):
+                measure(
+                    f'--once {mode} {label}', ONCE_CHILD,
+                    lambda directory, run: [
+                        mode, practicum.endpoint, fake_telegram.base_url,
+                        os.path.join(directory, f'state{run}.db'),
+                    ],
+                    args.runs,
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Задержка уведомления при приёме событий против опроса.
+
+FakeEventProducer отправляет события серверу приёма, тот проверяет их
+и отправляет уведомление в FakeTelegram до ответа, поэтому время
+запроса совпадает с задержкой от события до уведомления. При опросе
+средняя задержка равна половине RETRY_PERIOD.
+
+Запуск: python -m benchmarks.bench_ingest --events 500
+"""
+import argparse
+import logging
+import statistics
+import time
+from functools import partial
+
+import telegram
+
+import homework
+import ingest
+from benchmarks.fake_servers import FakeEventProducer, FakeTelegram
+from tenants import Tenant
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированному списку."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--homeworks', type=int, default=10)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    with FakeTelegram() as fake_telegram:
+        bot = telegram.Bot(
+            token='1234:abcdefg', base_url=fake_telegram.base_url
+        )
+        tenant = Tenant(name='bench', practicum_token='token', chat_id='1')
+        server = ingest.IngestServer(
+            partial(homework.ingest_event, bot), [tenant],
+            secret='secret', port=0,
+        ).start()
+        producer = FakeEventProducer(
+            server.url, tenant.name, homeworks=args.homeworks,
+            secret='secret', seed=1,
+        )
+        latencies = []
+        for _ in range(args.events):
+            started = time.perf_counter()
+            status, payload = producer.send()
+            latencies.append(time.perf_counter() - started)
+            assert status == 202 and payload['changes'] == 1, payload
+        server.close()
+    assert len(fake_telegram.messages) == args.events
+    print(f'событий: {args.events} '
+          f'p50: {statistics.median(latencies) * 1000:.2f} мс '
+          f'p99: {percentile(latencies, 0.99) * 1000:.2f} мс')
+    print(f'опрос раз в {homework.RETRY_PERIOD} с: '
+          f'в среднем {homework.RETRY_PERIOD / 2:.0f} с')
+
+
+if __name__ == '__main__':
+    main()
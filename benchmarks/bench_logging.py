@@ -0,0 +1,85 @@
+"""Накладные расходы журналирования на цикл опроса.
+
+Сравнивает синхронные обработчики (файл и поток вывода, как раньше)
+с очередью DeferredQueueHandler/QueueListener на уровнях DEBUG и INFO.
+
+Запуск: python -m benchmarks.bench_logging
+"""
+import io
+import logging
+import os
+import tempfile
+import time
+from logging.handlers import QueueListener
+from queue import SimpleQueue
+
+import homework
+from tenants import Tenant, use_tenant
+
+CYCLES = 2000
+HOMEWORKS = [
+    {'id': index, 'homework_name': f'hw{index}', 'status': 'approved'}
+    for index in range(5)
+]
+
+
+class Bot:
+    def send_message(self, chat_id=None, text=None):
+        pass
+
+
+def cycle(bot):
+    homeworks = homework.check_response({'homeworks': HOMEWORKS})
+    for item in homeworks:
+        homework.send_message(bot, homework.parse_status(item))
+
+
+def configure(handlers, level):
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in handlers:
+        handler.setFormatter(logging.Formatter(homework.LOG_FORMAT))
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def bench(queued, level, directory):
+    handlers = [
+        logging.FileHandler(os.path.join(directory, 'bench.log'),
+                            encoding='UTF-8'),
+        logging.StreamHandler(io.StringIO()),
+    ]
+    listener = None
+    if queued:
+        log_queue = SimpleQueue()
+        listener = QueueListener(log_queue, *handlers)
+        listener.start()
+        handlers = [homework.DeferredQueueHandler(log_queue)]
+    configure(handlers, level)
+    bot = Bot()
+    tenant = Tenant('bench', 'token', '1')
+    with use_tenant(tenant):
+        started = time.perf_counter()
+        for _ in range(CYCLES):
+            cycle(bot)
+        elapsed = time.perf_counter() - started
+    if listener:
+        listener.stop()
+    for handler in handlers:
+        handler.close()
+    return elapsed / CYCLES
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        for queued in (False, True):
+            for level in (logging.DEBUG, logging.INFO):
+                per_cycle = bench(queued, level, directory)
+                mode = 'очередь   ' if queued else 'синхронно '
+                print(f'{mode} {logging.getLevelName(level):5}: '
+                      f'{per_cycle * 1e6:8.1f} мкс на цикл')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Стоимость опроса без изменений: полный разбор против сверки хеша.
+
+poll_api получает заранее подготовленный ответ через подменную сессию;
+все статусы уже известны. В режиме full хеш предыдущего ответа
+сбрасывается перед каждым опросом, и ответ проходит разбор JSON,
+check_response и homework_record, в режиме hash — только хеширование.
+
+Запуск: python -m benchmarks.bench_payload_hash --homeworks 10 1000
+"""
+import argparse
+import json
+import logging
+import time
+
+import homework
+import http_client
+from records import Status
+from tenants import Tenant
+
+
+class PreparedResponse:
+    """Ответ API с готовым телом."""
+
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class PreparedSession:
+    """Сессия, отдающая один и тот же ответ с новым current_date."""
+
+    def __init__(self, homeworks):
+        self.prefix = json.dumps({'homeworks': [
+            {
+                'id': index,
+                'homework_name': f'username__hw{index}.zip',
+                'status': 'approved',
+                'reviewer_comment': 'Всё отлично.',
+                'date_updated': '2020-02-13T14:40:57Z',
+                'lesson_name': 'Итоговый проект',
+            }
+            for index in range(homeworks)
+        ]}, ensure_ascii=False).encode('UTF-8')[:-1] + b', "current_date": '
+        self.current_date = 1581604970
+
+    def get(self, **kwargs):
+        self.current_date += 1
+        return PreparedResponse(
+            self.prefix + str(self.current_date).encode() + b'}'
+        )
+
+
+def measure(count, polls, reset):
+    http_client.set_session(PreparedSession(count))
+    tenant = Tenant(name='bench', practicum_token='token', chat_id='1')
+    tenant.statuses = dict.fromkeys(range(count), Status.APPROVED)
+    homework.poll_api(None, tenant, 0)
+    started = time.perf_counter()
+    for _ in range(polls):
+        if reset:
+            tenant.payload_hash = b''
+        homework.poll_api(None, tenant, 0)
+    return (time.perf_counter() - started) / polls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--homeworks', type=int, nargs='+',
+                        default=[1, 10, 100, 1000])
+    parser.add_argument('--polls', type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    for count in args.homeworks:
+        full = measure(count, args.polls, reset=True)
+        hashed = measure(count, args.polls, reset=False)
+        print(f'работ: {count:5} full: {full * 1e6:9.1f} мкс '
+              f'hash: {hashed * 1e6:8.1f} мкс '
+              f'ускорение: {full / hashed:5.1f}x')
+    http_client.set_session(None)
+
+
+if __name__ == '__main__':
+    main()
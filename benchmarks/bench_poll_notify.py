@@ -0,0 +1,97 @@
+"""Нагрузочный прогон пути опрос -> уведомление на локальных подменах.
+
+Реальные get_api_answer, check_response, parse_status и send_message
+работают по HTTP с FakePracticum и FakeTelegram. Выводит пропускную
+способность, p50/p99 длительности poll_tenant и память на аккаунт.
+
+Запуск: python -m benchmarks.bench_poll_notify --tenants 200 --rounds 3
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import telegram
+from telegram.utils.request import Request
+
+import homework
+import http_client
+from benchmarks.fake_servers import FakePracticum, FakeTelegram
+from tenants import Tenant
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированному списку."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def timed_poll(bot, tenant):
+    """Длительность одного poll_tenant, с."""
+    started = time.perf_counter()
+    homework.poll_tenant(bot, tenant)
+    return time.perf_counter() - started
+
+
+def run(args):
+    with FakePracticum(latency=args.api_latency, error_rate=args.api_errors,
+                       homeworks=args.homeworks) as practicum, \
+            FakeTelegram(latency=args.telegram_latency,
+                         error_rate=args.telegram_errors) as fake_telegram:
+        homework.ENDPOINT = practicum.endpoint
+        session = http_client.PooledSession(pool_size=args.workers)
+        http_client.set_session(session)
+        bot = telegram.Bot(
+            token='1234:abcdefg', base_url=fake_telegram.base_url,
+            request=Request(con_pool_size=args.workers),
+        )
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tenants = [
+            Tenant(str(index), f'token{index}', str(index + 1))
+            for index in range(args.tenants)
+        ]
+        latencies = []
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            for _ in range(args.rounds):
+                latencies.extend(executor.map(
+                    lambda tenant: timed_poll(bot, tenant), tenants
+                ))
+        elapsed = time.perf_counter() - started
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        memory = sum(
+            stat.size_diff for stat in after.compare_to(before, 'filename')
+        )
+        http_client.set_session(None)
+        print(f'аккаунтов: {args.tenants}, раундов: {args.rounds}, '
+              f'потоков: {args.workers}')
+        print(f'пропускная способность: {len(latencies) / elapsed:.1f} '
+              f'опросов/с')
+        print(f'poll_tenant p50: {statistics.median(latencies) * 1000:.2f} '
+              f'мс, p99: {percentile(latencies, 0.99) * 1000:.2f} мс')
+        print(f'память на аккаунт: {memory / args.tenants / 1024:.1f} КиБ')
+        print(f'запросов к API: {practicum.requests} '
+              f'(ошибок {practicum.errors}), соединений: '
+              f'{session.stats.handshakes}')
+        print(f'сообщений в Telegram: {len(fake_telegram.messages)} '
+              f'(ошибок {fake_telegram.errors})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--homeworks', type=int, default=3)
+    parser.add_argument('--api-latency', type=float, default=0.01)
+    parser.add_argument('--api-errors', type=float, default=0.0)
+    parser.add_argument('--telegram-latency', type=float, default=0.005)
+    parser.add_argument('--telegram-errors', type=float, default=0.0)
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
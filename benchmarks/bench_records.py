@@ -0,0 +1,69 @@
+"""Память на отслеживаемые работы: словари против записей Homework.
+
+Сравниваются список проверенных работ (словари из ответа API против
+записей Homework) и индекс статусов аккаунта (строки статусов против
+Status). Работы декодируются по одной, как из ответа API, чтобы
+строки статусов не разделялись между работами.
+
+Запуск: python -m benchmarks.bench_records --works 1000000
+"""
+import argparse
+import json
+import logging
+import time
+import tracemalloc
+
+import homework
+from records import Status
+
+STATUSES = [status.label for status in Status]
+
+
+def decoded_works(count):
+    for index in range(count):
+        yield json.loads(json.dumps({
+            'id': index,
+            'homework_name': f'username__hw{index}.zip',
+            'status': STATUSES[index % len(STATUSES)],
+        }))
+
+
+def dict_flow(count):
+    works = homework.check_response({'homeworks': list(decoded_works(count))})
+    statuses = {
+        homework.homework_key(work): work['status'] for work in works
+    }
+    return works, statuses
+
+
+def record_flow(count):
+    works = [homework.homework_record(work) for work in decoded_works(count)]
+    statuses = {work.key: work.status for work in works}
+    return works, statuses
+
+
+def measure(flow, count):
+    tracemalloc.start()
+    started = time.perf_counter()
+    works, statuses = flow(count)
+    elapsed = time.perf_counter() - started
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del works, statuses
+    return elapsed, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--works', type=int, default=1000000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    for name, flow in (('dict', dict_flow), ('Homework', record_flow)):
+        elapsed, memory = measure(flow, args.works)
+        print(f'{name:9} работ: {args.works} время: {elapsed:6.2f} с '
+              f'память: {memory / 2 ** 20:7.1f} МиБ, '
+              f'{memory / args.works:5.0f} Б на работу')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Сравнение пулов потоков TenantRunner и асинхронного AsyncRunner.
+
+Оба движка опрашивают FakePracticum и отправляют сообщения в
+FakeTelegram: пул потоков через requests и python-telegram-bot,
+asyncio через неблокирующий async_http, оставляя ASYNC_THREADS
+потоков только для разбора ответов и SQLite. Выводит время раунда,
+пропускную способность и, с --memory, пик выделенной памяти для
+каждого числа аккаунтов.
+
+Запуск: python -m benchmarks.bench_runners --tenants 1 100 10000
+"""
+import argparse
+import asyncio
+import logging
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import telegram
+from telegram.utils.request import Request
+
+import async_engine
+import async_http
+import homework
+import http_client
+import outbound
+from benchmarks.fake_servers import FakePracticum, FakeTelegram
+from runner import TenantRunner
+from tenants import Tenant
+
+
+def make_tenants(count):
+    return [
+        Tenant(str(index), f'token{index}', str(index + 1), timestamp=1)
+        for index in range(count)
+    ]
+
+
+def measure(round_func, memory):
+    """Длительность раунда и пик памяти, если её замер включён."""
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    round_func()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if memory else 0
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run_threads(bot, tenants, workers, memory):
+    runner = TenantRunner(bot, tenants, max_workers=workers)
+    try:
+        return measure(runner.run_round, memory)
+    finally:
+        runner.close()
+
+
+def run_async(bot, tenants, workers, memory, base_url):
+    async def run_round():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=async_engine.THREADS)
+        )
+        session = async_http.AsyncSession(pool_size=workers)
+        sender = async_engine.AsyncSender(
+            async_engine.AsyncBot(session, bot.token, base_url), workers
+        )
+        outbound.set_sender(sender)
+        try:
+            await async_engine.AsyncRunner(
+                bot, session, tenants, workers
+            ).run_round()
+            await sender.join()
+        finally:
+            outbound.set_sender(None)
+            await session.close()
+
+    return measure(lambda: asyncio.run(run_round()), memory)
+
+
+def run(args):
+    logging.disable(logging.CRITICAL)
+    with FakePracticum(latency=args.api_latency) as practicum, \
+            FakeTelegram() as fake_telegram:
+        homework.ENDPOINT = practicum.endpoint
+        http_client.set_session(
+            http_client.PooledSession(pool_size=args.workers)
+        )
+        bot = telegram.Bot(
+            token='1234:abcdefg', base_url=fake_telegram.base_url,
+            request=Request(con_pool_size=args.workers),
+        )
+        engines = (
+            ('threads', run_threads),
+            ('asyncio', partial(run_async, base_url=fake_telegram.base_url)),
+        )
+        for count in args.tenants:
+            for name, engine in engines:
+                elapsed, peak = engine(
+                    bot, make_tenants(count), args.workers, args.memory
+                )
+                print(f'{name:8} аккаунтов: {count:6} '
+                      f'раунд: {elapsed:8.3f} с '
+                      f'опросов/с: {count / elapsed:8.1f} '
+                      f'пик памяти: {peak / 1024:9.1f} КиБ')
+        http_client.set_session(None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, nargs='+',
+                        default=[1, 100, 10000])
+    parser.add_argument('--workers', type=int, default=64)
+    parser.add_argument('--api-latency', type=float, default=0.01)
+    parser.add_argument('--memory', action='store_true',
+                        help='замер пика памяти (заметно замедляет прогон)')
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
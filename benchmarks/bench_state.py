@@ -0,0 +1,49 @@
+"""Стоимость записи состояния за цикл при росте числа аккаунтов.
+
+Запуск: python -m benchmarks.bench_state
+"""
+import os
+import tempfile
+import time
+
+import storage
+from records import Status
+from tenants import Tenant
+
+TENANT_COUNTS = (100, 1000, 10000)
+CYCLES = 5
+
+
+def bench(count, path):
+    store = storage.SQLiteStore(path)
+    tenants = [Tenant(str(index), 'token', str(index))
+               for index in range(count)]
+    started = time.perf_counter()
+    for cycle in range(CYCLES):
+        for tenant in tenants:
+            tenant.timestamp = cycle
+            store.save_status(tenant, cycle, Status.REVIEWING)
+            store.save_tenant(tenant)
+        store.flush()
+    elapsed = time.perf_counter() - started
+    store.close()
+    started = time.perf_counter()
+    store = storage.SQLiteStore(path)
+    store.load_tenant(tenants[-1])
+    resume = time.perf_counter() - started
+    store.close()
+    return elapsed / (CYCLES * count), resume
+
+
+def main():
+    for count in TENANT_COUNTS:
+        with tempfile.TemporaryDirectory() as directory:
+            per_tenant, resume = bench(
+                count, os.path.join(directory, 'state.db')
+            )
+        print(f'{count:>6} аккаунтов: {per_tenant * 1e6:8.1f} мкс '
+              f'на аккаунт за цикл, возобновление {resume * 1000:.2f} мс')
+
+
+if __name__ == '__main__':
+    main()
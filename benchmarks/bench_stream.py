@@ -0,0 +1,88 @@
+"""Пиковая память разбора ответа: response.json() против потокового.
+
+Тело ответа с заданным числом работ готовится заранее и подаётся
+частями, как iter_content. В сценарии known статусы всех работ уже
+известны и замеряется только память на разбор и проверку; в сценарии
+backfill статусов нет, и до конца проверки копятся изменения всех работ.
+
+Запуск: python -m benchmarks.bench_stream --homeworks 1000 100000
+"""
+import argparse
+import json
+import logging
+import time
+import tracemalloc
+
+import homework
+import jsonstream
+from records import Status
+
+
+def make_body(count):
+    return json.dumps({
+        'homeworks': [
+            {
+                'id': index,
+                'homework_name': f'username__hw{index}.zip',
+                'status': 'approved',
+                'reviewer_comment': 'Всё отлично. ' * 10,
+                'date_updated': '2020-02-13T14:40:57Z',
+                'lesson_name': 'Итоговый проект',
+            }
+            for index in range(count)
+        ],
+        'current_date': 1581604970,
+    }, ensure_ascii=False).encode('UTF-8')
+
+
+def chunks(body, size):
+    for index in range(0, len(body), size):
+        yield body[index:index + size]
+
+
+def parse_full(body, statuses):
+    response = json.loads(b''.join(chunks(body, homework.STREAM_CHUNK_SIZE)))
+    return homework.new_statuses(
+        homework.check_response(response), statuses
+    )
+
+
+def parse_stream(body, statuses):
+    stream = jsonstream.HomeworksStream(
+        chunks(body, homework.STREAM_CHUNK_SIZE)
+    )
+    return homework.new_statuses(stream, statuses)
+
+
+def measure(func, body, statuses):
+    tracemalloc.start()
+    started = time.perf_counter()
+    func(body, statuses)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--homeworks', type=int, nargs='+',
+                        default=[100, 10000, 100000])
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    for count in args.homeworks:
+        body = make_body(count)
+        for scenario, statuses in (
+                ('known', dict.fromkeys(range(count), Status.APPROVED)),
+                ('backfill', {}),
+        ):
+            for name, func in (('json()', parse_full),
+                               ('stream', parse_stream)):
+                elapsed, peak = measure(func, body, statuses)
+                print(f'{scenario:8} {name:7} работ: {count:7} тело: '
+                      f'{len(body) / 1024:9.0f} КиБ время: '
+                      f'{elapsed:7.3f} с пик памяти: {peak / 1024:9.0f} КиБ')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Накладные расходы планировщика при росте числа аккаунтов.
+
+Аккаунты получают случайные сроки в пределах часа, затем моделируется
+секунда за секундой: наступившие выдаются пачками по DISPATCH_BATCH и
+ставятся на новый срок, а часть аккаунтов переносится досрочно, как
+при событиях сервера приёма. Для сравнения тот же сценарий выполняется
+на куче с ленивым удалением, как было в планировщике раньше.
+
+Запуск: python -m benchmarks.bench_timingwheel --tenants 10000 1000000
+"""
+import argparse
+import heapq
+import random
+import time
+from functools import partial
+
+from scheduler import DISPATCH_BATCH
+from timingwheel import TimingWheel
+
+HORIZON = 3600
+MIN_INTERVAL = 120
+
+
+class HeapQueue:
+    """Куча сроков с ленивым удалением устаревших записей."""
+
+    def __init__(self):
+        self.heap = []
+        self.deadlines = {}
+
+    def schedule(self, key, deadline, item):
+        self.deadlines[key] = deadline
+        heapq.heappush(self.heap, (deadline, key))
+
+    def cancel(self, key):
+        return self.deadlines.pop(key, None) is not None
+
+    def pop_due(self, now, limit=None):
+        due = []
+        while self.heap and self.heap[0][0] <= now and (
+                limit is None or len(due) < limit):
+            deadline, key = heapq.heappop(self.heap)
+            if self.deadlines.get(key) == deadline:
+                del self.deadlines[key]
+                due.append(key)
+        return due
+
+
+def simulate(queue, count, seconds, reschedules, rng):
+    """Операций в секунду модели и время на операцию, мкс."""
+    now = 0.0
+    for key in range(count):
+        queue.schedule(key, rng.uniform(0, HORIZON), key)
+    operations = 0
+    started = time.perf_counter()
+    for _ in range(seconds):
+        now += 1
+        due = queue.pop_due(now, DISPATCH_BATCH)
+        while due:
+            for key in due:
+                queue.schedule(
+                    key, now + rng.uniform(MIN_INTERVAL, HORIZON), key
+                )
+            operations += 2 * len(due)
+            due = queue.pop_due(now, DISPATCH_BATCH)
+        for _ in range(reschedules):
+            key = rng.randrange(count)
+            queue.cancel(key)
+            queue.schedule(key, now + rng.uniform(MIN_INTERVAL, HORIZON), key)
+            operations += 2
+    elapsed = time.perf_counter() - started
+    return operations, elapsed / operations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, nargs='+',
+                        default=[10000, 100000, 1000000])
+    parser.add_argument('--seconds', type=int, default=300)
+    parser.add_argument('--reschedules', type=int, default=100)
+    args = parser.parse_args()
+    for count in args.tenants:
+        for name, factory in (
+                ('wheel', partial(TimingWheel, start=0)),
+                ('heap', HeapQueue),
+        ):
+            operations, per_operation = simulate(
+                factory(), count, args.seconds, args.reschedules,
+                random.Random(1),
+            )
+            print(f'{name:5} аккаунтов: {count:8} операций: {operations:8} '
+                  f'на операцию: {per_operation:6.2f} мкс')
+
+
+if __name__ == '__main__':
+    main()
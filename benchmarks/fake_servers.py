@@ -0,0 +1,230 @@
+"""Локальные подмены API Практикума и Telegram Bot API.
+
+Серверы слушают 127.0.0.1 на свободном порту и умеют добавлять
+задержку, отвечать ошибками с заданной вероятностью и отдавать
+ответы заданного размера.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.parse import parse_qs, urlparse
+from urllib.request import Request, urlopen
+
+PRACTICUM_PATH = '/api/user_api/homework_statuses/'
+STATUSES = ('reviewing', 'approved', 'rejected')
+
+
+class Server(ThreadingHTTPServer):
+    """HTTP-сервер с очередью подключений на сотни одновременных клиентов.
+
+    Стандартной очереди из пяти подключений не хватает, когда клиент
+    открывает десятки соединений сразу: лишние ждут повтора SYN.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class FakeServer:
+    """Базовый сервер с задержкой и долей ошибочных ответов."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.httpd = Server(('127.0.0.1', 0), self.handler_class())
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self):
+        """Базовый адрес сервера."""
+        return f'http://127.0.0.1:{self.httpd.server_port}'
+
+    def handler_class(self):
+        """Класс обработчика, связанный с этим сервером."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.dispatch(self, None)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                server.dispatch(self, self.rfile.read(length))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def dispatch(self, handler, body):
+        """Задержка, учёт запроса и выбор между ошибкой и ответом."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.requests += 1
+            failed = self.rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        status, payload = (
+            self.error_response() if failed else self.respond(handler, body)
+        )
+        data = json.dumps(payload).encode('UTF-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def error_response(self):
+        """Ответ при искусственной ошибке."""
+        return 500, {'error': 'fake error'}
+
+    def respond(self, handler, body):
+        """Статус и тело успешного ответа."""
+        raise NotImplementedError
+
+    def start(self):
+        """Запуск сервера в фоновом потоке."""
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Остановка сервера."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class FakePracticum(FakeServer):
+    """Подмена API статусов домашних работ."""
+
+    def __init__(self, homeworks=1, **kwargs):
+        super().__init__(**kwargs)
+        self.homeworks = homeworks
+
+    @property
+    def endpoint(self):
+        """Адрес для подстановки в homework.ENDPOINT."""
+        return self.url + PRACTICUM_PATH
+
+    def respond(self, handler, body):
+        """Список работ со случайными статусами."""
+        url = urlparse(handler.path)
+        if url.path != PRACTICUM_PATH:
+            return 404, {'detail': 'not found'}
+        if not handler.headers.get('Authorization', '').startswith('OAuth '):
+            return 401, {'code': 'not_authenticated'}
+        from_date = int(parse_qs(url.query).get('from_date', ['0'])[0])
+        with self.lock:
+            statuses = [self.rng.choice(STATUSES)
+                        for _ in range(self.homeworks)]
+        return 200, {
+            'homeworks': [
+                {
+                    'id': index,
+                    'homework_name': f'hw{index}',
+                    'status': status,
+                    'reviewer_comment': '',
+                    'date_updated': '2020-02-13T14:40:57Z',
+                    'lesson_name': 'Урок',
+                }
+                for index, status in enumerate(statuses)
+            ],
+            'current_date': max(from_date, int(time.time())),
+        }
+
+
+class FakeTelegram(FakeServer):
+    """Подмена метода sendMessage Bot API."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.messages = []
+
+    @property
+    def base_url(self):
+        """Адрес для параметра base_url у telegram.Bot."""
+        return self.url + '/bot'
+
+    def error_response(self):
+        """Ограничение частоты, как у Telegram."""
+        return 429, {
+            'ok': False, 'error_code': 429,
+            'description': 'Too Many Requests: retry after 1',
+            'parameters': {'retry_after': 1},
+        }
+
+    def respond(self, handler, body):
+        """Эхо отправленного сообщения."""
+        if not handler.path.endswith('/sendMessage'):
+            return 404, {'ok': False, 'error_code': 404,
+                         'description': 'Not Found'}
+        data = json.loads(body or b'{}')
+        with self.lock:
+            self.messages.append((str(data['chat_id']), data['text']))
+            message_id = len(self.messages)
+        return 200, {'ok': True, 'result': {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': int(data['chat_id']), 'type': 'private'},
+            'text': data['text'],
+        }}
+
+
+class FakeEventProducer:
+    """Источник событий о смене статусов для сервера приёма.
+
+    Каждое событие меняет статус случайной работы на другой, поэтому
+    на каждое событие бот должен отправить одно уведомление.
+    """
+
+    def __init__(self, url, name, homeworks=10, secret=None, seed=None):
+        self.url = f'{url}/events/{name}'
+        self.secret = secret
+        self.rng = random.Random(seed)
+        self.statuses = dict.fromkeys(range(homeworks), STATUSES[0])
+
+    def event(self):
+        """Событие в формате ответа API с одной изменившейся работой."""
+        index = self.rng.randrange(len(self.statuses))
+        status = self.rng.choice(
+            [status for status in STATUSES if status != self.statuses[index]]
+        )
+        self.statuses[index] = status
+        return {'homeworks': [{
+            'id': index,
+            'homework_name': f'hw{index}',
+            'status': status,
+            'date_updated': '2020-02-13T14:40:57Z',
+        }]}
+
+    def send(self, event=None):
+        """Отправка события; код и тело ответа сервера."""
+        headers = {'Content-Type': 'application/json'}
+        if self.secret:
+            headers['Authorization'] = f'Bearer {self.secret}'
+        request = Request(
+            self.url, method='POST', headers=headers,
+            data=json.dumps(event or self.event()).encode('UTF-8'),
+        )
+        try:
+            with urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except HTTPError as error:
+            return error.code, json.loads(error.read())
@@ -0,0 +1,126 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import metrics
+import text_messages
+from exceptions import CircuitOpenError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+WINDOW = int(os.getenv('CIRCUIT_WINDOW', 20))
+MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', 5))
+FAILURE_RATE = float(os.getenv('CIRCUIT_FAILURE_RATE', 0.5))
+OPEN_TIMEOUT = float(os.getenv('CIRCUIT_OPEN_TIMEOUT', 60))
+PROBES = int(os.getenv('CIRCUIT_PROBES', 1))
+
+TRANSITIONS = metrics.Counter(
+    'homework_circuit_transitions_total',
+    'Переходы автомата защиты API между состояниями.',
+)
+REJECTED = metrics.Counter(
+    'homework_circuit_rejected_total',
+    'Запросы к API, отклонённые без обращения к сети.',
+)
+
+_breaker = None
+
+
+class CircuitBreaker:
+    """Автомат защиты: закрыт, открыт и полуоткрыт с пробными запросами.
+
+    В закрытом состоянии учитываются исходы последних window запросов;
+    при доле ошибок не ниже failure_rate автомат открывается и отклоняет
+    запросы open_timeout секунд. Затем пропускаются probes пробных
+    запросов: их успех закрывает автомат, любая ошибка открывает снова.
+    """
+
+    def __init__(self, name, window=WINDOW, min_calls=MIN_CALLS,
+                 failure_rate=FAILURE_RATE, open_timeout=OPEN_TIMEOUT,
+                 probes=PROBES, clock=time.monotonic):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_timeout = open_timeout
+        self.probes = probes
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.outcomes = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes_started = 0
+        self.probes_passed = 0
+
+    def _transition(self, state):
+        previous, self.state = self.state, state
+        self.outcomes.clear()
+        self.probes_started = self.probes_passed = 0
+        if state == OPEN:
+            self.opened_at = self.clock()
+        TRANSITIONS.inc(circuit=self.name, state=state)
+        logging.warning(
+            text_messages.LOG_WARNING_CIRCUIT_STATE,
+            {'name': self.name, 'previous': previous, 'state': state}
+        )
+
+    def before_call(self):
+        """Разрешение запроса или CircuitOpenError без обращения к сети."""
+        with self.lock:
+            if (self.state == OPEN
+                    and self.clock() - self.opened_at >= self.open_timeout):
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and self.probes_started < self.probes:
+                self.probes_started += 1
+                return
+        REJECTED.inc(circuit=self.name)
+        raise CircuitOpenError(
+            text_messages.CIRCUIT_OPEN_ERROR.format(name=self.name)
+        )
+
+    def record_success(self):
+        """Учёт успешного запроса."""
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probes_passed += 1
+                if self.probes_passed >= self.probes:
+                    self._transition(CLOSED)
+            elif self.state == CLOSED:
+                self.outcomes.append(False)
+
+    def record_failure(self):
+        """Учёт неудачного запроса."""
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self._transition(OPEN)
+            elif self.state == CLOSED:
+                self.outcomes.append(True)
+                failures = sum(self.outcomes)
+                if (len(self.outcomes) >= self.min_calls
+                        and failures >= self.failure_rate
+                        * len(self.outcomes)):
+                    self._transition(OPEN)
+
+
+def set_breaker(breaker):
+    """Установка общего автомата защиты для запросов к API."""
+    global _breaker
+    _breaker = breaker
+
+
+def get_breaker():
+    """Установленный автомат защиты или None."""
+    return _breaker
+
+
+metrics.Gauge(
+    'homework_circuit_state',
+    'Состояние автомата защиты API: 0 закрыт, 1 полуоткрыт, 2 открыт.',
+    lambda: STATE_VALUES[_breaker.state] if _breaker else 0,
+)
@@ -0,0 +1,95 @@
+"""Команды бота через длинный опрос getUpdates.
+
+Слушатель работает в отдельном потоке со своим ботом и отвечает на
+команды функциями-обработчиками, которые получают chat_id и возвращают
+текст ответа. Ответы строятся из кэша статусов в памяти, поэтому
+команды не добавляют запросов к API Практикума.
+"""
+import logging
+import os
+import threading
+
+import metrics
+import text_messages
+from lazy import lazy_import
+
+telegram = lazy_import('telegram')
+
+COMMANDS_ENABLED = bool(int(os.getenv('TELEGRAM_COMMANDS', 0)))
+LONG_POLL_TIMEOUT = 30
+ERROR_DELAY = 5
+
+COMMANDS = metrics.Counter(
+    'homework_commands_total', 'Обработанные команды бота.'
+)
+
+
+def parse_command(text):
+    """Имя команды без упоминания бота или None, если это не команда."""
+    if not text or not text.startswith('/'):
+        return None
+    return text.split()[0].split('@')[0].lower()
+
+
+class CommandListener:
+    """Получение обновлений длинным опросом и ответы на команды."""
+
+    def __init__(self, bot, handlers, timeout=LONG_POLL_TIMEOUT):
+        self.bot = bot
+        self.handlers = handlers
+        self.timeout = timeout
+        self.offset = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def handle(self, update):
+        """Ответ на команду из обновления, если она известна."""
+        message = update.effective_message
+        command = parse_command(message.text if message else None)
+        handler = self.handlers.get(command)
+        if handler is None:
+            return
+        COMMANDS.inc(command=command)
+        with metrics.STAGE_LATENCY.time(stage='command'):
+            text = handler(str(message.chat_id))
+        try:
+            self.bot.send_message(chat_id=message.chat_id, text=text)
+        except telegram.error.TelegramError as error:
+            logging.exception(
+                text_messages.LOG_EXCEPT_SEND_MESSAGE,
+                {'message': text, 'error': error}
+            )
+
+    def poll(self):
+        """Один длинный запрос getUpdates и обработка полученного."""
+        updates = self.bot.get_updates(
+            offset=self.offset, timeout=self.timeout,
+            allowed_updates=['message'],
+        )
+        for update in updates:
+            self.offset = update.update_id + 1
+            self.handle(update)
+        return len(updates)
+
+    def run(self):
+        """Цикл длинного опроса до остановки."""
+        while not self.stopped.is_set():
+            try:
+                self.poll()
+            except Exception as error:
+                logging.exception(
+                    text_messages.LOG_EXCEPT_COMMANDS, {'error': error}
+                )
+                self.stopped.wait(ERROR_DELAY)
+
+    def start(self):
+        """Запуск фонового потока."""
+        logging.info(
+            text_messages.LOG_INFO_COMMANDS, {'commands': list(self.handlers)}
+        )
+        self.thread.start()
+        return self
+
+    def close(self):
+        """Остановка после текущего запроса getUpdates."""
+        self.stopped.set()
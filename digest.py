@@ -0,0 +1,113 @@
+import os
+import re
+import threading
+import time
+
+import text_messages
+
+ADMIN_CHAT_ID = (
+    os.getenv('TELEGRAM_ADMIN_CHAT_ID') or os.getenv('TELEGRAM_CHAT_ID')
+)
+WINDOW = float(os.getenv('ERROR_DIGEST_WINDOW', 3600))
+MAX_LINES = 20
+MAX_CAUSE_LENGTH = 200
+
+NORMALISE_PATTERNS = (
+    (re.compile(r'\s*Параметры запроса:.*', re.DOTALL), ''),
+    (re.compile(r'0x[0-9a-fA-F]+'), '<addr>'),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), '<str>'),
+    (re.compile(r'\d+'), '<n>'),
+)
+
+_digest = None
+
+
+def normalise(text):
+    """Текст ошибки без параметров запроса, чисел, адресов и строк."""
+    for pattern, replacement in NORMALISE_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text.strip()[:MAX_CAUSE_LENGTH]
+
+
+def fingerprint(error):
+    """Отпечаток ошибки: тип, тип исходной ошибки и нормализованный текст."""
+    name = type(error).__name__
+    cause = error.__cause__ or error.__context__
+    if cause is not None:
+        name = f'{name}({type(cause).__name__})'
+    return name, normalise(str(error))
+
+
+class ErrorDigest:
+    """Сводка ошибок по отпечаткам за окно времени для чата администратора.
+
+    Сводка готова к отправке, когда окно истекло или появилась ошибка,
+    которой не было в предыдущей сводке.
+    """
+
+    def __init__(self, chat_id=ADMIN_CHAT_ID, window=WINDOW,
+                 clock=time.time):
+        self.chat_id = chat_id
+        self.window = window
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.errors = {}
+        self.reported = set()
+        self.started = clock()
+
+    def add(self, tenant, error):
+        """Учёт ошибки аккаунта."""
+        key = fingerprint(error)
+        with self.lock:
+            count, tenants = self.errors.get(key, (0, set()))
+            tenants.add(tenant.name)
+            self.errors[key] = (count + 1, tenants)
+
+    def due(self):
+        """Пора ли отправлять сводку."""
+        with self.lock:
+            if not self.errors:
+                return False
+            return (self.clock() - self.started >= self.window
+                    or not self.errors.keys() <= self.reported)
+
+    def pop(self):
+        """Текст сводки и сброс окна; None, если ошибок не было."""
+        with self.lock:
+            errors, self.errors = self.errors, {}
+            started, self.started = self.started, self.clock()
+            self.reported = set(errors)
+        if not errors:
+            return None
+        ordered = sorted(
+            errors.items(), key=lambda item: item[1][0], reverse=True
+        )
+        lines = [
+            text_messages.ERROR_DIGEST_HEADER.format(
+                minutes=max(1, round((self.started - started) / 60))
+            )
+        ]
+        lines.extend(
+            text_messages.ERROR_DIGEST_LINE.format(
+                name=name, count=count, tenants=len(tenants), cause=cause
+            )
+            for (name, cause), (count, tenants) in ordered[:MAX_LINES]
+        )
+        if len(ordered) > MAX_LINES:
+            lines.append(
+                text_messages.ERROR_DIGEST_MORE.format(
+                    count=len(ordered) - MAX_LINES
+                )
+            )
+        return '\n'.join(lines)
+
+
+def set_digest(digest):
+    """Установка общей сводки ошибок."""
+    global _digest
+    _digest = digest
+
+
+def get_digest():
+    """Установленная сводка ошибок или None."""
+    return _digest
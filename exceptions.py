@@ -6,3 +6,13 @@ class ApiAnswerError(Exception):
 class ApiAnswerErrorKey(Exception):
     """В ответе API найдены ключи, сообщающие об ошибке."""
     pass
+
+
+class CircuitOpenError(ConnectionError):
+    """Автомат защиты открыт, запрос к API не выполнялся."""
+    pass
+
+
+class ApiRateLimitError(ApiAnswerError):
+    """API ограничил частоту запросов."""
+    pass
@@ -0,0 +1,37 @@
+import bisect
+import hashlib
+
+REPLICAS = 100
+
+
+def hash_key(key):
+    """Положение ключа на кольце."""
+    return int.from_bytes(
+        hashlib.md5(key.encode('UTF-8')).digest()[:8], 'big'
+    )
+
+
+class HashRing:
+    """Консистентное хеширование с виртуальными узлами."""
+
+    def __init__(self, nodes, replicas=REPLICAS):
+        self.nodes = list(nodes)
+        points = sorted(
+            (hash_key(f'{node}:{replica}'), node)
+            for node in self.nodes
+            for replica in range(replicas)
+        )
+        self.keys = [key for key, _ in points]
+        self.owners = [node for _, node in points]
+
+    def node_for(self, key):
+        """Узел, которому принадлежит ключ."""
+        index = bisect.bisect(self.keys, hash_key(key)) % len(self.keys)
+        return self.owners[index]
+
+    def assign(self, tenants):
+        """Имена аккаунтов по узлам; ключ — токен Практикума."""
+        shards = {node: set() for node in self.nodes}
+        for tenant in tenants:
+            shards[self.node_for(tenant.practicum_token)].add(tenant.name)
+        return shards
@@ -1,14 +1,37 @@
+import atexit
+import hashlib
 import logging
 import os
+import queue
+import re
 import sys
 import time
+from functools import partial
+from http import HTTPStatus
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 import requests
-import telegram
 from dotenv import load_dotenv
 
+import circuit
+import commands
+import digest
+import http_client
+import ingest
+import jsonstream
+import leases
+import metrics
+import outbound
+import ratelimit
+import statuscache
+import storage
 import text_messages
 from exceptions import ApiAnswerError, ApiAnswerErrorKey
+from lazy import LazyObject, lazy_import
+from records import Homework, Status
+from tenants import Tenant, current_tenant, use_tenant
+
+telegram = lazy_import('telegram')
 
 load_dotenv()
 
@@ -17,15 +40,37 @@ TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 RETRY_PERIOD = 600
+CURSOR_OVERLAP = 60
+OUTBOX_BATCH = 500
+ADMIN_TENANT = 'admin'
+STREAM_RESPONSES = bool(int(os.getenv('STREAM_RESPONSES', 0)))
+STREAM_CHUNK_SIZE = 64 * 1024
+RETRY_AFTER_STATUSES = (
+    HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE
+)
+CURRENT_DATE_KEY = b'"current_date"'
+CURRENT_DATE_PATTERN = re.compile(CURRENT_DATE_KEY + rb'\s*:\s*(-?\d+)')
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
+COMMAND_LINES = 30
+COMMAND_TIME_FORMAT = '%d.%m %H:%M'
+
+LOG_FILE = __file__ + '.log'
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+LOG_FORMAT = ('%(asctime)s, %(levelname)s, %(funcName)s, '
+              '%(lineno)s, %(message)s')
+
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+VERDICTS = tuple(HOMEWORK_VERDICTS[status.label] for status in Status)
+
 TOKENS = [
     'PRACTICUM_TOKEN',
     'TELEGRAM_TOKEN',
@@ -40,9 +85,8 @@ def check_tokens():
                    in TOKENS if globals()[token_name] is None]
     if none_tokens:
         logging.critical(
-            text_messages.LOG_CRITICAL_CHECK_TOKENS.format(
-                none_tokens=none_tokens
-            )
+            text_messages.LOG_CRITICAL_CHECK_TOKENS,
+            {'none_tokens': none_tokens}
         )
         raise ValueError(
             text_messages.NONE_TOKENS_ERROR_CHECK_TOKENS.format(
@@ -51,45 +95,101 @@ def check_tokens():
         )
 
 
+def permanent_errors():
+    """Ошибки Telegram, после которых повтор отправки не поможет."""
+    return telegram.error.Unauthorized, telegram.error.BadRequest
+
+
+@metrics.STAGE_LATENCY.timed(stage='send_message')
 def send_message(bot, message):
-    """Отправка сообщения в Telegram-чат."""
+    """Отправка сообщения в Telegram-чат.
+
+    RetryAfter и ошибки, после которых повтор не поможет, передаются
+    вызывающему: первое откладывает отправку, второе её прекращает.
+    """
+    tenant = current_tenant.get()
+    chat_id = tenant.chat_id if tenant else TELEGRAM_CHAT_ID
     try:
         logging.info(
-            text_messages.LOG_INFO_START_SEND_MESSAGE.format(
-                message=message
-            )
+            text_messages.LOG_INFO_START_SEND_MESSAGE, {'message': message}
         )
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
+        bot.send_message(chat_id=chat_id, text=message)
         logging.debug(
-            text_messages.LOG_DEBAG_SEND_MESSAGE.format(
-                message=message
-            )
+            text_messages.LOG_DEBAG_SEND_MESSAGE, {'message': message}
         )
+        return True
+    except (telegram.error.RetryAfter, *permanent_errors()):
+        raise
     except telegram.error.TelegramError as error:
         logging.exception(
-            text_messages.LOG_EXCEPT_SEND_MESSAGE.format(
-                message=message,
-                error=error
-            )
+            text_messages.LOG_EXCEPT_SEND_MESSAGE,
+            {'message': message, 'error': error}
         )
+        return False
 
 
-def get_api_answer(timestamp):
-    """Запрос к API."""
-    params_request = {
-        'url': ENDPOINT,
-        'headers': HEADERS,
-        'params': {'from_date': timestamp},
-    }
+def request_api(params_request):
+    """Запрос к API через ограничитель частоты и автомат защиты."""
+    limiter = ratelimit.get_limiter()
+    if limiter:
+        limiter.acquire(params_request['headers']['Authorization'])
+    open_request()
     try:
-        response = requests.get(**params_request)
+        with metrics.STAGE_LATENCY.time(stage='api_request'):
+            response = http_client.get_session().get(**params_request)
     except requests.RequestException as error:
-        raise ConnectionError(
-            text_messages.REQUEST_EXCEPTION_GET_API_ANSWER.format(
-                error=error,
-                params_request=params_request
-            )
+        raise request_failed(error, params_request)
+    return record_response(response, params_request)
+
+
+def open_request():
+    """Проверка автомата защиты перед запросом к API."""
+    breaker = circuit.get_breaker()
+    if breaker:
+        breaker.before_call()
+
+
+def request_failed(error, params_request):
+    """Учёт сбоя соединения с API; исключение для вызывающего."""
+    breaker = circuit.get_breaker()
+    if breaker:
+        breaker.record_failure()
+    return ConnectionError(
+        text_messages.REQUEST_EXCEPTION_GET_API_ANSWER.format(
+            error=error,
+            params_request=params_request
         )
+    )
+
+
+def record_response(response, params_request):
+    """Учёт ответа API автоматом защиты и паузы по Retry-After."""
+    breaker = circuit.get_breaker()
+    if breaker:
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    limiter = ratelimit.get_limiter()
+    if limiter and response.status_code in RETRY_AFTER_STATUSES:
+        pause_requests(limiter, response, params_request)
+    return response
+
+
+def api_request_params(timestamp, **extra):
+    """Параметры запроса к API от имени текущего аккаунта."""
+    tenant = current_tenant.get()
+    return {
+        'url': ENDPOINT,
+        'headers': tenant.headers if tenant else HEADERS,
+        'params': {'from_date': timestamp},
+        'timeout': http_client.TIMEOUT,
+        **extra,
+    }
+
+
+def check_status(response, params_request):
+    """Проверка кода ответа API."""
     if response.status_code != 200:
         raise ApiAnswerError(
             text_messages.HTTP_NOT_OK_ERROR_GET_API_ANSWER.format(
@@ -97,7 +197,10 @@ def get_api_answer(timestamp):
                 params_request=params_request
             )
         )
-    response_json = response.json()
+
+
+def check_error_keys(response_json, params_request):
+    """Проверка ключей, которыми API сообщает об ошибке."""
     for error_key in ['error', 'code']:
         if error_key in response_json:
             raise ApiAnswerErrorKey(
@@ -107,10 +210,84 @@ def get_api_answer(timestamp):
                     params_request=params_request
                 )
             )
+
+
+def get_api_answer(timestamp):
+    """Запрос к API."""
+    params_request = api_request_params(timestamp)
+    response = request_api(params_request)
+    check_status(response, params_request)
+    return decode_answer(response, params_request)
+
+
+def decode_answer(response, params_request):
+    """Разбор JSON ответа API и проверка ключей ошибки."""
+    with metrics.STAGE_LATENCY.time(stage='json_parse'):
+        response_json = response.json()
+    check_error_keys(response_json, params_request)
     logging.debug(text_messages.LOG_DEBAG_GET_API_ANSWER)
     return response_json
 
 
+def hash_payload(response):
+    """Хеш тела ответа без current_date и сам current_date.
+
+    current_date меняется при каждом запросе, поэтому в хеш не входит;
+    берётся последнее вхождение ключа: current_date верхнего уровня
+    API отдаёт после homeworks. Без тела в байтах возвращается None.
+    """
+    body = getattr(response, 'content', None)
+    if not isinstance(body, bytes):
+        return None, None
+    position = body.rfind(CURRENT_DATE_KEY)
+    match = (
+        CURRENT_DATE_PATTERN.match(body, position) if position >= 0 else None
+    )
+    payload = hashlib.blake2b(digest_size=16)
+    if match is None:
+        payload.update(body)
+        return payload.digest(), None
+    view = memoryview(body)
+    payload.update(view[:match.start()])
+    payload.update(view[match.end():])
+    return payload.digest(), int(match.group(1))
+
+
+def stream_api_answer(params_request):
+    """Запрос к API с потоковым чтением тела ответа."""
+    response = request_api(params_request)
+    try:
+        check_status(response, params_request)
+    except ApiAnswerError:
+        response.close()
+        raise
+    return jsonstream.HomeworksStream(
+        response.iter_content(STREAM_CHUNK_SIZE), close=response.close
+    )
+
+
+def pause_requests(limiter, response, params_request):
+    """Пауза по Retry-After: токена при 429, всего адреса при 503."""
+    seconds = ratelimit.retry_after_seconds(
+        response.headers.get('Retry-After')
+    )
+    key = None
+    if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+        key = params_request['headers']['Authorization']
+    limiter.pause(seconds, key)
+    tenant = current_tenant.get()
+    logging.warning(
+        text_messages.LOG_WARNING_RETRY_AFTER_API,
+        {
+            'status_code': response.status_code,
+            'seconds': seconds,
+            'scope': ENDPOINT if key is None else (
+                tenant.name if tenant else TELEGRAM_CHAT_ID
+            ),
+        }
+    )
+
+
 def check_response(response):
     """Проверка ответа API."""
     logging.debug(text_messages.LOG_INFO_START_CHECK_RESPONSE)
@@ -135,8 +312,8 @@ def check_response(response):
     return homeworks
 
 
-def parse_status(homework):
-    """Извлечение информации о статусе работы."""
+def homework_record(homework):
+    """Проверка работы из ответа API и построение компактной записи."""
     if 'homework_name' not in homework:
         raise KeyError(
             text_messages.HOMEWORK_NAME_KEY_ERROR_PARSE_STATUS
@@ -152,63 +329,516 @@ def parse_status(homework):
                 status=status
             )
         )
+    return Homework(
+        key=homework_key(homework),
+        name=homework['homework_name'],
+        status=Status.from_label(status),
+    )
+
+
+@metrics.STAGE_LATENCY.timed(stage='parse_status')
+def parse_status(homework):
+    """Извлечение информации о статусе работы."""
+    if not isinstance(homework, Homework):
+        homework = homework_record(homework)
     logging.debug(text_messages.LOG_DEBAG_PARSE_STATUS)
     return (
         text_messages.MESSAGE_PARSE_STATUS.format(
-            homework_name=homework.get('homework_name'),
-            verdict=HOMEWORK_VERDICTS[status]
+            homework_name=homework.name,
+            verdict=VERDICTS[homework.status]
+        )
+    )
+
+
+def homework_key(homework):
+    """Ключ работы в индексе статусов: id, а при его отсутствии имя."""
+    return homework.get('id', homework.get('homework_name'))
+
+
+def new_statuses(homeworks, statuses, records=None):
+    """Записи работ, статус которых отличается от известного.
+
+    Каждая работа проверяется один раз при построении компактной
+    записи; текст сообщения формируется позже, при отправке, поэтому
+    до конца проверки ответа в памяти лежат только записи. Если передан
+    словарь records, в него складываются записи всех работ.
+    """
+    changes = []
+    for homework in homeworks:
+        record = homework_record(homework)
+        if records is not None:
+            records[record.key] = record
+        if statuses.get(record.key) != record.status:
+            changes.append(record)
+    return changes
+
+
+def deliver(bot, tenant, message_ids, message):
+    """Отправка сообщения аккаунта и отметка результата в outbox.
+
+    True, если Telegram ответил: сообщение отправлено или отклонено
+    окончательно, например при блокировке бота или неверном чате, и
+    больше не отправляется.
+    """
+    with use_tenant(tenant):
+        try:
+            sent = send_message(bot, message)
+        except permanent_errors() as error:
+            logging.warning(
+                text_messages.LOG_WARNING_DEAD_MESSAGE,
+                {'chat_id': tenant.chat_id, 'error': error}
+            )
+            storage.get_store().mark_dead(message_ids)
+            return True
+    if sent:
+        storage.get_store().mark_sent(message_ids)
+    else:
+        storage.get_store().mark_failed(message_ids)
+    return sent
+
+
+def notify(bot, tenant, message, coalesce=False):
+    """Запись сообщения в outbox и отправка или постановка в очередь."""
+    message_id = storage.get_store().add_message(tenant, message)
+    dispatch(bot, tenant, [message_id], message, coalesce)
+    tenant.last_message = message
+    storage.get_store().save_tenant(tenant)
+
+
+def dispatch(bot, tenant, message_ids, message, coalesce=False):
+    """Отправка через очередь исходящих сообщений, если она установлена."""
+    sender = outbound.get_sender()
+    if sender:
+        sender.submit(bot, tenant, message_ids, message, coalesce)
+    else:
+        deliver(bot, tenant, message_ids, message)
+
+
+def send_pending(bot, rows, probe=False):
+    """Отправка строк outbox; проба отправляется синхронно."""
+    for message_id, name, chat_id, message in rows:
+        tenant = Tenant(name=name, practicum_token='', chat_id=chat_id)
+        if not probe:
+            dispatch(bot, tenant, [message_id], message)
+            continue
+        try:
+            return deliver(bot, tenant, [message_id], message)
+        except telegram.error.RetryAfter:
+            storage.get_store().mark_failed([message_id])
+            return False
+    return False
+
+
+def retry_outbox(bot):
+    """Повторная отправка неотправленных сообщений outbox.
+
+    Первое готовое сообщение отправляется как проба; если Telegram
+    ответил, остальные, включая отложенные, уходят одной пачкой.
+    Отправленные сообщения старше OUTBOX_RETENTION удаляются.
+    """
+    store = storage.get_store()
+    if send_pending(bot, store.claim_due(limit=1), probe=True):
+        send_pending(bot, store.claim_due(limit=OUTBOX_BATCH, release=True))
+    store.prune_outbox()
+    depth, age = store.outbox_stats()
+    if depth:
+        logging.info(
+            text_messages.LOG_INFO_OUTBOX_STATS, {'depth': depth, 'age': age}
+        )
+
+
+def advance_cursor(tenant, response):
+    """Сдвиг курсора from_date на current_date из проверенного ответа."""
+    current_date = response.get('current_date')
+    if isinstance(current_date, int) and current_date > tenant.timestamp:
+        tenant.timestamp = current_date
+        storage.get_store().save_tenant(tenant)
+
+
+def handle_response(bot, tenant, response):
+    """Проверка ответа API, уведомления об изменениях и сдвиг курсора."""
+    homeworks = check_response(response)
+    if not homeworks:
+        logging.debug(text_messages.LOG_DEBUG_NO_STATUS_MAIN)
+    records = {} if statuscache.get_cache() is not None else None
+    with tenant.lock:
+        changes = new_statuses(homeworks, tenant.statuses, records)
+        apply_changes(bot, tenant, changes, response)
+    cache_statuses(tenant, records, changes)
+
+
+def poll_api(bot, tenant, timestamp):
+    """Опрос API; ответ, совпавший с предыдущим, не проверяется заново."""
+    params_request = api_request_params(timestamp)
+    process_response(
+        bot, tenant, request_api(params_request), params_request
+    )
+
+
+def process_response(bot, tenant, response, params_request):
+    """Проверка ответа API, запись и отправка изменений статусов.
+
+    Хеш запоминается только после успешной обработки ответа, поэтому
+    совпадение означает, что изменений статусов в нём нет, и остаётся
+    лишь сдвинуть курсор.
+    """
+    check_status(response, params_request)
+    payload_hash, current_date = hash_payload(response)
+    if payload_hash is not None and payload_hash == tenant.payload_hash:
+        metrics.UNCHANGED.inc()
+        advance_cursor(tenant, {'current_date': current_date})
+        cache_statuses(tenant, {}, [])
+        tenant.errors = 0
+        return
+    handle_response(bot, tenant, decode_answer(response, params_request))
+    tenant.payload_hash = payload_hash or b''
+
+
+def poll_stream(bot, tenant, timestamp):
+    """Потоковый запрос к API: работы проверяются по мере чтения тела,
+    уведомления отправляются после проверки всего ответа.
+    """
+    params_request = api_request_params(timestamp, stream=True)
+    records = {} if statuscache.get_cache() is not None else None
+    with tenant.lock:
+        with stream_api_answer(params_request) as stream:
+            changes = new_statuses(stream, tenant.statuses, records)
+        check_error_keys(stream.fields, params_request)
+        check_response(stream.fields)
+        apply_changes(bot, tenant, changes, stream.fields)
+    cache_statuses(tenant, records, changes)
+
+
+def apply_changes(bot, tenant, changes, response):
+    """Запись и отправка изменений статусов, сдвиг курсора."""
+    record_changes(bot, tenant, changes)
+    advance_cursor(tenant, response)
+    tenant.errors = 0
+
+
+def record_changes(bot, tenant, changes):
+    """Запись изменений статусов и уведомления о них.
+
+    Статус работы считается известным только после записи уведомления
+    о нём в outbox: если запись не удалась, изменение будет найдено и
+    уведомлено при следующем опросе.
+
+    Изменения сбрасывают хеш ответа: он описывает статусы до них, и
+    совпавший с ним ответ опроса после события нужно проверить заново.
+    Опрос, прошедший проверку, запоминает свой хеш уже после записи.
+    """
+    for record in changes:
+        notify(bot, tenant, parse_status(record), coalesce=True)
+        tenant.statuses[record.key] = record.status
+        tenant.changed_at = time.time()
+        tenant.payload_hash = b''
+        storage.get_store().save_status(
+            tenant, record.key, record.status, record.name
+        )
+        logging.debug(text_messages.LOG_DEBUG_MAIN)
+
+
+def ingest_event(bot, tenant, event):
+    """Обработка события, присланного серверу приёма; число изменений.
+
+    Событие проверяется как ответ API, но курсор опроса не сдвигается:
+    опрос остаётся сверкой и подберёт изменения, пропущенные в событиях.
+    """
+    homeworks = check_response(event)
+    records = {} if statuscache.get_cache() is not None else None
+    with use_tenant(tenant), tenant.lock:
+        changes = new_statuses(homeworks, tenant.statuses, records)
+        record_changes(bot, tenant, changes)
+    cache_statuses(tenant, records, changes)
+    storage.get_store().flush()
+    return len(changes)
+
+
+def start_ingest(bot, tenants):
+    """Сервер приёма событий, если задан INGEST_PORT."""
+    if not ingest.INGEST_PORT:
+        return None
+    return ingest.IngestServer(partial(ingest_event, bot), tenants).start()
+
+
+def cache_statuses(tenant, records, changes):
+    """Запись проверенного ответа в кэш статусов для команд.
+
+    Чат, которого нет в кэше после запуска или вытеснения, сначала
+    заполняется известными статусами из хранилища: в ответе API есть
+    только работы из окна from_date.
+    """
+    cache = statuscache.get_cache()
+    if cache is None or records is None:
+        return
+    chat_id = str(tenant.chat_id)
+    if chat_id not in cache:
+        cache.update(chat_id, storage.get_store().load_homeworks(tenant))
+    cache.update(chat_id, records.values(), changes)
+
+
+def format_time(timestamp):
+    """Время для ответа на команду."""
+    return time.strftime(COMMAND_TIME_FORMAT, time.localtime(timestamp))
+
+
+def status_reply(chat_id):
+    """Ответ на /status: последние известные статусы работ чата."""
+    cache = statuscache.get_cache()
+    entry = cache.get(chat_id) if cache is not None else None
+    if entry is None or not entry.homeworks:
+        return text_messages.COMMAND_NO_DATA
+    records = list(entry.homeworks.values())[-COMMAND_LINES:]
+    return '\n'.join([
+        text_messages.COMMAND_STATUS_HEADER.format(
+            time=format_time(entry.updated)
+        ),
+        *(
+            text_messages.COMMAND_STATUS_LINE.format(
+                name=record.name, verdict=VERDICTS[record.status]
+            )
+            for record in records
+        ),
+    ])
+
+
+def history_reply(chat_id):
+    """Ответ на /history: последние изменения статусов, новые сверху."""
+    cache = statuscache.get_cache()
+    entry = cache.get(chat_id) if cache is not None else None
+    if entry is None:
+        return text_messages.COMMAND_NO_DATA
+    if not entry.history:
+        return text_messages.COMMAND_HISTORY_EMPTY
+    return '\n'.join(
+        text_messages.COMMAND_HISTORY_LINE.format(
+            time=format_time(changed_at), name=record.name,
+            verdict=VERDICTS[record.status]
+        )
+        for changed_at, record in reversed(entry.history)
+    )
+
+
+COMMAND_HANDLERS = {'/status': status_reply, '/history': history_reply}
+
+
+def start_commands():
+    """Кэш статусов и слушатель команд, если команды включены."""
+    if not commands.COMMANDS_ENABLED:
+        return None
+    statuscache.set_cache(statuscache.StatusCache())
+    return commands.CommandListener(
+        telegram.Bot(token=TELEGRAM_TOKEN), COMMAND_HANDLERS
+    ).start()
+
+
+def handle_error(bot, tenant, error):
+    """Учёт ошибки цикла опроса и уведомление о ней."""
+    tenant.errors += 1
+    metrics.ERRORS.inc(type=type(error).__name__, tenant=tenant.name)
+    message = text_messages.MAIN_ERROR_MESSAGE.format(error=error)
+    logging.error(message, exc_info=error)
+    error_digest = digest.get_digest()
+    if error_digest:
+        error_digest.add(tenant, error)
+        return
+    if tenant.last_message != message:
+        try:
+            notify(bot, tenant, message)
+        except Exception as error:
+            logging.exception(
+                text_messages.LOG_EXCEPT_SEND_MESSAGE,
+                {'message': message, 'error': error}
+            )
+
+
+def send_digest(bot):
+    """Отправка сводки ошибок в чат администратора, если она готова.
+
+    Сводка длиннее предела Telegram отправляется несколькими
+    сообщениями, разбитыми по строкам.
+    """
+    error_digest = digest.get_digest()
+    if not error_digest or not error_digest.due():
+        return
+    message = error_digest.pop()
+    if not error_digest.chat_id:
+        logging.warning(message)
+        return
+    admin = Tenant(
+        name=ADMIN_TENANT, practicum_token='', chat_id=error_digest.chat_id
+    )
+    lines = [([], line) for line in message.split('\n')]
+    for _, part in outbound.merge_messages(lines):
+        message_id = storage.get_store().add_message(admin, part)
+        dispatch(bot, admin, [message_id], part)
+
+
+def flush_state():
+    """Фиксация накопленного состояния; сбой хранилища журналируется."""
+    try:
+        storage.get_store().flush()
+    except Exception as error:
+        logging.exception(
+            text_messages.LOG_EXCEPT_HOUSEKEEPING, {'error': error}
+        )
+
+
+def housekeeping(bot):
+    """Обслуживание после цикла опроса: сводка, outbox, фиксация.
+
+    Как и ошибка опроса, сбой хранилища здесь журналируется и не
+    останавливает цикл; несохранённые изменения остаются в очереди
+    записи до следующей фиксации.
+    """
+    try:
+        send_digest(bot)
+        retry_outbox(bot)
+    except Exception as error:
+        logging.exception(
+            text_messages.LOG_EXCEPT_HOUSEKEEPING, {'error': error}
         )
+    flush_state()
+
+
+def reload_tenant(tenant):
+    """Загрузка состояния аккаунта, перешедшего от другой реплики.
+
+    Пока аккаунт опрашивала другая реплика, её курсор, статусы и
+    последнее сообщение попали в общее хранилище; без перезагрузки
+    уже отправленные уведомления ушли бы повторно.
+    """
+    with tenant.lock:
+        storage.get_store().load_tenant(tenant)
+        tenant.payload_hash = b''
+
+
+def begin_poll(tenant):
+    """Подготовка к опросу; False, если аккаунт принадлежит другой реплике."""
+    if not leases.owned(tenant):
+        return False
+    if leases.acquired(tenant):
+        reload_tenant(tenant)
+    metrics.POLLS.inc(tenant=tenant.name)
+    return True
+
+
+def poll_timestamp(tenant):
+    """from_date опроса: курсор аккаунта с перекрытием CURSOR_OVERLAP."""
+    return max(0, tenant.timestamp - CURSOR_OVERLAP)
+
+
+def poll_tenant(bot, tenant):
+    """Один цикл опроса API и уведомления для аккаунта."""
+    if not begin_poll(tenant):
+        return
+    with use_tenant(tenant):
+        try:
+            timestamp = poll_timestamp(tenant)
+            if STREAM_RESPONSES:
+                poll_stream(bot, tenant, timestamp)
+            else:
+                poll_api(bot, tenant, timestamp)
+        except Exception as error:
+            handle_error(bot, tenant, error)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Передача записей в очередь без форматирования в вызывающем потоке."""
+
+    def prepare(self, record):
+        """Запись уходит в очередь как есть, её форматирует слушатель."""
+        return record
+
+
+def configure_logging(filename=LOG_FILE, level=LOG_LEVEL):
+    """Журналирование через очередь с ротацией файла по размеру."""
+    log_queue = queue.SimpleQueue()
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [
+        RotatingFileHandler(
+            filename=filename, maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT, encoding='UTF-8'
+        ),
+        logging.StreamHandler(stream=sys.stdout),
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    listener = QueueListener(
+        log_queue, *handlers, respect_handler_level=True
     )
+    logging.basicConfig(
+        level=level, handlers=[DeferredQueueHandler(log_queue)]
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def load_main_tenant(store):
+    """Аккаунт из переменных окружения с сохранённым состоянием."""
+    tenant = Tenant(
+        name=TELEGRAM_CHAT_ID,
+        practicum_token=PRACTICUM_TOKEN,
+        chat_id=TELEGRAM_CHAT_ID,
+    )
+    if not store.load_tenant(tenant):
+        tenant.timestamp = int(time.time())
+    return tenant
+
+
+def run_once(bot=None):
+    """Один опрос с уведомлениями и выход; True, если ошибок не было.
+
+    Бот создаётся при первой отправке, поэтому запуск без изменений
+    статусов не загружает python-telegram-bot.
+    """
+    check_tokens()
+    if bot is None:
+        bot = LazyObject(lambda: telegram.Bot(token=TELEGRAM_TOKEN))
+    store = storage.get_store()
+    tenant = load_main_tenant(store)
+    logging.info(text_messages.LOG_INFO_RUN_ONCE)
+    poll_tenant(bot, tenant)
+    housekeeping(bot)
+    return tenant.errors == 0
 
 
 def main():
     """Основная логика работы бота."""
     check_tokens()
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-    last_message = ''
+    store = storage.get_store()
+    tenant = load_main_tenant(store)
+    start_ingest(bot, [tenant])
     logging.info(text_messages.LOG_INFO_MAIN)
     while True:
         try:
-            response = get_api_answer(timestamp)
-            homeworks = check_response(response)
-            if not homeworks:
-                logging.debug(text_messages.LOG_DEBUG_NO_STATUS_MAIN)
-                continue
-            message = parse_status(homeworks[0])
-            if last_message != message:
-                send_message(bot, message)
-                logging.debug(text_messages.LOG_DEBUG_MAIN)
-                last_message = message
-                timestamp = response.get('current_date', timestamp)
-        except Exception as error:
-            message = text_messages.MAIN_ERROR_MESSAGE.format(
-                error=error
-            )
-            logging.exception(message)
-            if last_message != message:
-                try:
-                    send_message(bot, message)
-                    last_message = message
-                except Exception as error:
-                    logging.exception(
-                        text_messages.LOG_EXCEPT_SEND_MESSAGE.format(
-                            message=message, error=error
-                        )
-                    )
+            poll_tenant(bot, tenant)
+            housekeeping(bot)
         finally:
             time.sleep(RETRY_PERIOD)
 
 
 if __name__ == '__main__':
-    logging.basicConfig(
-        level=logging.DEBUG,
-        handlers=[
-            logging.FileHandler(
-                filename=__file__ + '.log', mode='w', encoding='UTF-8'),
-            logging.StreamHandler(stream=sys.stdout)
-        ],
-        format='%(asctime)s, %(levelname)s, %(funcName)s, '
-               '%(lineno)s, %(message)s',
-    )
+    configure_logging()
+    if '--once' in sys.argv[1:]:
+        storage.set_store(storage.SQLiteStore())
+        ok = run_once()
+        storage.get_store().close()
+        sys.exit(0 if ok else 1)
+    if metrics.METRICS_PORT:
+        metrics.start_server()
+    http_client.set_session(http_client.PooledSession())
+    circuit.set_breaker(circuit.CircuitBreaker(ENDPOINT))
+    ratelimit.set_limiter(ratelimit.EndpointLimiter())
+    digest.set_digest(digest.ErrorDigest())
+    if leases.LEASE_STORE:
+        leases.set_manager(leases.LeaseManager(
+            leases.create_backend(leases.LEASE_STORE),
+            names=[TELEGRAM_CHAT_ID],
+        ).start())
+    storage.set_store(storage.SQLiteStore())
+    outbound.set_sender(outbound.OutboundQueue(deliver))
+    start_commands()
     main()
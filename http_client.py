@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 2))
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+_session = None
+
+
+class SessionStats:
+    """Счётчики соединений и задержек запросов сессии."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.handshakes = 0
+        self.requests = 0
+        self.latency_total = 0.0
+        self.latency_last = 0.0
+
+    def add_handshake(self):
+        """Учёт нового TCP/TLS-соединения."""
+        with self.lock:
+            self.handshakes += 1
+
+    def add_request(self, latency):
+        """Учёт завершённого запроса и его длительности."""
+        with self.lock:
+            self.requests += 1
+            self.latency_total += latency
+            self.latency_last = latency
+
+    @property
+    def latency_avg(self):
+        """Средняя длительность запроса, с."""
+        return self.latency_total / self.requests if self.requests else 0.0
+
+
+class CountingAdapter(HTTPAdapter):
+    """Адаптер с пулом соединений, считающий установку соединений."""
+
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        """Подмена классов пулов на считающие новые соединения."""
+        super().init_poolmanager(*args, **kwargs)
+        stats = self.stats
+
+        def counting_pool(pool_class):
+            def _new_conn(pool):
+                stats.add_handshake()
+                return pool_class._new_conn(pool)
+            return type(pool_class.__name__, (pool_class,),
+                        {'_new_conn': _new_conn})
+
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: counting_pool(pool_class)
+            for scheme, pool_class
+            in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+
+class PooledSession(requests.Session):
+    """Сессия с keep-alive пулом, повторами и таймаутами по умолчанию."""
+
+    def __init__(self, pool_size=POOL_SIZE, max_retries=MAX_RETRIES,
+                 timeout=TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+        self.stats = SessionStats()
+        retry = Retry(
+            total=max_retries, connect=max_retries, read=max_retries,
+            status=0, backoff_factor=0.5,
+        )
+        adapter = CountingAdapter(
+            self.stats, pool_connections=pool_size,
+            pool_maxsize=pool_size, max_retries=retry,
+        )
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        """Запрос с таймаутом по умолчанию и замером длительности."""
+        kwargs.setdefault('timeout', self.timeout)
+        started = time.perf_counter()
+        try:
+            return super().request(method, url, **kwargs)
+        finally:
+            self.stats.add_request(time.perf_counter() - started)
+
+
+def set_session(session):
+    """Установка общей сессии для запросов к API."""
+    global _session
+    _session = session
+
+
+def get_session():
+    """Общая сессия, если установлена, иначе модуль requests."""
+    return _session or requests
+
+
+def session_stat(name):
+    """Счётчик установленной сессии или 0."""
+    return getattr(getattr(_session, 'stats', None), name, 0)
+
+
+metrics.Gauge(
+    'homework_http_connections_opened',
+    'Открыто TCP/TLS-соединений общей сессией.',
+    lambda: session_stat('handshakes'),
+)
+metrics.Gauge(
+    'homework_http_requests',
+    'Выполнено запросов общей сессией.',
+    lambda: session_stat('requests'),
+)
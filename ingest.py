@@ -0,0 +1,169 @@
+"""Приём событий об изменении статусов по HTTP.
+
+POST /events/<имя аккаунта> принимает тело в формате ответа API
+({"homeworks": [...]}) и передаёт его обработчику сразу, без ожидания
+следующего опроса. При заданном INGEST_SECRET запрос должен нести
+заголовок Authorization: Bearer <секрет>; без секрета сервер слушает
+только loopback-адрес. Опрос API продолжается и служит сверкой на
+случай потерянных событий.
+"""
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import leases
+import metrics
+import text_messages
+
+INGEST_PORT = os.getenv('INGEST_PORT')
+INGEST_HOST = os.getenv('INGEST_HOST', '127.0.0.1')
+INGEST_SECRET = os.getenv('INGEST_SECRET')
+EVENTS_PATH = '/events/'
+MAX_BODY = 1024 * 1024
+
+EVENTS = metrics.Counter(
+    'homework_ingest_events_total',
+    'События сервера приёма по коду ответа.',
+)
+
+
+def is_loopback(host):
+    """Доступен ли адрес только с этой машины."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def content_length(value):
+    """Длина тела из Content-Length; ValueError, если значение неверно."""
+    if value is None:
+        return 0
+    if not (value.isascii() and value.isdigit()):
+        raise ValueError(text_messages.INGEST_LENGTH_ERROR.format(value=value))
+    return int(value)
+
+
+class IngestServer:
+    """HTTP-сервер приёма событий в фоновом потоке.
+
+    handle(tenant, event) проверяет событие, отправляет уведомления и
+    возвращает число изменений; TypeError, KeyError и ValueError
+    означают, что событие не прошло проверку.
+    """
+
+    def __init__(self, handle, tenants, secret=INGEST_SECRET,
+                 host=INGEST_HOST, port=INGEST_PORT):
+        if not secret and not is_loopback(host):
+            logging.critical(
+                text_messages.LOG_CRITICAL_INGEST_SECRET, {'host': host}
+            )
+            raise ValueError(
+                text_messages.INGEST_SECRET_ERROR.format(host=host)
+            )
+        self.handle = handle
+        self.tenants = {tenant.name: tenant for tenant in tenants}
+        self.secret = secret
+        self.httpd = ThreadingHTTPServer(
+            (host, int(port or 0)), self.handler_class()
+        )
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self):
+        """Базовый адрес сервера."""
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def handler_class(self):
+        """Класс обработчика, связанный с этим сервером."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                status, payload = server.process(self)
+                EVENTS.inc(code=int(status))
+                body = json.dumps(payload, ensure_ascii=False).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                if status >= HTTPStatus.BAD_REQUEST:
+                    self.send_header('Connection', 'close')
+                    self.close_connection = True
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def authorised(self, header):
+        """Совпадает ли секрет из заголовка Authorization."""
+        if not self.secret:
+            return True
+        return hmac.compare_digest(
+            (header or '').encode(), f'Bearer {self.secret}'.encode()
+        )
+
+    def read_body(self, request):
+        """Тело запроса и ответ с ошибкой, если длина тела неверна."""
+        try:
+            length = content_length(request.headers.get('Content-Length'))
+        except ValueError as error:
+            return None, (HTTPStatus.BAD_REQUEST, {'error': str(error)})
+        if length > MAX_BODY:
+            return None, (
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'too large'}
+            )
+        return request.rfile.read(length), None
+
+    def process(self, request):
+        """Код ответа и тело для запроса с событием."""
+        if not request.path.startswith(EVENTS_PATH):
+            return HTTPStatus.NOT_FOUND, {'error': 'not found'}
+        if not self.authorised(request.headers.get('Authorization')):
+            return HTTPStatus.UNAUTHORIZED, {'error': 'unauthorized'}
+        body, rejected = self.read_body(request)
+        if rejected:
+            return rejected
+        tenant = self.tenants.get(request.path[len(EVENTS_PATH):])
+        if tenant is None:
+            return HTTPStatus.NOT_FOUND, {'error': 'unknown tenant'}
+        if not leases.owned(tenant):
+            return HTTPStatus.CONFLICT, {'error': 'not owned'}
+        try:
+            with metrics.STAGE_LATENCY.time(stage='ingest'):
+                changes = self.handle(tenant, json.loads(body))
+        except (TypeError, KeyError, ValueError) as error:
+            return HTTPStatus.BAD_REQUEST, {'error': str(error)}
+        except Exception as error:
+            logging.exception(
+                text_messages.LOG_EXCEPT_INGEST,
+                {'name': tenant.name, 'error': error}
+            )
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'failed'}
+        return HTTPStatus.ACCEPTED, {'changes': changes}
+
+    def start(self):
+        """Запуск сервера в фоновом потоке."""
+        self.thread.start()
+        logging.info(text_messages.LOG_INFO_INGEST, {'url': self.url})
+        return self
+
+    def close(self):
+        """Остановка сервера."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
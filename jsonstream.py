@@ -0,0 +1,131 @@
+"""Потоковый разбор ответа API со списком homeworks.
+
+Тело читается частями; элементы homeworks декодируются по одному и
+сразу отдаются вызывающему, поэтому в памяти одновременно находится
+только текущий элемент и непрочитанный остаток части, а не весь ответ.
+Остальные ключи верхнего уровня собираются в fields.
+"""
+import codecs
+import json
+
+import text_messages
+
+WHITESPACE = ' \t\n\r'
+
+decoder = json.JSONDecoder()
+
+
+class HomeworksStream:
+    """Итератор по элементам homeworks из частей тела ответа.
+
+    После исчерпания итератора fields содержит остальные ключи
+    верхнего уровня, а под ключом homeworks — пустой список, если
+    значение было списком, или само значение иначе.
+    """
+
+    def __init__(self, chunks, close=None):
+        self.chunks = iter(chunks)
+        self.close_response = close
+        self.text_decoder = codecs.getincrementaldecoder('UTF-8')()
+        self.buffer = ''
+        self.position = 0
+        self.finished = False
+        self.fields = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Закрытие ответа, из которого читается тело."""
+        if self.close_response:
+            self.close_response()
+
+    def fill(self):
+        """Чтение следующей части; False, если тело закончилось."""
+        if self.finished:
+            return False
+        self.buffer = self.buffer[self.position:]
+        self.position = 0
+        for chunk in self.chunks:
+            text = self.text_decoder.decode(chunk)
+            if text:
+                self.buffer += text
+                return True
+        self.buffer += self.text_decoder.decode(b'', final=True)
+        self.finished = True
+        return True
+
+    def peek(self):
+        """Следующий значащий символ без его извлечения."""
+        while True:
+            while (self.position < len(self.buffer)
+                   and self.buffer[self.position] in WHITESPACE):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                raise ValueError(text_messages.STREAM_TRUNCATED_ERROR)
+
+    def expect(self, *chars):
+        """Извлечение одного из ожидаемых символов."""
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(
+                text_messages.STREAM_UNEXPECTED_ERROR.format(
+                    char=char, position=self.position
+                )
+            )
+        self.position += 1
+        return char
+
+    def value(self):
+        """Декодирование очередного значения JSON целиком."""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            if end == len(self.buffer) and not self.finished:
+                self.fill()
+                continue
+            self.position = end
+            return value
+
+    def items(self):
+        """Элементы массива по одному."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.position += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',', ']') == ']':
+                return
+
+    def __iter__(self):
+        self.expect('{')
+        if self.peek() == '}':
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            if key == 'homeworks' and self.peek() == '[':
+                for item in self.items():
+                    if not isinstance(item, dict):
+                        raise TypeError(
+                            text_messages.NOT_DICT_HOMEWORK_ERROR.format(
+                                type=type(item)
+                            )
+                        )
+                    yield item
+                self.fields[key] = []
+            else:
+                self.fields[key] = self.value()
+            if self.expect(',', '}') == '}':
+                return
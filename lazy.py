@@ -0,0 +1,63 @@
+"""Отложенная загрузка тяжёлых зависимостей.
+
+lazy_import возвращает заместитель модуля, который импортирует модуль
+обычным образом при первом обращении к атрибуту, поэтому запуск,
+которому не понадобился Telegram, его не загружает. Импорт выполняется
+под блокировкой заместителя: потоки, одновременно обратившиеся к нему
+впервые, получают только полностью исполненный модуль.
+"""
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Заместитель модуля, импортируемого при первом обращении."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._lock = threading.Lock()
+        self._module = None
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self.__name__)
+            return self._module
+
+    def __getattr__(self, name):
+        return getattr(self._module or self._load(), name)
+
+
+def lazy_import(name):
+    """Модуль, загружаемый при первом обращении к атрибуту."""
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        return importlib.import_module(name)
+    return LazyModule(name)
+
+
+def is_loaded(name):
+    """Импортирован ли уже модуль."""
+    return name in sys.modules
+
+
+class LazyObject:
+    """Объект, создаваемый фабрикой при первом обращении к атрибуту."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._target = None
+
+    def _create(self):
+        with self._lock:
+            if self._target is None:
+                self._target = self._factory()
+            return self._target
+
+    def __getattr__(self, name):
+        return getattr(self._target or self._create(), name)
@@ -0,0 +1,307 @@
+"""Аренда аккаунтов между репликами бота.
+
+Каждая реплика продлевает свою аренду участника и аренды своих
+аккаунтов; аккаунты делятся между живыми участниками консистентным
+хешированием. Реплика опрашивает только аккаунты, аренда которых
+принадлежит ей, поэтому две реплики не опрашивают один аккаунт, а доля
+упавшей реплики переходит к остальным после истечения её аренд.
+
+Кольцо строится по участникам одной группы. Процессы супервизора
+опрашивают каждый свою часть аккаунтов, поэтому процесс с номером i
+входит в группу i и делит аккаунты только с процессами того же номера
+в других репликах; реплики должны запускать одинаковое число процессов.
+"""
+import fcntl
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import text_messages
+from hashring import HashRing
+from tenants import SQLITE_SUFFIXES
+
+LEASE_STORE = os.getenv('LEASE_STORE')
+LEASE_TTL = float(os.getenv('LEASE_TTL', 30))
+MEMBER_PREFIX = 'member:'
+LEASES_FILE = 'leases.json'
+LOCK_FILE = 'leases.lock'
+
+LEASES_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+'''
+
+_manager = None
+
+
+class LeaseBackend:
+    """Хранилище аренд без общего состояния: всё принадлежит вызывающему."""
+
+    def acquire(self, owner, keys, ttl):
+        """Захват или продление аренд; возвращает удерживаемые ключи."""
+        return set(keys)
+
+    def release(self, owner, keys):
+        """Освобождение аренд владельца."""
+
+    def owners(self, prefix):
+        """Владельцы действующих аренд с ключами, начинающимися с prefix."""
+        return set()
+
+    def close(self):
+        """Закрытие хранилища."""
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """Аренды в таблице общей базы SQLite."""
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(LEASES_SCHEMA)
+
+    def acquire(self, owner, keys, ttl):
+        """Захват свободных, истёкших и своих аренд одной транзакцией."""
+        now = time.time()
+        keys = list(keys)
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                self.connection.executemany(
+                    'INSERT INTO leases (key, owner, expires) '
+                    'VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+                    'owner = excluded.owner, expires = excluded.expires '
+                    'WHERE leases.owner = excluded.owner '
+                    'OR leases.expires <= ?',
+                    [(key, owner, now + ttl, now) for key in keys]
+                )
+                held = {
+                    row[0] for row in self.connection.execute(
+                        'SELECT key FROM leases WHERE owner = ?', (owner,)
+                    )
+                }
+            except sqlite3.Error:
+                self.connection.execute('ROLLBACK')
+                raise
+            self.connection.execute('COMMIT')
+        return held & set(keys)
+
+    def release(self, owner, keys):
+        """Освобождение аренд владельца."""
+        with self.lock:
+            self.connection.executemany(
+                'DELETE FROM leases WHERE key = ? AND owner = ?',
+                [(key, owner) for key in keys]
+            )
+
+    def owners(self, prefix):
+        """Владельцы действующих аренд с ключами, начинающимися с prefix."""
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT owner FROM leases WHERE substr(key, 1, ?) = ? '
+                'AND expires > ?',
+                (len(prefix), prefix, time.time())
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def close(self):
+        """Закрытие соединения."""
+        self.connection.close()
+
+
+class FileLeaseBackend(LeaseBackend):
+    """Аренды в JSON-файле каталога под блокировкой flock."""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, LEASES_FILE)
+        self.lock_path = os.path.join(directory, LOCK_FILE)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def leases(self):
+        """Таблица аренд под эксклюзивной блокировкой; изменения пишутся."""
+        with self.lock, open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.path, encoding='UTF-8') as file:
+                        leases = json.load(file)
+                except (FileNotFoundError, ValueError):
+                    leases = {}
+                yield leases
+                temporary = self.path + '.tmp'
+                with open(temporary, 'w', encoding='UTF-8') as file:
+                    json.dump(leases, file)
+                os.replace(temporary, self.path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def acquire(self, owner, keys, ttl):
+        """Захват свободных, истёкших и своих аренд."""
+        now = time.time()
+        held = set()
+        with self.leases() as leases:
+            for key in keys:
+                current = leases.get(key)
+                if current and current[0] != owner and current[1] > now:
+                    continue
+                leases[key] = (owner, now + ttl)
+                held.add(key)
+        return held
+
+    def release(self, owner, keys):
+        """Освобождение аренд владельца."""
+        with self.leases() as leases:
+            for key in keys:
+                if leases.get(key, ('',))[0] == owner:
+                    del leases[key]
+
+    def owners(self, prefix):
+        """Владельцы действующих аренд с ключами, начинающимися с prefix."""
+        now = time.time()
+        with self.leases() as leases:
+            return {
+                owner for key, (owner, expires) in leases.items()
+                if key.startswith(prefix) and expires > now
+            }
+
+
+def create_backend(location):
+    """Хранилище аренд: база SQLite по расширению, иначе каталог."""
+    if location.endswith(SQLITE_SUFFIXES):
+        return SQLiteLeaseBackend(location)
+    return FileLeaseBackend(location)
+
+
+class LeaseManager:
+    """Продление аренд реплики в фоновом потоке.
+
+    Аренды продлеваются каждые ttl / 3 секунд, поэтому доля упавшей
+    реплики переходит к остальным не позже чем через ttl плюс период
+    продления.
+    """
+
+    def __init__(self, backend, owner=None, ttl=LEASE_TTL, names=(),
+                 group=''):
+        self.backend = backend
+        self.owner = owner or f'{socket.gethostname()}:{os.getpid()}'
+        self.ttl = ttl
+        self.member_prefix = f'{MEMBER_PREFIX}{group}/'
+        self.member = self.member_prefix + self.owner
+        self.names = set(names)
+        self.lock = threading.Lock()
+        self.owned = set()
+        self.acquired = set()
+        self.owned_until = 0.0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def refresh(self):
+        """Продление членства, перераспределение и захват своих аккаунтов."""
+        started = time.time()
+        self.backend.acquire(self.owner, [self.member], self.ttl)
+        members = self.backend.owners(self.member_prefix) | {self.owner}
+        ring = HashRing(sorted(members))
+        with self.lock:
+            names = set(self.names)
+        wanted = {name for name in names if ring.node_for(name) == self.owner}
+        held = self.backend.acquire(self.owner, wanted, self.ttl)
+        self.backend.release(self.owner, self.owned - wanted)
+        with self.lock:
+            changed = held != self.owned
+            self.acquired = (self.acquired | held - self.owned) & held
+            self.owned = held
+            self.owned_until = started + self.ttl
+        if changed:
+            logging.info(
+                text_messages.LOG_INFO_LEASES,
+                {
+                    'owner': self.owner, 'owned': len(held),
+                    'total': len(names), 'members': len(members),
+                }
+            )
+        return held
+
+    def owns(self, name):
+        """Удерживает ли реплика аренду аккаунта прямо сейчас."""
+        with self.lock:
+            return name in self.owned and time.time() < self.owned_until
+
+    def pop_acquired(self, name):
+        """Перешёл ли аккаунт к реплике после последней проверки."""
+        with self.lock:
+            if name not in self.acquired:
+                return False
+            self.acquired.discard(name)
+            return True
+
+    def track(self, names):
+        """Замена набора аккаунтов, аренды которых делятся."""
+        with self.lock:
+            self.names = set(names)
+
+    def run(self):
+        """Цикл продления аренд."""
+        while not self.stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as error:
+                logging.exception(
+                    text_messages.LOG_EXCEPT_LEASES, {'error': error}
+                )
+            self.stopped.wait(self.ttl / 3)
+
+    def start(self):
+        """Первое продление и запуск фонового потока.
+
+        Состояние аккаунтов первого продления уже загружено при запуске,
+        поэтому перезагружать его не нужно.
+        """
+        self.refresh()
+        with self.lock:
+            self.acquired.clear()
+        self.thread.start()
+        return self
+
+    def close(self):
+        """Остановка продления и освобождение всех аренд."""
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        with self.lock:
+            owned, self.owned = self.owned, set()
+        self.backend.release(self.owner, owned | {self.member})
+        self.backend.close()
+
+
+def set_manager(manager):
+    """Установка менеджера аренд процесса."""
+    global _manager
+    _manager = manager
+
+
+def get_manager():
+    """Установленный менеджер аренд или None."""
+    return _manager
+
+
+def owned(tenant):
+    """Должна ли эта реплика опрашивать аккаунт."""
+    return _manager is None or _manager.owns(tenant.name)
+
+
+def acquired(tenant):
+    """Перешёл ли аккаунт к реплике от другой после прошлого вызова."""
+    return _manager is not None and _manager.pop_acquired(tenant.name)
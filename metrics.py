@@ -0,0 +1,210 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = os.getenv('METRICS_PORT')
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(key, extra=()):
+    """Метки в формате Prometheus."""
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    labels = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n')
+        )
+        for name, value in pairs
+    )
+    return '{' + labels + '}'
+
+
+class Metric:
+    """Базовая метрика с набором значений по меткам."""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.lock = threading.Lock()
+        self.values = {}
+        (registry if registry is not None else REGISTRY).append(self)
+
+    def samples(self):
+        """Пары (суффикс и метки, значение) для вывода."""
+        with self.lock:
+            return [
+                (format_labels(key), value)
+                for key, value in sorted(self.values.items())
+            ]
+
+    def render(self):
+        """Текст метрики в формате Prometheus."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        lines.extend(
+            f'{self.name}{suffix} {value}'
+            for suffix, value in self.samples()
+        )
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Монотонный счётчик."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """Увеличение счётчика."""
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Текущее значение счётчика."""
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными границами корзин."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS,
+                 registry=None):
+        super().__init__(name, documentation, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        """Учёт наблюдения."""
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(self.buckets) + 3)
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Замер длительности блока."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def timed(self, **labels):
+        """Декоратор, замеряющий длительность вызова функции."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, **labels):
+        """Число наблюдений."""
+        counts = self.values.get(tuple(sorted(labels.items())))
+        return counts[-1] if counts else 0
+
+    def render(self):
+        """Текст гистограммы в формате Prometheus."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        with self.lock:
+            items = sorted(
+                (key, list(counts)) for key, counts in self.values.items()
+            )
+        for key, counts in items:
+            cumulative = 0
+            for bound, count in zip(
+                self.buckets + ('+Inf',), counts[:len(self.buckets) + 1]
+            ):
+                cumulative += count
+                labels = format_labels(key, (('le', bound),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = format_labels(key)
+            lines.append(f'{self.name}_sum{labels} {counts[-2]}')
+            lines.append(f'{self.name}_count{labels} {counts[-1]}')
+        return '\n'.join(lines)
+
+
+class Gauge(Metric):
+    """Показатель, вычисляемый при каждом чтении."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback, registry=None):
+        super().__init__(name, documentation, registry)
+        self.callback = callback
+
+    def samples(self):
+        """Значение из функции обратного вызова."""
+        return [('', self.callback())]
+
+
+REGISTRY = []
+
+STAGE_LATENCY = Histogram(
+    'homework_stage_seconds',
+    'Длительность этапов опроса и уведомления.',
+)
+POLLS = Counter('homework_polls_total', 'Опросы API по аккаунтам.')
+ERRORS = Counter(
+    'homework_errors_total', 'Ошибки цикла опроса по типу и аккаунту.'
+)
+UNCHANGED = Counter(
+    'homework_unchanged_responses_total',
+    'Ответы API, совпавшие с предыдущим: проверка и разбор пропущены.',
+)
+
+
+def render(registry=None):
+    """Все метрики реестра в текстовом формате Prometheus."""
+    registry = REGISTRY if registry is None else registry
+    return '\n'.join(metric.render() for metric in registry) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдача метрик по GET /metrics."""
+
+    def do_GET(self):
+        """Ответ с текстом метрик."""
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode('UTF-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Запросы к метрикам не журналируются."""
+
+
+def start_server(port=METRICS_PORT, host='127.0.0.1'):
+    """Запуск HTTP-сервера метрик в фоновом потоке."""
+    server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,269 @@
+import heapq
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+
+import metrics
+import storage
+import text_messages
+from lazy import lazy_import
+from ratelimit import TokenBucket
+
+telegram = lazy_import('telegram')
+
+GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+SENDER_WORKERS = int(os.getenv('TELEGRAM_SENDER_WORKERS', 4))
+COALESCE_WINDOW = float(os.getenv('TELEGRAM_COALESCE_WINDOW', 2))
+
+_sender = None
+
+
+def merge_messages(items, limit=None):
+    """Склейка сообщений построчно в части не длиннее limit.
+
+    Принимает и возвращает пары (идентификаторы outbox, текст);
+    идентификаторы сообщения, не поместившегося в одну часть, относятся
+    к последней из них. По умолчанию limit — предел длины Telegram.
+    """
+    limit = limit or telegram.constants.MAX_MESSAGE_LENGTH
+    chunks = []
+    ids, text = [], ''
+    for message_ids, message in items:
+        parts = [
+            message[start:start + limit]
+            for start in range(0, len(message), limit)
+        ] or ['']
+        for part in parts:
+            if text and len(text) + 1 + len(part) > limit:
+                chunks.append((ids, text))
+                ids, text = [], ''
+            text = f'{text}\n{part}' if text else part
+        ids.extend(message_ids)
+    if text:
+        chunks.append((ids, text))
+    return chunks
+
+
+class OutboundQueue:
+    """Очередь исходящих сообщений Telegram с фоновыми отправителями.
+
+    Отправка ограничена общим ведром токенов и ведром на каждый чат;
+    при RetryAfter чат ставится на паузу. Сообщение чата, которому
+    рано отправлять, не занимает отправителя: оно откладывается до
+    зарезервированного времени и возвращается в очередь. Сообщения
+    о статусах одного чата, пришедшие в пределах coalesce_window,
+    склеиваются в одно.
+    """
+
+    def __init__(self, deliver, workers=SENDER_WORKERS,
+                 global_rate=GLOBAL_RATE, chat_rate=CHAT_RATE,
+                 coalesce_window=COALESCE_WINDOW):
+        self.deliver = deliver
+        self.chat_rate = chat_rate
+        self.coalesce_window = coalesce_window
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_buckets = {}
+        self.buckets_lock = threading.Lock()
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.coalesced_in = 0
+        self.coalesced_out = 0
+        self.stopped = threading.Event()
+        self.queue = queue.Queue()
+        self.delayed = []
+        self.delayed_ready = threading.Condition()
+        self.sequence = itertools.count()
+        self.threads = [
+            threading.Thread(target=self.work, daemon=True)
+            for _ in range(workers)
+        ]
+        self.flusher = threading.Thread(target=self.flush_loop, daemon=True)
+        for thread in self.threads + [self.flusher]:
+            thread.start()
+
+    @property
+    def depth(self):
+        """Сообщений в очереди, включая отложенные."""
+        return self.queue.qsize() + len(self.delayed)
+
+    @property
+    def saved_calls(self):
+        """Число вызовов API Telegram, сэкономленных склейкой."""
+        return self.coalesced_in - self.coalesced_out
+
+    def chat_bucket(self, chat_id):
+        """Ведро токенов чата."""
+        with self.buckets_lock:
+            bucket = self.chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = self.chat_buckets[chat_id] = TokenBucket(
+                    self.chat_rate, capacity=1
+                )
+            return bucket
+
+    def submit(self, bot, tenant, message_ids, message, coalesce=False):
+        """Постановка сообщения в очередь или в буфер склейки."""
+        if not coalesce or self.coalesce_window <= 0:
+            self.queue.put((bot, tenant, message_ids, message))
+            return
+        with self.pending_lock:
+            batch = self.pending.get(tenant.chat_id)
+            if batch is None:
+                batch = self.pending[tenant.chat_id] = (
+                    time.monotonic() + self.coalesce_window, bot, tenant, []
+                )
+            batch[3].append((message_ids, message))
+
+    def flush_pending(self, force=False):
+        """Отправка в очередь буферов склейки, окно которых истекло."""
+        now = time.monotonic()
+        with self.pending_lock:
+            due = [
+                chat_id for chat_id, batch in self.pending.items()
+                if force or batch[0] <= now
+            ]
+            batches = [self.pending.pop(chat_id) for chat_id in due]
+        for _, bot, tenant, items in batches:
+            chunks = merge_messages(items)
+            with self.pending_lock:
+                self.coalesced_in += len(items)
+                self.coalesced_out += len(chunks)
+            for message_ids, message in chunks:
+                self.queue.put((bot, tenant, message_ids, message))
+
+    def defer(self, delay, item):
+        """Возврат сообщения в очередь через delay секунд."""
+        with self.delayed_ready:
+            heapq.heappush(
+                self.delayed,
+                (time.monotonic() + delay, next(self.sequence), item)
+            )
+            self.delayed_ready.notify()
+
+    def release_delayed(self):
+        """Ожидание и перенос в очередь отложенных сообщений, чьё
+        время наступило.
+        """
+        with self.delayed_ready:
+            timeout = max(self.coalesce_window, 0.1) / 4
+            if self.delayed:
+                timeout = min(timeout, self.delayed[0][0] - time.monotonic())
+            if timeout > 0:
+                self.delayed_ready.wait(timeout)
+            now = time.monotonic()
+            while self.delayed and self.delayed[0][0] <= now:
+                self.queue.put(heapq.heappop(self.delayed)[2])
+
+    def flush_loop(self):
+        """Цикл сброса буферов склейки и отложенных сообщений."""
+        while not self.stopped.is_set():
+            self.release_delayed()
+            self.flush_pending()
+
+    def work(self):
+        """Цикл фонового отправителя."""
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                self.send(*item)
+            except Exception as error:
+                logging.exception(
+                    text_messages.LOG_EXCEPT_SENDER,
+                    {'chat_id': item[1].chat_id, 'error': error}
+                )
+                self.fail(item[2])
+            finally:
+                self.queue.task_done()
+
+    def fail(self, message_ids):
+        """Откладывание сообщений в outbox после сбоя отправителя."""
+        try:
+            storage.get_store().mark_failed(message_ids)
+        except Exception as error:
+            logging.exception(
+                text_messages.LOG_EXCEPT_SENDER,
+                {'chat_id': None, 'error': error}
+            )
+
+    def send(self, bot, tenant, message_ids, message, reserved=False):
+        """Отправка одного сообщения с учётом ограничений.
+
+        Если токен чата будет доступен не сразу, он резервируется, а
+        сообщение откладывается до этого времени с reserved=True.
+        """
+        chat_bucket = self.chat_bucket(tenant.chat_id)
+        if not reserved:
+            wait = chat_bucket.reserve()
+            if wait > 0:
+                self.defer(wait, (bot, tenant, message_ids, message, True))
+                return
+        self.global_bucket.acquire()
+        try:
+            self.deliver(bot, tenant, message_ids, message)
+        except telegram.error.RetryAfter as error:
+            logging.warning(
+                text_messages.LOG_WARNING_RETRY_AFTER,
+                {'chat_id': tenant.chat_id, 'seconds': error.retry_after}
+            )
+            chat_bucket.pause(error.retry_after)
+            self.queue.put((bot, tenant, message_ids, message))
+
+    def join(self):
+        """Ожидание отправки всех сообщений, включая буферы склейки."""
+        self.flush_pending(force=True)
+        while True:
+            self.queue.join()
+            with self.delayed_ready:
+                if not self.delayed:
+                    return
+                wait = self.delayed[0][0] - time.monotonic()
+            time.sleep(max(wait, 0.01))
+
+    def close(self):
+        """Остановка отправителей после отправки сообщений очереди.
+
+        Отложенные сообщения не ждут своего времени: они помечаются в
+        outbox как неотправленные и уходят при повторе outbox.
+        """
+        self.stopped.set()
+        with self.delayed_ready:
+            self.delayed_ready.notify()
+        self.flusher.join()
+        self.flush_pending(force=True)
+        with self.delayed_ready:
+            delayed, self.delayed = self.delayed, []
+        for _, _, item in delayed:
+            self.fail(item[2])
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+
+def set_sender(sender):
+    """Установка очереди исходящих сообщений."""
+    global _sender
+    _sender = sender
+
+
+def get_sender():
+    """Текущая очередь исходящих сообщений или None."""
+    return _sender
+
+
+metrics.Gauge(
+    'homework_telegram_queue_depth',
+    'Сообщений в очереди отправки Telegram.',
+    lambda: _sender.depth if _sender else 0,
+)
+metrics.Gauge(
+    'homework_telegram_calls_saved',
+    'Вызовов Telegram, сэкономленных склейкой сообщений.',
+    lambda: _sender.saved_calls if _sender else 0,
+)
@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import text_messages
+from exceptions import ApiRateLimitError
+
+API_RATE = float(os.getenv('PRACTICUM_RATE', 10))
+API_BURST = int(os.getenv('PRACTICUM_BURST', 0)) or None
+RETRY_AFTER_DEFAULT = float(os.getenv('PRACTICUM_RETRY_AFTER', 60))
+
+_limiter = None
+
+
+class TokenBucket:
+    """Потокобезопасное ведро токенов с возможностью паузы."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def reserve(self):
+        """Резервирование токена; возвращает время ожидания, с."""
+        with self.lock:
+            now = self.clock()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def acquire(self):
+        """Взятие токена с ожиданием."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def set_rate(self, rate, capacity=None):
+        """Смена скорости и ёмкости ведра без потери накопленного."""
+        with self.lock:
+            self._refill(self.clock())
+            self.rate = rate
+            self.capacity = capacity or rate
+            self.tokens = min(self.tokens, self.capacity)
+
+    def pause(self, seconds):
+        """Запрет выдачи токенов на заданное время."""
+        with self.lock:
+            self.paused_until = max(
+                self.paused_until, self.clock() + seconds
+            )
+
+
+def retry_after_seconds(value, default=RETRY_AFTER_DEFAULT,
+                        now=time.time):
+    """Пауза из заголовка Retry-After в секундах или в формате HTTP-даты."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now())
+    except (TypeError, ValueError):
+        return default
+
+
+class EndpointLimiter:
+    """Общий бюджет запросов к API с паузами по Retry-After.
+
+    Ведро токенов ограничивает частоту запросов всех аккаунтов и потоков.
+    Пауза по ключу (токену аккаунта) или всего адреса (ключ None) не
+    ждёт, а сразу отклоняет запрос, чтобы не занимать рабочие потоки.
+    """
+
+    def __init__(self, rate=API_RATE, capacity=API_BURST,
+                 clock=time.monotonic):
+        self.bucket = TokenBucket(rate, capacity, clock)
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.paused = {}
+
+    def paused_for(self, key=None):
+        """Оставшаяся пауза для ключа с учётом паузы всего адреса, с."""
+        now = self.clock()
+        with self.lock:
+            remaining = 0.0
+            for name in {None, key}:
+                until = self.paused.get(name)
+                if until is None:
+                    continue
+                if until <= now:
+                    del self.paused[name]
+                else:
+                    remaining = max(remaining, until - now)
+            return remaining
+
+    def reserve(self, key=None):
+        """Резервирование токена на запрос; время ожидания, с.
+
+        ApiRateLimitError, если ключ на паузе.
+        """
+        remaining = self.paused_for(key)
+        if remaining:
+            raise ApiRateLimitError(
+                text_messages.RATE_LIMITED_ERROR_GET_API_ANSWER
+            )
+        return self.bucket.reserve()
+
+    def acquire(self, key=None):
+        """Токен на запрос или ApiRateLimitError, если ключ на паузе."""
+        wait = self.reserve(key)
+        if wait > 0:
+            time.sleep(wait)
+
+    def share(self, processes, rate=API_RATE, capacity=API_BURST):
+        """Доля общего бюджета для одного из processes процессов."""
+        self.bucket.set_rate(
+            rate / processes, max(1.0, (capacity or rate) / processes)
+        )
+
+    def pause(self, seconds, key=None):
+        """Пауза запросов по ключу или, при key=None, ко всему адресу."""
+        with self.lock:
+            self.paused[key] = max(
+                self.paused.get(key, 0.0), self.clock() + seconds
+            )
+
+
+def set_limiter(limiter):
+    """Установка общего ограничителя запросов к API."""
+    global _limiter
+    _limiter = limiter
+
+
+def get_limiter():
+    """Установленный ограничитель или None."""
+    return _limiter
@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+from enum import IntEnum
+
+
+class Status(IntEnum):
+    """Статус проверки работы; значение — индекс в HOMEWORK_VERDICTS."""
+
+    APPROVED = 0
+    REVIEWING = 1
+    REJECTED = 2
+
+    @property
+    def label(self):
+        """Статус в написании API."""
+        return self.name.lower()
+
+    @classmethod
+    def from_label(cls, label):
+        """Статус по написанию API; KeyError для неизвестного."""
+        return cls[label.upper()]
+
+
+@dataclass
+class Homework:
+    """Проверенная работа из ответа API."""
+
+    __slots__ = ('key', 'name', 'status')
+
+    key: object
+    name: str
+    status: Status
@@ -0,0 +1,253 @@
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import telegram
+from telegram.utils.request import Request
+
+import circuit
+import digest
+import homework
+import http_client
+import leases
+import metrics
+import outbound
+import ratelimit
+import storage
+import text_messages
+from scheduler import DISPATCH_BATCH, AdaptiveScheduler
+from tenants import load_tenants
+
+MAX_WORKERS = 64
+
+
+class TenantRunner:
+    """Параллельный опрос многих аккаунтов в одном процессе."""
+
+    def __init__(self, bot, tenants, max_workers=MAX_WORKERS,
+                 scheduler=None):
+        self.bot = bot
+        self.tenants = tenants
+        self.scheduler = scheduler or AdaptiveScheduler()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.polls = 0
+        self.elapsed = 0.0
+        now = time.time()
+        for tenant in tenants:
+            self.scheduler.add(tenant, now)
+
+    @property
+    def throughput(self):
+        """Средняя пропускная способность, опросов в секунду."""
+        return self.polls / self.elapsed if self.elapsed else 0.0
+
+    def poll(self, tenants):
+        """Опрос переданных аккаунтов и планирование следующих опросов."""
+        started = time.monotonic()
+        list(self.executor.map(
+            partial(homework.poll_tenant, self.bot), tenants
+        ))
+        homework.flush_state()
+        elapsed = time.monotonic() - started
+        self.polls += len(tenants)
+        self.elapsed += elapsed
+        for tenant in tenants:
+            self.scheduler.schedule(tenant)
+        self.log_stats(len(tenants), elapsed)
+
+    def assign(self, tenants):
+        """Замена набора аккаунтов: новые ставятся в очередь, убранные
+        снимаются с расписания, остальные сохраняют своё состояние.
+        """
+        current = {tenant.name: tenant for tenant in self.tenants}
+        names = {tenant.name for tenant in tenants}
+        for tenant in self.tenants:
+            if tenant.name not in names:
+                self.scheduler.remove(tenant)
+        added = [tenant for tenant in tenants if tenant.name not in current]
+        restore(added)
+        now = time.time()
+        for tenant in added:
+            self.scheduler.add(tenant, now)
+        self.tenants = [current.get(tenant.name, tenant) for tenant in tenants]
+        manager = leases.get_manager()
+        if manager:
+            manager.track(tenant.name for tenant in self.tenants)
+        return added
+
+    def run_round(self):
+        """Опрос всех аккаунтов реестра по одному разу."""
+        self.poll(self.tenants)
+
+    def run_due(self):
+        """Опрос аккаунтов, время которых наступило, пачками."""
+        due = self.scheduler.pop_due(limit=DISPATCH_BATCH)
+        while due:
+            self.poll(due)
+            due = self.scheduler.pop_due(limit=DISPATCH_BATCH)
+        homework.housekeeping(self.bot)
+
+    def log_stats(self, polls, elapsed):
+        """Журналирование пропускной способности и плана опросов."""
+        logging.info(
+            text_messages.LOG_INFO_RUNNER_ROUND,
+            {
+                'polls': polls,
+                'elapsed': elapsed,
+                'throughput': polls / elapsed if elapsed else 0.0,
+            }
+        )
+        logging.info(
+            text_messages.LOG_INFO_SCHEDULER_STATS,
+            {
+                'requests': self.scheduler.requests_per_hour_planned,
+                'delay': self.scheduler.median_delay,
+            }
+        )
+        sender = outbound.get_sender()
+        if sender:
+            logging.info(
+                text_messages.LOG_INFO_COALESCE_STATS,
+                {'messages': sender.coalesced_in, 'saved': sender.saved_calls}
+            )
+        session = http_client.get_session()
+        stats = getattr(session, 'stats', None)
+        if stats:
+            logging.info(
+                text_messages.LOG_INFO_SESSION_STATS,
+                {
+                    'handshakes': stats.handshakes,
+                    'requests': stats.requests,
+                    'latency': stats.latency_avg * 1000,
+                }
+            )
+
+    def close(self):
+        """Остановка пула потоков."""
+        self.executor.shutdown(wait=True)
+
+
+def create_bot(pool_size):
+    """Бот с пулом соединений на pool_size одновременных отправок."""
+    if homework.TELEGRAM_TOKEN is None:
+        logging.critical(
+            text_messages.LOG_CRITICAL_CHECK_TOKENS,
+            {'none_tokens': ['TELEGRAM_TOKEN']}
+        )
+        raise ValueError(
+            text_messages.NONE_TOKENS_ERROR_CHECK_TOKENS.format(
+                none_tokens=['TELEGRAM_TOKEN']
+            )
+        )
+    return telegram.Bot(
+        token=homework.TELEGRAM_TOKEN,
+        request=Request(con_pool_size=pool_size),
+    )
+
+
+def select(tenants, names=None):
+    """Аккаунты реестра с указанными именами или все."""
+    if names is None:
+        return tenants
+    return [tenant for tenant in tenants if tenant.name in names]
+
+
+def restore(tenants):
+    """Восстановление состояния аккаунтов из хранилища."""
+    store = storage.get_store()
+    now = int(time.time())
+    for tenant in tenants:
+        if not store.load_tenant(tenant):
+            tenant.timestamp = tenant.timestamp or now
+
+
+def prepare(path, pool_size, names=None, group=''):
+    """Загрузка реестра, хранилища, сессии и восстановление состояния."""
+    tenants = select(load_tenants(path), names)
+    if metrics.METRICS_PORT:
+        metrics.start_server()
+    storage.set_store(storage.SQLiteStore())
+    restore(tenants)
+    http_client.set_session(http_client.PooledSession(pool_size=pool_size))
+    circuit.set_breaker(circuit.CircuitBreaker(homework.ENDPOINT))
+    ratelimit.set_limiter(ratelimit.EndpointLimiter())
+    digest.set_digest(digest.ErrorDigest())
+    if leases.LEASE_STORE:
+        leases.set_manager(leases.LeaseManager(
+            leases.create_backend(leases.LEASE_STORE),
+            names=[tenant.name for tenant in tenants], group=group,
+        ).start())
+    return tenants
+
+
+def close_leases():
+    """Освобождение аренд, чтобы другие реплики забрали аккаунты сразу."""
+    manager = leases.get_manager()
+    if manager:
+        manager.close()
+        leases.set_manager(None)
+
+
+def share_limiter(processes):
+    """Доля бюджета запросов к API для одного из processes процессов."""
+    limiter = ratelimit.get_limiter()
+    if limiter:
+        limiter.share(processes)
+
+
+def main(path, max_workers=MAX_WORKERS, names=None, control=None,
+         processes=1, group=''):
+    """Опрос аккаунтов из реестра по расписанию планировщика.
+
+    С control (multiprocessing.Connection) процесс получает от
+    супервизора пары (имена аккаунтов, число процессов), а None
+    завершает работу. Бюджет запросов к API делится поровну между
+    processes процессами, аренды делятся внутри группы group.
+    Команды бота и события принимает только процесс без супервизора:
+    getUpdates допускает одного получателя на токен, а адрес сервера
+    приёма один на все процессы.
+    """
+    bot = create_bot(max_workers)
+    tenants = prepare(path, max_workers, names, group)
+    share_limiter(processes)
+    sender = outbound.OutboundQueue(homework.deliver)
+    outbound.set_sender(sender)
+    listener = homework.start_commands() if control is None else None
+    server = homework.start_ingest(bot, tenants) if control is None else None
+    runner = TenantRunner(bot, tenants, max_workers=max_workers)
+    metrics.Gauge(
+        'homework_planned_requests_per_hour',
+        'Запланированное число запросов к API в час.',
+        lambda: runner.scheduler.requests_per_hour_planned,
+    )
+    logging.info(text_messages.LOG_INFO_RUNNER, {'count': len(tenants)})
+    try:
+        while True:
+            runner.run_due()
+            delay = runner.scheduler.next_delay()
+            if control is None:
+                time.sleep(delay)
+            elif control.poll(delay):
+                message = control.recv()
+                if message is None:
+                    break
+                names, processes = message
+                share_limiter(processes)
+                runner.assign(select(load_tenants(path), names))
+    finally:
+        if listener:
+            listener.close()
+        if server:
+            server.close()
+        runner.close()
+        close_leases()
+        sender.close()
+        storage.get_store().close()
+
+
+if __name__ == '__main__':
+    homework.configure_logging(level=os.getenv('LOG_LEVEL', 'INFO'))
+    main(sys.argv[1])
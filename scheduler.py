@@ -0,0 +1,131 @@
+import os
+import random
+import time
+from collections import Counter
+
+from records import Status
+from timingwheel import TimingWheel
+
+REVIEWING_PERIOD = int(os.getenv('REVIEWING_PERIOD', 120))
+ACTIVE_PERIOD = int(os.getenv('ACTIVE_PERIOD', 600))
+IDLE_PERIOD = int(os.getenv('IDLE_PERIOD', 3600))
+IDLE_AFTER = int(os.getenv('IDLE_AFTER', 7 * 24 * 3600))
+MAX_BACKOFF = int(os.getenv('MAX_BACKOFF', 3600))
+REQUESTS_PER_HOUR = int(os.getenv('REQUESTS_PER_HOUR', 36000))
+DISPATCH_BATCH = int(os.getenv('DISPATCH_BATCH', 1000))
+
+
+class AdaptiveScheduler:
+    """Выбор времени следующего опроса для каждого аккаунта.
+
+    Интервал зависит от статусов работ и давности последнего изменения,
+    после ошибок растёт экспоненциально со случайным разбросом, а при
+    превышении общего бюджета запросов все интервалы растягиваются.
+    Сроки опросов хранятся в колесе таймеров по имени аккаунта, а
+    число аккаунтов с каждым интервалом — в счётчике, поэтому медиана
+    считается по нескольким различным интервалам, а не по всем аккаунтам.
+    """
+
+    def __init__(self, requests_per_hour=REQUESTS_PER_HOUR, rng=None,
+                 wheel=None):
+        self.requests_per_hour = requests_per_hour
+        self.rng = rng or random.Random()
+        self.intervals = {}
+        self.interval_counts = Counter()
+        self.demand = 0.0
+        self.wheel = wheel or TimingWheel()
+
+    def base_interval(self, tenant, now):
+        """Интервал без учёта ошибок и бюджета."""
+        if Status.REVIEWING in tenant.statuses.values():
+            return REVIEWING_PERIOD
+        if tenant.changed_at and now - tenant.changed_at > IDLE_AFTER:
+            return IDLE_PERIOD
+        return ACTIVE_PERIOD
+
+    def backoff(self, errors):
+        """Экспоненциальная задержка после ошибок с разбросом."""
+        delay = min(MAX_BACKOFF, ACTIVE_PERIOD * 2 ** (errors - 1))
+        return delay / 2 + self.rng.uniform(0, delay / 2)
+
+    def interval(self, tenant, now):
+        """Интервал до следующего опроса аккаунта, с."""
+        interval = self.base_interval(tenant, now)
+        self.forget(self.intervals.get(tenant.name))
+        self.intervals[tenant.name] = interval
+        self.interval_counts[interval] += 1
+        self.demand += 3600 / interval
+        if self.demand > self.requests_per_hour:
+            interval *= self.demand / self.requests_per_hour
+        if tenant.errors:
+            interval = max(interval, self.backoff(tenant.errors))
+        return interval
+
+    def forget(self, interval):
+        """Исключение прежнего интервала аккаунта из бюджета и счётчика."""
+        if not interval:
+            return
+        self.demand -= 3600 / interval
+        self.interval_counts[interval] -= 1
+        if not self.interval_counts[interval]:
+            del self.interval_counts[interval]
+
+    def add(self, tenant, now=None):
+        """Постановка аккаунта в очередь с немедленным опросом."""
+        now = time.time() if now is None else now
+        self.wheel.advance(now)
+        tenant.next_poll = now
+        self.wheel.schedule(tenant.name, now, tenant)
+
+    def schedule(self, tenant, now=None):
+        """Назначение или перенос следующего опроса аккаунта."""
+        now = time.time() if now is None else now
+        self.wheel.advance(now)
+        tenant.next_poll = now + self.interval(tenant, now)
+        self.wheel.schedule(tenant.name, tenant.next_poll, tenant)
+
+    def remove(self, tenant):
+        """Снятие аккаунта с расписания и из расчёта бюджета."""
+        self.forget(self.intervals.pop(tenant.name, None))
+        self.wheel.cancel(tenant.name)
+        tenant.next_poll = None
+
+    def pop_due(self, now=None, limit=None):
+        """Аккаунты, время опроса которых наступило, не больше limit."""
+        now = time.time() if now is None else now
+        return self.wheel.pop_due(now, limit)
+
+    def next_delay(self, now=None):
+        """Время до ближайшего запланированного опроса, с."""
+        now = time.time() if now is None else now
+        deadline = self.wheel.next_deadline()
+        if deadline is None:
+            return ACTIVE_PERIOD
+        return max(0.0, deadline - now)
+
+    @property
+    def requests_per_hour_planned(self):
+        """Ожидаемое число запросов в час с учётом бюджета."""
+        return min(self.demand, self.requests_per_hour)
+
+    @property
+    def median_delay(self):
+        """Медиана ожидаемой задержки уведомления: половина интервала."""
+        total = len(self.intervals)
+        if not total:
+            return 0.0
+        median = (
+            self.nth_interval((total - 1) // 2)
+            + self.nth_interval(total // 2)
+        ) / 2
+        scale = max(1.0, self.demand / self.requests_per_hour)
+        return median * scale / 2
+
+    def nth_interval(self, index):
+        """Интервал с номером index в упорядоченном списке аккаунтов."""
+        seen = 0
+        for interval, count in sorted(self.interval_counts.items()):
+            seen += count
+            if index < seen:
+                return interval
+        raise IndexError(index)
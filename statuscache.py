@@ -0,0 +1,108 @@
+"""Кэш последних статусов работ для ответов на команды в Telegram.
+
+Для каждого чата хранятся записи работ из проверенных ответов API и
+последние изменения статусов. Ответ API содержит только работы из
+окна from_date, поэтому записи каждого ответа добавляются к уже
+известным. Запись чата, не обновлявшаяся дольше ttl секунд, не
+отдаётся и удаляется при чтении; ttl по умолчанию больше самого
+длинного интервала опроса. При переполнении вытесняется чат, к
+которому дольше всего не обращались.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+import metrics
+
+CACHE_SIZE = int(os.getenv('STATUS_CACHE_SIZE', 10000))
+CACHE_TTL = float(os.getenv('STATUS_CACHE_TTL', 7200))
+HISTORY_LENGTH = 20
+
+HITS = metrics.Counter(
+    'homework_status_cache_requests_total',
+    'Обращения к кэшу статусов по результату: hit, miss, expired.',
+)
+
+_cache = None
+
+
+@dataclass
+class CacheEntry:
+    """Работы чата по ключу, последние изменения и время обновления."""
+
+    homeworks: dict = field(default_factory=dict)
+    history: deque = field(
+        default_factory=lambda: deque(maxlen=HISTORY_LENGTH)
+    )
+    updated: float = 0.0
+
+
+class StatusCache:
+    """Кэш записей работ по чатам с истечением по TTL и вытеснением LRU."""
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, chat_id):
+        with self.lock:
+            return chat_id in self.entries
+
+    def update(self, chat_id, records, changed=()):
+        """Добавление записей из ответа и изменившихся статусов."""
+        now = self.clock()
+        with self.lock:
+            entry = self.entries.pop(chat_id, None)
+            if entry is None:
+                entry = CacheEntry()
+            entry.homeworks.update(
+                (record.key, record) for record in records
+            )
+            entry.history.extend((now, record) for record in changed)
+            entry.updated = now
+            self.entries[chat_id] = entry
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def get(self, chat_id):
+        """Копия свежей записи чата или None."""
+        with self.lock:
+            entry = self.entries.get(chat_id)
+            if entry is None:
+                HITS.inc(result='miss')
+                return None
+            if self.clock() - entry.updated >= self.ttl:
+                del self.entries[chat_id]
+                HITS.inc(result='expired')
+                return None
+            self.entries.move_to_end(chat_id)
+            HITS.inc(result='hit')
+            return CacheEntry(
+                dict(entry.homeworks), list(entry.history), entry.updated
+            )
+
+
+def set_cache(cache):
+    """Установка общего кэша статусов."""
+    global _cache
+    _cache = cache
+
+
+def get_cache():
+    """Установленный кэш статусов или None."""
+    return _cache
+
+
+metrics.Gauge(
+    'homework_status_cache_chats',
+    'Чатов в кэше статусов.',
+    lambda: len(_cache) if _cache is not None else 0,
+)
@@ -0,0 +1,370 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from itertools import groupby
+from operator import itemgetter
+
+import metrics
+from records import Homework, Status
+
+STATE_DB = os.getenv('STATE_DB', 'homework_state.db')
+BATCH_SIZE = 500
+BUSY_TIMEOUT = float(os.getenv('STATE_DB_TIMEOUT', 30))
+OUTBOX_LEASE = 300
+OUTBOX_RETRY_BASE = 30
+OUTBOX_RETRY_MAX = 3600
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 24))
+OUTBOX_RETENTION = float(os.getenv('OUTBOX_RETENTION', 7 * 24 * 3600))
+PRUNE_BATCH = 10000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tenant_state (
+    name TEXT PRIMARY KEY,
+    timestamp INTEGER NOT NULL,
+    last_message TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS homework_status (
+    tenant TEXT NOT NULL,
+    homework NOT NULL,
+    status TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (tenant, homework)
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created REAL NOT NULL,
+    sent REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    leased INTEGER NOT NULL DEFAULT 0,
+    failed REAL
+);
+'''
+OUTBOX_INDEX = (
+    'CREATE INDEX IF NOT EXISTS outbox_due ON outbox (sent, next_attempt)'
+)
+OUTBOX_COLUMNS = {
+    'attempts': 'INTEGER NOT NULL DEFAULT 0',
+    'next_attempt': 'REAL NOT NULL DEFAULT 0',
+    'leased': 'INTEGER NOT NULL DEFAULT 0',
+    'failed': 'REAL',
+}
+MIGRATIONS = {
+    'outbox': OUTBOX_COLUMNS,
+    'homework_status': {'name': "TEXT NOT NULL DEFAULT ''"},
+}
+
+_store = None
+
+
+class StateStore:
+    """Хранилище состояния бота, по умолчанию ничего не сохраняющее."""
+
+    def load_tenant(self, tenant):
+        """Восстановление курсора, статусов и последнего сообщения."""
+        return False
+
+    def save_tenant(self, tenant):
+        """Сохранение курсора и последнего сообщения аккаунта."""
+
+    def save_status(self, tenant, key, status, name=''):
+        """Сохранение последнего статуса работы."""
+
+    def load_names(self, tenant):
+        """Сохранённые названия работ аккаунта по ключам."""
+        return {}
+
+    def load_homeworks(self, tenant):
+        """Записи работ по известным статусам аккаунта."""
+        names = self.load_names(tenant)
+        return [
+            Homework(key=key, name=names.get(key) or str(key), status=status)
+            for key, status in tenant.statuses.items()
+        ]
+
+    def add_message(self, tenant, text):
+        """Запись сообщения в outbox до отправки."""
+
+    def mark_sent(self, message_ids):
+        """Отметка об отправке сообщений из outbox."""
+
+    def mark_failed(self, message_ids):
+        """Откладывание повторной отправки с экспоненциальной задержкой."""
+
+    def mark_dead(self, message_ids):
+        """Отказ от отправки сообщений, которые Telegram не примет."""
+
+    def claim_due(self, limit=100, release=False):
+        """Захват сообщений outbox, время повтора которых наступило."""
+        return []
+
+    def outbox_stats(self):
+        """Глубина outbox и возраст старейшего сообщения, с."""
+        return 0, 0.0
+
+    def prune_outbox(self, retention=OUTBOX_RETENTION):
+        """Удаление завершённых сообщений старше retention секунд."""
+        return 0
+
+    def flush(self):
+        """Фиксация накопленных изменений."""
+
+    def close(self):
+        """Закрытие хранилища."""
+
+
+class SQLiteStore(StateStore):
+    """Хранилище состояния в SQLite с WAL и пакетной фиксацией.
+
+    Изменения курсоров и статусов копятся в памяти и записываются одной
+    короткой транзакцией при flush или по достижении batch_size, поэтому
+    блокировка записи базы не удерживается на время запросов к API и
+    процессы с общей базой не ждут друг друга. Запись в outbox и захват
+    его сообщений сразу фиксируют накопленное вместе с собой.
+    """
+
+    def __init__(self, path=STATE_DB, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.pending = []
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None,
+            timeout=BUSY_TIMEOUT,
+        )
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+        self.connection.execute(OUTBOX_INDEX)
+
+    def _migrate(self):
+        for table, migrations in MIGRATIONS.items():
+            columns = {
+                row[1] for row in self.connection.execute(
+                    f'PRAGMA table_info({table})'
+                )
+            }
+            for column, definition in migrations.items():
+                if column not in columns:
+                    self.connection.execute(
+                        f'ALTER TABLE {table} ADD COLUMN {column} {definition}'
+                    )
+
+    def _write(self, query, params):
+        with self.lock:
+            self.pending.append((query, params))
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    @contextmanager
+    def _transaction(self):
+        """Транзакция под блокировкой, начатая с накопленных изменений.
+
+        Накопленные изменения забираются из очереди записи только после
+        начала транзакции; при любой ошибке, в том числе при фиксации,
+        транзакция откатывается, а изменения возвращаются в очередь.
+        """
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            pending, self.pending = self.pending, []
+            try:
+                for query, group in groupby(pending, key=itemgetter(0)):
+                    self.connection.executemany(
+                        query, [params for _, params in group]
+                    )
+                yield self.connection
+                self.connection.execute('COMMIT')
+            except BaseException:
+                if self.connection.in_transaction:
+                    self.connection.execute('ROLLBACK')
+                self.pending[:0] = pending
+                raise
+
+    def load_tenant(self, tenant):
+        """Восстановление курсора, статусов и последнего сообщения."""
+        self.flush()
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT timestamp, last_message FROM tenant_state '
+                'WHERE name = ?', (tenant.name,)
+            ).fetchone()
+            statuses = self.connection.execute(
+                'SELECT homework, status FROM homework_status '
+                'WHERE tenant = ?', (tenant.name,)
+            ).fetchall()
+        if row is None:
+            return False
+        tenant.timestamp, tenant.last_message = row
+        tenant.statuses = {
+            key: Status.from_label(status) for key, status in statuses
+        }
+        return True
+
+    def save_tenant(self, tenant):
+        """Сохранение курсора и последнего сообщения аккаунта."""
+        self._write(
+            'INSERT INTO tenant_state (name, timestamp, last_message) '
+            'VALUES (?, ?, ?) ON CONFLICT (name) DO UPDATE SET '
+            'timestamp = excluded.timestamp, '
+            'last_message = excluded.last_message',
+            (tenant.name, tenant.timestamp, tenant.last_message)
+        )
+
+    def save_status(self, tenant, key, status, name=''):
+        """Сохранение последнего статуса работы."""
+        self._write(
+            'INSERT OR REPLACE INTO homework_status '
+            '(tenant, homework, status, name) VALUES (?, ?, ?, ?)',
+            (tenant.name, key, Status(status).label, name)
+        )
+
+    def load_names(self, tenant):
+        """Сохранённые названия работ аккаунта по ключам."""
+        with self.lock:
+            return dict(self.connection.execute(
+                'SELECT homework, name FROM homework_status '
+                'WHERE tenant = ?', (tenant.name,)
+            ))
+
+    def add_message(self, tenant, text):
+        """Запись сообщения в outbox до отправки."""
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                'INSERT INTO outbox (tenant, chat_id, text, created, '
+                'next_attempt, leased) VALUES (?, ?, ?, ?, ?, 1)',
+                (tenant.name, tenant.chat_id, text, now, now + OUTBOX_LEASE)
+            )
+        return cursor.lastrowid
+
+    def mark_sent(self, message_ids):
+        """Отметка об отправке сообщений из outbox."""
+        now = time.time()
+        for message_id in message_ids:
+            self._write(
+                'UPDATE outbox SET sent = ? WHERE id = ?', (now, message_id)
+            )
+
+    def mark_failed(self, message_ids):
+        """Откладывание повторной отправки с экспоненциальной задержкой.
+
+        После OUTBOX_MAX_ATTEMPTS неудачных попыток сообщение больше не
+        выдаётся на отправку и удаляется вместе с отправленными.
+        """
+        now = time.time()
+        for message_id in message_ids:
+            self._write(
+                'UPDATE outbox SET next_attempt = ? + '
+                'min(?, ? * (1 << min(attempts, 30))), '
+                'failed = CASE WHEN attempts + 1 >= ? THEN ? ELSE failed '
+                'END, attempts = attempts + 1, leased = 0 WHERE id = ?',
+                (now, OUTBOX_RETRY_MAX, OUTBOX_RETRY_BASE,
+                 OUTBOX_MAX_ATTEMPTS, now, message_id)
+            )
+
+    def mark_dead(self, message_ids):
+        """Отказ от отправки сообщений, которые Telegram не примет."""
+        now = time.time()
+        for message_id in message_ids:
+            self._write(
+                'UPDATE outbox SET failed = ?, leased = 0 WHERE id = ?',
+                (now, message_id)
+            )
+
+    def claim_due(self, limit=100, release=False):
+        """Захват сообщений outbox, время повтора которых наступило.
+
+        Захваченные сообщения не выдаются повторно в течение
+        OUTBOX_LEASE. С release=True отложенные после ошибок сообщения
+        считаются готовыми к отправке сразу.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            if release:
+                connection.execute(
+                    'UPDATE outbox SET next_attempt = 0 '
+                    'WHERE sent IS NULL AND failed IS NULL AND leased = 0 '
+                    'AND next_attempt > ?', (now,)
+                )
+            rows = connection.execute(
+                'SELECT id, tenant, chat_id, text FROM outbox '
+                'WHERE sent IS NULL AND failed IS NULL '
+                'AND next_attempt <= ? '
+                'ORDER BY id LIMIT ?', (now, limit)
+            ).fetchall()
+            connection.executemany(
+                'UPDATE outbox SET next_attempt = ?, leased = 1 '
+                'WHERE id = ?',
+                [(now + OUTBOX_LEASE, row[0]) for row in rows]
+            )
+        return rows
+
+    def outbox_stats(self):
+        """Глубина outbox и возраст старейшего сообщения, с."""
+        self.flush()
+        with self.lock:
+            depth, oldest = self.connection.execute(
+                'SELECT COUNT(*), MIN(created) FROM outbox '
+                'WHERE sent IS NULL AND failed IS NULL'
+            ).fetchone()
+        return depth, time.time() - oldest if oldest else 0.0
+
+    def prune_outbox(self, retention=OUTBOX_RETENTION, limit=PRUNE_BATCH):
+        """Удаление завершённых сообщений старше retention секунд.
+
+        Завершёнными считаются отправленные и брошенные сообщения. За
+        вызов удаляется не больше limit строк, чтобы накопившийся хвост
+        не держал транзакцию долго.
+        """
+        before = time.time() - retention
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                'DELETE FROM outbox WHERE id IN (SELECT id FROM outbox '
+                'WHERE sent < ? OR failed < ? LIMIT ?)',
+                (before, before, limit)
+            )
+        return cursor.rowcount
+
+    def flush(self):
+        """Фиксация накопленных изменений."""
+        if not self.pending:
+            return
+        with self._transaction():
+            pass
+
+    def close(self):
+        """Фиксация изменений и закрытие соединения."""
+        self.flush()
+        self.connection.close()
+
+
+NULL_STORE = StateStore()
+
+
+def set_store(store):
+    """Установка хранилища состояния."""
+    global _store
+    _store = store
+
+
+def get_store():
+    """Текущее хранилище состояния."""
+    return _store or NULL_STORE
+
+
+metrics.Gauge(
+    'homework_outbox_depth',
+    'Неотправленных сообщений в outbox.',
+    lambda: get_store().outbox_stats()[0],
+)
+metrics.Gauge(
+    'homework_outbox_oldest_age_seconds',
+    'Возраст старейшего неотправленного сообщения outbox.',
+    lambda: get_store().outbox_stats()[1],
+)
@@ -0,0 +1,193 @@
+"""Супервизор: опрос аккаунтов в нескольких процессах.
+
+Аккаунты распределяются по процессам консистентным хешированием
+токена, поэтому при изменении числа процессов переезжает лишь
+около 1/N аккаунтов, а остальные продолжают опрашиваться без
+перезапуска. Упавшие процессы перезапускаются с тем же набором.
+SIGTTIN и SIGTTOU добавляют и убирают процесс, SIGHUP перечитывает
+реестр, SIGTERM останавливает процессы и завершает работу. Бюджет
+запросов к API делится между процессами поровну.
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+import homework
+import metrics
+import runner
+import text_messages
+from hashring import HashRing
+from tenants import load_tenants
+
+PROCESSES = int(os.getenv('SHARD_PROCESSES', os.cpu_count() or 1))
+CHECK_INTERVAL = 1.0
+RESTART_DELAY = 5.0
+STOP_TIMEOUT = 30
+
+RESTARTS = metrics.Counter(
+    'homework_worker_restarts_total', 'Перезапуски упавших процессов.'
+)
+MOVED = metrics.Counter(
+    'homework_tenants_moved_total',
+    'Аккаунты, переехавшие в другой процесс при перебалансировке.',
+)
+
+
+def run_worker(index, path, names, control, max_workers, processes):
+    """Точка входа процесса: опрос своей доли аккаунтов."""
+    homework.configure_logging(
+        filename=f'{homework.LOG_FILE}.{index}',
+        level=os.getenv('LOG_LEVEL', 'INFO'),
+    )
+    if metrics.METRICS_PORT:
+        metrics.METRICS_PORT = int(metrics.METRICS_PORT) + 1 + index
+    runner.main(path, max_workers, names=names, control=control,
+                processes=processes, group=str(index))
+
+
+class Supervisor:
+    """Запуск, перезапуск и перебалансировка процессов опроса."""
+
+    def __init__(self, path, processes=PROCESSES,
+                 max_workers=runner.MAX_WORKERS):
+        self.path = path
+        self.max_workers = max_workers
+        self.context = multiprocessing.get_context('spawn')
+        self.tenants = load_tenants(path)
+        self.shards = {}
+        self.workers = {}
+        self.restart_at = {}
+        self.signals = []
+        self.resize(processes)
+
+    def start_worker(self, index):
+        """Запуск процесса с текущим набором аккаунтов."""
+        control, child = self.context.Pipe()
+        process = self.context.Process(
+            target=run_worker,
+            args=(index, self.path, self.shards[index], child,
+                  self.max_workers, len(self.shards)),
+            name=f'worker-{index}',
+            daemon=True,
+        )
+        process.start()
+        self.workers[index] = (process, control, time.monotonic())
+
+    def stop_worker(self, index):
+        """Мягкая остановка процесса, при таймауте — принудительная."""
+        process, control, _ = self.workers.pop(index)
+        try:
+            control.send(None)
+        except OSError:
+            pass
+        process.join(STOP_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+    def resize(self, processes):
+        """Перераспределение аккаунтов по processes процессам.
+
+        Процессам, чей набор или число процессов изменились, новый набор
+        и число процессов для деления бюджета запросов отправляются по
+        каналу управления; перезапускаются только добавленные процессы.
+        """
+        previous = self.shards
+        owners = {
+            name: index for index, names in previous.items() for name in names
+        }
+        self.shards = HashRing(range(processes)).assign(self.tenants)
+        moved = sum(
+            1 for index, names in self.shards.items() for name in names
+            if owners.get(name, index) != index
+        )
+        MOVED.inc(moved)
+        self.stop_removed()
+        for index, names in self.shards.items():
+            if index in self.restart_at:
+                continue
+            if index not in self.workers:
+                self.start_worker(index)
+            elif names != previous.get(index) or processes != len(previous):
+                try:
+                    self.workers[index][1].send((names, processes))
+                except OSError:
+                    pass
+        logging.info(
+            text_messages.LOG_INFO_SUPERVISOR_RESIZE,
+            {
+                'processes': processes,
+                'tenants': len(self.tenants),
+                'moved': moved,
+            }
+        )
+
+    def stop_removed(self):
+        """Остановка процессов, которых нет в новом распределении."""
+        for index in list(self.workers):
+            if index not in self.shards:
+                self.stop_worker(index)
+        for index in list(self.restart_at):
+            if index not in self.shards:
+                del self.restart_at[index]
+
+    def check(self):
+        """Перезапуск упавших процессов не чаще раза в RESTART_DELAY."""
+        now = time.monotonic()
+        for index, (process, _, started) in list(self.workers.items()):
+            if process.is_alive():
+                continue
+            logging.error(
+                text_messages.LOG_ERROR_WORKER_DIED,
+                {'name': process.name, 'exitcode': process.exitcode}
+            )
+            del self.workers[index]
+            self.restart_at[index] = started + RESTART_DELAY
+        for index, restart_at in list(self.restart_at.items()):
+            if restart_at <= now:
+                del self.restart_at[index]
+                RESTARTS.inc(worker=index)
+                self.start_worker(index)
+
+    def handle_signal(self, signum, frame):
+        """Запоминание сигнала для обработки в основном цикле."""
+        self.signals.append(signum)
+
+    def handle_pending(self):
+        """Обработка накопленных сигналов."""
+        while self.signals:
+            signum = self.signals.pop(0)
+            processes = len(self.shards)
+            if signum == signal.SIGTTIN:
+                self.resize(processes + 1)
+            elif signum == signal.SIGTTOU and processes > 1:
+                self.resize(processes - 1)
+            elif signum == signal.SIGHUP:
+                self.tenants = load_tenants(self.path)
+                self.resize(processes)
+            elif signum == signal.SIGTERM:
+                raise SystemExit(0)
+
+    def run(self):
+        """Основной цикл супервизора."""
+        for signum in (signal.SIGTTIN, signal.SIGTTOU, signal.SIGHUP,
+                       signal.SIGTERM):
+            signal.signal(signum, self.handle_signal)
+        try:
+            while True:
+                self.handle_pending()
+                self.check()
+                time.sleep(CHECK_INTERVAL)
+        finally:
+            for index in list(self.workers):
+                self.stop_worker(index)
+
+
+if __name__ == '__main__':
+    homework.configure_logging(level=os.getenv('LOG_LEVEL', 'INFO'))
+    if metrics.METRICS_PORT:
+        metrics.start_server()
+    Supervisor(sys.argv[1]).run()
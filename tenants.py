@@ -0,0 +1,103 @@
+import contextvars
+import json
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import text_messages
+
+TENANT_FIELDS = ('name', 'practicum_token', 'chat_id')
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+current_tenant = contextvars.ContextVar('current_tenant', default=None)
+
+
+@dataclass
+class Tenant:
+    """Аккаунт Практикума и чат Telegram, куда уходят уведомления."""
+
+    name: str
+    practicum_token: str
+    chat_id: str
+    timestamp: int = 0
+    last_message: str = ''
+    statuses: dict = field(default_factory=dict)
+    errors: int = 0
+    changed_at: float = 0.0
+    next_poll: float = 0.0
+    payload_hash: bytes = b''
+    lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    @property
+    def headers(self):
+        """Заголовки запроса к API от имени аккаунта."""
+        return {'Authorization': f'OAuth {self.practicum_token}'}
+
+
+@contextmanager
+def use_tenant(tenant):
+    """Делает аккаунт текущим для get_api_answer и send_message."""
+    token = current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        current_tenant.reset(token)
+
+
+def tenant_from_dict(data):
+    """Создание аккаунта из словаря с проверкой обязательных ключей."""
+    missing = [key for key in TENANT_FIELDS if not data.get(key)]
+    if missing:
+        raise ValueError(
+            text_messages.TENANT_KEYS_ERROR.format(
+                missing=missing, name=data.get('name')
+            )
+        )
+    return Tenant(
+        name=str(data['name']),
+        practicum_token=data['practicum_token'],
+        chat_id=str(data['chat_id']),
+        timestamp=int(data.get('timestamp') or 0),
+        last_message=data.get('last_message') or '',
+    )
+
+
+def load_tenants_json(path):
+    """Загрузка аккаунтов из JSON-файла со списком объектов."""
+    with open(path, encoding='UTF-8') as file:
+        data = json.load(file)
+    if not isinstance(data, list):
+        raise TypeError(
+            text_messages.TENANTS_NOT_LIST_ERROR.format(type=type(data))
+        )
+    return [tenant_from_dict(item) for item in data]
+
+
+def load_tenants_sqlite(path):
+    """Загрузка аккаунтов из таблицы tenants базы SQLite."""
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    try:
+        rows = connection.execute('SELECT * FROM tenants').fetchall()
+    finally:
+        connection.close()
+    return [tenant_from_dict(dict(row)) for row in rows]
+
+
+def load_tenants(path):
+    """Загрузка реестра аккаунтов из JSON или SQLite по расширению."""
+    if str(path).endswith(SQLITE_SUFFIXES):
+        tenants = load_tenants_sqlite(path)
+    else:
+        tenants = load_tenants_json(path)
+    counts = Counter(tenant.name for tenant in tenants)
+    duplicates = sorted(name for name, count in counts.items() if count > 1)
+    if duplicates:
+        raise ValueError(
+            text_messages.TENANTS_DUPLICATE_ERROR.format(names=duplicates)
+        )
+    return tenants
@@ -0,0 +1,161 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import telegram
+
+import async_engine
+import async_http
+import outbound
+import utils
+from benchmarks.fake_servers import FakePracticum, FakeTelegram
+from tenants import Tenant, use_tenant
+
+HOMEWORKS = 2
+
+
+@pytest.fixture
+def practicum(monkeypatch, homework_module):
+    with FakePracticum(homeworks=HOMEWORKS, seed=1) as server:
+        monkeypatch.setattr(homework_module, 'ENDPOINT', server.endpoint)
+        yield server
+
+
+@pytest.fixture
+def telegram_server():
+    with FakeTelegram(seed=1) as server:
+        yield server
+
+
+def make_tenants(count):
+    return [
+        Tenant(name=str(index), practicum_token='token',
+               chat_id=str(index), timestamp=100)
+        for index in range(count)
+    ]
+
+
+async def run_round(bot, tenants, concurrency=4, telegram_url=None):
+    session = async_http.AsyncSession(pool_size=concurrency)
+    sender = None
+    if telegram_url:
+        sender = async_engine.AsyncSender(
+            async_engine.AsyncBot(session, 'token', telegram_url),
+            concurrency,
+        )
+        outbound.set_sender(sender)
+    runner = async_engine.AsyncRunner(bot, session, tenants, concurrency)
+    try:
+        await runner.run_round()
+        if sender:
+            await sender.join()
+    finally:
+        outbound.set_sender(None)
+        await session.close()
+    return runner, session
+
+
+class TestAsyncRunner:
+
+    def test_round_polls_all_tenants(self, practicum):
+        bot = utils.RecordingBot()
+        tenants = make_tenants(20)
+        runner, session = asyncio.run(run_round(bot, tenants))
+        assert len(bot.sent) == len(tenants) * HOMEWORKS
+        assert {chat_id for chat_id, _ in bot.sent} == {
+            tenant.chat_id for tenant in tenants
+        }, 'Каждый аккаунт должен получать сообщения в свой чат.'
+        assert all(tenant.timestamp > 100 for tenant in tenants)
+        assert runner.polls == len(tenants)
+        assert session.stats.handshakes <= 4, (
+            'Запросы должны переиспользовать соединения пула.'
+        )
+
+    def test_requests_do_not_hold_threads(self, monkeypatch,
+                                          homework_module):
+        async def poll():
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(max_workers=1)
+            )
+            await run_round(utils.RecordingBot(), make_tenants(20),
+                            concurrency=20)
+
+        with FakePracticum(homeworks=1, latency=0.2) as server:
+            monkeypatch.setattr(homework_module, 'ENDPOINT', server.endpoint)
+            started = time.monotonic()
+            asyncio.run(poll())
+        assert time.monotonic() - started < 2, (
+            '20 запросов по 0.2 с при одном рабочем потоке должны '
+            'ожидаться одновременно.'
+        )
+
+    def test_async_sender_delivers(self, practicum, telegram_server):
+        tenants = make_tenants(3)
+        asyncio.run(run_round(
+            utils.RecordingBot(), tenants,
+            telegram_url=telegram_server.base_url,
+        ))
+        assert len(telegram_server.messages) == len(tenants) * HOMEWORKS
+
+
+class TestAsyncApi:
+
+    def test_get_api_answer_async(self, practicum, homework_module):
+        async def answer():
+            session = async_http.AsyncSession()
+            try:
+                return await async_engine.get_api_answer_async(session, 0)
+            finally:
+                await session.close()
+
+        response = asyncio.run(answer())
+        assert len(homework_module.check_response(response)) == HOMEWORKS
+
+    def test_get_api_answer_async_error(self, monkeypatch, homework_module):
+        async def answer():
+            session = async_http.AsyncSession()
+            try:
+                return await async_engine.get_api_answer_async(session, 0)
+            finally:
+                await session.close()
+
+        with FakePracticum(error_rate=1.0) as server:
+            monkeypatch.setattr(homework_module, 'ENDPOINT', server.endpoint)
+            with pytest.raises(homework_module.ApiAnswerError):
+                asyncio.run(answer())
+
+    def send(self, url, message='text'):
+        async def send():
+            session = async_http.AsyncSession()
+            try:
+                bot = async_engine.AsyncBot(session, 'token', url)
+                with use_tenant(Tenant('t', 'token', '42')):
+                    return await async_engine.send_message_async(
+                        bot, message
+                    )
+            finally:
+                await session.close()
+
+        return asyncio.run(send())
+
+    def test_send_message_async(self, telegram_server):
+        assert self.send(telegram_server.base_url)
+        assert telegram_server.messages == [('42', 'text')]
+
+    def test_send_message_async_retry_after(self):
+        with FakeTelegram(error_rate=1.0) as server:
+            with pytest.raises(telegram.error.RetryAfter):
+                self.send(server.base_url)
+
+    @pytest.mark.parametrize('status, error', [
+        (400, telegram.error.BadRequest),
+        (403, telegram.error.Unauthorized),
+        (404, telegram.error.InvalidToken),
+        (502, telegram.error.NetworkError),
+    ])
+    def test_telegram_error(self, status, error):
+        exception = async_engine.telegram_error(
+            status, {'ok': False, 'description': 'error'}
+        )
+        assert type(exception) is error
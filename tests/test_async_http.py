@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+import async_http
+
+CHUNKED = (
+    b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n'
+    b'4\r\n{"a"\r\n3\r\n: 1\r\n1\r\n}\r\n0\r\n\r\n'
+)
+SIMPLE = b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}'
+
+
+async def serve(responses, close_after=None):
+    """Сервер, отвечающий заранее заданными байтами на каждый запрос."""
+    requests = []
+
+    async def handle(reader, writer):
+        served = 0
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except asyncio.IncompleteReadError:
+                return
+            requests.append(head)
+            writer.write(responses[min(len(requests), len(responses)) - 1])
+            await writer.drain()
+            served += 1
+            if close_after and served >= close_after:
+                writer.close()
+                return
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f'http://127.0.0.1:{port}', requests
+
+
+class TestAsyncSession:
+
+    def run(self, responses, calls, close_after=None):
+        async def session_calls():
+            server, url, requests = await serve(
+                responses, close_after
+            )
+            session = async_http.AsyncSession()
+            try:
+                results = []
+                for _ in range(calls):
+                    results.append(await session.get(
+                        url + '/path', params={'from_date': 1},
+                        headers={'Authorization': 'OAuth token'},
+                    ))
+                    await asyncio.sleep(0.01)
+                return results, session.stats.handshakes, requests
+            finally:
+                await session.close()
+                server.close()
+
+        return asyncio.run(session_calls())
+
+    def test_chunked_body_and_keep_alive(self):
+        responses, handshakes, requests = self.run([CHUNKED], 2)
+        assert [response.json() for response in responses] == [{'a': 1}] * 2
+        assert handshakes == 1, 'Соединение должно переиспользоваться.'
+        assert requests[0].startswith(b'GET /path?from_date=1 HTTP/1.1')
+        assert b'Authorization: OAuth token' in requests[0]
+
+    def test_closed_pool_connection_replaced(self):
+        responses, handshakes, _ = self.run([SIMPLE], 3, close_after=1)
+        assert [response.status_code for response in responses] == [200] * 3
+        assert handshakes == 3
+
+    def test_connection_error(self):
+        async def request():
+            session = async_http.AsyncSession(timeout=1)
+            await session.get('http://127.0.0.1:9/')
+
+        with pytest.raises(async_http.RequestError):
+            asyncio.run(request())
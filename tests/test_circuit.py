@@ -0,0 +1,73 @@
+import pytest
+import requests
+
+import circuit
+import utils
+from exceptions import CircuitOpenError
+
+
+def make_breaker(clock):
+    return circuit.CircuitBreaker(
+        'test', window=4, min_calls=4, failure_rate=0.5, open_timeout=10,
+        probes=1, clock=clock,
+    )
+
+
+class TestCircuitBreaker:
+
+    def test_opens_on_failure_rate(self):
+        breaker = make_breaker(utils.FakeClock())
+        for failed in (False, True, False, True):
+            breaker.before_call()
+            if failed:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        assert breaker.state == circuit.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_stays_closed_below_min_calls(self):
+        breaker = make_breaker(utils.FakeClock())
+        for _ in range(3):
+            breaker.record_failure()
+        assert breaker.state == circuit.CLOSED
+
+    def test_half_open_probe(self):
+        clock = utils.FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+        clock.now = 10
+        breaker.before_call()
+        assert breaker.state == circuit.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == circuit.OPEN
+        clock.now = 20
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == circuit.CLOSED
+
+    def test_open_circuit_skips_network(self, monkeypatch, homework_module):
+        calls = []
+
+        def mock_response_get(*args, **kwargs):
+            calls.append(kwargs)
+            response = utils.MockResponseGET(*args, **kwargs)
+            response.status_code = 503
+            return response
+
+        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            circuit, '_breaker', make_breaker(utils.FakeClock())
+        )
+        for _ in range(4):
+            with pytest.raises(homework_module.ApiAnswerError):
+                homework_module.get_api_answer(0)
+        with pytest.raises(CircuitOpenError):
+            homework_module.get_api_answer(0)
+        assert len(calls) == 4, (
+            'Открытый автомат защиты не должен обращаться к API.'
+        )
@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import commands
+import statuscache
+import storage
+import utils
+from records import Status
+
+
+def update(update_id, text, chat_id=12345):
+    message = SimpleNamespace(text=text, chat_id=chat_id)
+    return SimpleNamespace(update_id=update_id, effective_message=message)
+
+
+class UpdatesBot(utils.RecordingBot):
+    def __init__(self, updates):
+        super().__init__()
+        self.updates = updates
+        self.offsets = []
+
+    def get_updates(self, offset=None, timeout=0, **kwargs):
+        self.offsets.append(offset)
+        updates, self.updates = self.updates, []
+        return updates
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = statuscache.StatusCache()
+    monkeypatch.setattr(statuscache, '_cache', cache)
+    return cache
+
+
+class TestCommands:
+
+    @pytest.mark.parametrize('text, command', [
+        ('/status', '/status'),
+        ('/History@homework_bot', '/history'),
+        ('/status please', '/status'),
+        ('status', None),
+        (None, None),
+    ])
+    def test_parse_command(self, text, command):
+        assert commands.parse_command(text) == command
+
+    def test_offset_advances_and_unknown_ignored(self):
+        bot = UpdatesBot([update(5, '/status'), update(6, 'привет')])
+        listener = commands.CommandListener(
+            bot, {'/status': lambda chat_id: f'ok {chat_id}'}
+        )
+        assert listener.poll() == 2
+        listener.poll()
+        assert bot.offsets == [None, 7]
+        assert bot.sent == [(12345, 'ok 12345')]
+
+    def test_replies_from_cache_without_api(self, monkeypatch, cache,
+                                            homework_module):
+        homeworks = [{'id': 1, 'homework_name': 'hw1', 'status': 'approved'}]
+
+        def mock_response_get(*args, **kwargs):
+            response = utils.MockResponseGET(*args, **kwargs)
+            response.json = lambda: {'homeworks': homeworks,
+                                     'current_date': 200}
+            return response
+
+        monkeypatch.setattr(requests, 'get', mock_response_get)
+        tenant = homework_module.Tenant(
+            name='t', practicum_token='token', chat_id=12345, timestamp=100
+        )
+        homework_module.poll_tenant(UpdatesBot([]), tenant)
+        assert tenant.errors == 0
+
+        def fail_get(*args, **kwargs):
+            raise AssertionError('Команды не должны обращаться к API.')
+
+        monkeypatch.setattr(requests, 'get', fail_get)
+        bot = UpdatesBot([update(1, '/status'), update(2, '/history'),
+                          update(3, '/status', chat_id=1)])
+        commands.CommandListener(bot, homework_module.COMMAND_HANDLERS).poll()
+        (_, status), (_, history), (_, unknown) = bot.sent
+        assert status.endswith('hw1: ' + homework_module.HOMEWORK_VERDICTS[
+            'approved'
+        ])
+        assert 'hw1' in history
+        assert unknown == homework_module.text_messages.COMMAND_NO_DATA
+
+    def test_cache_seeded_after_restart(self, monkeypatch, cache, tmp_path,
+                                        homework_module):
+        store = storage.SQLiteStore(str(tmp_path / 'state.db'))
+        monkeypatch.setattr(storage, '_store', store)
+        tenant = homework_module.Tenant(
+            name='t', practicum_token='token', chat_id=12345, timestamp=100
+        )
+        store.save_tenant(tenant)
+        store.save_status(tenant, 1, Status.APPROVED, 'hw1')
+        store.flush()
+        assert store.load_tenant(tenant)
+
+        def mock_response_get(*args, **kwargs):
+            response = utils.MockResponseGET(*args, **kwargs)
+            response.json = lambda: {'homeworks': [], 'current_date': 200}
+            return response
+
+        monkeypatch.setattr(requests, 'get', mock_response_get)
+        homework_module.poll_tenant(UpdatesBot([]), tenant)
+        assert homework_module.status_reply('12345').endswith(
+            'hw1: ' + homework_module.HOMEWORK_VERDICTS['approved']
+        ), 'После перезапуска /status должен показывать известные статусы.'
+        store.close()
@@ -0,0 +1,107 @@
+import requests
+
+import digest
+import utils
+from tenants import Tenant
+
+
+def connection_error(params):
+    try:
+        try:
+            raise requests.ConnectTimeout('timeout')
+        except requests.RequestException:
+            raise ConnectionError(
+                f'Ошибка запроса к API: read timeout=30. '
+                f'Параметры запроса: {params}'
+            )
+    except ConnectionError as error:
+        return error
+
+
+class TestFingerprint:
+
+    def test_request_params_ignored(self):
+        first = digest.fingerprint(connection_error({'from_date': 1}))
+        second = digest.fingerprint(connection_error({'from_date': 2}))
+        assert first == second
+        assert first[0] == 'ConnectionError(ConnectTimeout)'
+
+    def test_different_types(self):
+        assert (digest.fingerprint(KeyError('x'))
+                != digest.fingerprint(TypeError('x')))
+
+
+class TestErrorDigest:
+
+    def test_aggregates_by_fingerprint(self):
+        clock = utils.FakeClock()
+        error_digest = digest.ErrorDigest('1', window=3600, clock=clock)
+        tenants = [Tenant(str(i), 'token', str(i)) for i in range(3)]
+        for index in range(37):
+            error_digest.add(
+                tenants[index % 3], connection_error({'from_date': index})
+            )
+        assert error_digest.due(), 'Новая ошибка отправляется сразу.'
+        clock.now = 3600
+        text = error_digest.pop()
+        assert 'ConnectionError(ConnectTimeout) ×37, аккаунтов: 3' in text
+        assert 'from_date' not in text
+        assert not error_digest.due()
+
+    def test_known_errors_wait_for_window(self):
+        clock = utils.FakeClock()
+        error_digest = digest.ErrorDigest('1', window=3600, clock=clock)
+        tenant = Tenant('t', 'token', '1')
+        error_digest.add(tenant, KeyError('homeworks'))
+        error_digest.pop()
+        error_digest.add(tenant, KeyError('homeworks'))
+        assert not error_digest.due()
+        clock.now = 3600
+        assert error_digest.due()
+
+
+class TestSendDigest:
+
+    def test_errors_go_to_admin_chat(self, monkeypatch, homework_module):
+        def mock_response_get(*args, **kwargs):
+            response = utils.MockResponseGET(*args, **kwargs)
+            response.status_code = 500
+            return response
+
+        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            digest, '_digest',
+            digest.ErrorDigest('admin', clock=utils.FakeClock()),
+        )
+        bot = utils.RecordingBot()
+        tenants = [Tenant(str(i), 'token', str(i)) for i in range(5)]
+        for _ in range(2):
+            for tenant in tenants:
+                homework_module.poll_tenant(bot, tenant)
+            homework_module.send_digest(bot)
+        assert len(bot.sent) == 1, (
+            'Повторяющиеся ошибки не должны отправляться в каждом цикле.'
+        )
+        chat_id, text = bot.sent[0]
+        assert chat_id == 'admin'
+        assert 'ApiAnswerError ×5, аккаунтов: 5' in text
+
+    def test_long_digest_split(self, monkeypatch, homework_module):
+        import telegram
+
+        error_digest = digest.ErrorDigest('admin', clock=utils.FakeClock())
+        monkeypatch.setattr(digest, '_digest', error_digest)
+        for index in range(digest.MAX_LINES):
+            error_digest.add(
+                Tenant('t', 'token', '1'),
+                type(f'Error{index}', (Exception,), {})('x' * 1000),
+            )
+        bot = utils.RecordingBot()
+        homework_module.send_digest(bot)
+        limit = telegram.constants.MAX_MESSAGE_LENGTH
+        assert len(bot.sent) > 1
+        assert all(len(text) <= limit for text in bot.texts), (
+            'Сводка не должна превышать предел длины сообщения Telegram.'
+        )
+        lines = '\n'.join(bot.texts).splitlines()
+        assert len(lines) == digest.MAX_LINES + 1
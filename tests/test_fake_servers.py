@@ -0,0 +1,51 @@
+import pytest
+import telegram
+
+import http_client
+from benchmarks.fake_servers import FakePracticum, FakeTelegram
+from tenants import Tenant, use_tenant
+
+
+@pytest.fixture
+def practicum():
+    with FakePracticum(homeworks=3, seed=1) as server:
+        yield server
+
+
+@pytest.fixture
+def telegram_server():
+    with FakeTelegram(seed=1) as server:
+        yield server
+
+
+class TestFakeServers:
+
+    def test_get_api_answer(self, monkeypatch, practicum, homework_module):
+        monkeypatch.setattr(homework_module, 'ENDPOINT', practicum.endpoint)
+        http_client.set_session(http_client.PooledSession())
+        try:
+            response = homework_module.get_api_answer(0)
+        finally:
+            http_client.set_session(None)
+        homeworks = homework_module.check_response(response)
+        assert len(homeworks) == 3
+        assert practicum.requests == 1
+
+    def test_get_api_answer_error(self, monkeypatch, homework_module):
+        with FakePracticum(error_rate=1.0) as server:
+            monkeypatch.setattr(homework_module, 'ENDPOINT', server.endpoint)
+            with pytest.raises(homework_module.ApiAnswerError):
+                homework_module.get_api_answer(0)
+
+    def test_send_message(self, telegram_server, homework_module):
+        bot = telegram.Bot(token='1234:abcdefg',
+                           base_url=telegram_server.base_url)
+        with use_tenant(Tenant('t', 'token', '42')):
+            assert homework_module.send_message(bot, 'text')
+        assert telegram_server.messages == [('42', 'text')]
+
+    def test_send_message_retry_after(self, homework_module):
+        with FakeTelegram(error_rate=1.0) as server:
+            bot = telegram.Bot(token='1234:abcdefg', base_url=server.base_url)
+            with pytest.raises(telegram.error.RetryAfter):
+                homework_module.send_message(bot, 'text')
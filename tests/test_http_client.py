@@ -0,0 +1,61 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_client
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({'homeworks': [], 'current_date': 1}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), JSONHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+class TestPooledSession:
+
+    def test_connection_reused(self, local_server):
+        session = http_client.PooledSession(pool_size=2)
+        for timestamp in range(5):
+            response = session.get(local_server,
+                                   params={'from_date': timestamp})
+            assert response.json()['current_date'] == 1
+        assert session.stats.requests == 5
+        assert session.stats.handshakes == 1, (
+            'Соединение должно переиспользоваться между запросами.'
+        )
+        assert session.stats.latency_avg > 0
+
+    def test_get_api_answer_uses_installed_session(self, local_server,
+                                                   monkeypatch,
+                                                   homework_module):
+        session = http_client.PooledSession()
+        monkeypatch.setattr(homework_module, 'ENDPOINT', local_server)
+        http_client.set_session(session)
+        try:
+            homework_module.get_api_answer(0)
+            homework_module.get_api_answer(0)
+        finally:
+            http_client.set_session(None)
+        assert session.stats.requests == 2
+        assert session.stats.handshakes == 1
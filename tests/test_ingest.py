@@ -0,0 +1,96 @@
+from functools import partial
+from http.client import HTTPConnection
+
+import pytest
+
+import ingest
+import utils
+from benchmarks.fake_servers import FakeEventProducer
+from records import Status
+from tenants import Tenant
+
+
+@pytest.fixture
+def tenant():
+    return Tenant(name='t', practicum_token='token', chat_id='1',
+                  timestamp=100)
+
+
+@pytest.fixture
+def bot():
+    return utils.RecordingBot()
+
+
+@pytest.fixture
+def server(homework_module, bot, tenant):
+    server = ingest.IngestServer(
+        partial(homework_module.ingest_event, bot), [tenant],
+        secret='secret', port=0,
+    ).start()
+    yield server
+    server.close()
+
+
+class TestIngest:
+    EVENT = {'homeworks': [
+        {'id': 1, 'homework_name': 'hw1', 'status': 'approved'}
+    ], 'current_date': 500}
+
+    def test_event_notifies_without_moving_cursor(self, server, bot, tenant):
+        producer = FakeEventProducer(server.url, 't', secret='secret')
+        assert producer.send(self.EVENT) == (202, {'changes': 1})
+        assert bot.sent and bot.sent[0][0] == '1'
+        assert tenant.statuses == {1: Status.APPROVED}
+        assert tenant.timestamp == 100, (
+            'Событие не должно сдвигать курсор опроса.'
+        )
+        assert producer.send(self.EVENT) == (202, {'changes': 0})
+        assert len(bot.sent) == 1
+
+    def test_random_events_each_notify(self, server, bot):
+        producer = FakeEventProducer(server.url, 't', secret='secret',
+                                     seed=1)
+        for _ in range(5):
+            assert producer.send() == (202, {'changes': 1})
+        assert len(bot.sent) == 5
+
+    @pytest.mark.parametrize('name, secret, event, code', [
+        ('t', 'wrong', EVENT, 401),
+        ('t', None, EVENT, 401),
+        ('other', 'secret', EVENT, 404),
+        ('t', 'secret', {'homeworks': 'hw1'}, 400),
+        ('t', 'secret', {'homeworks': [{'homework_name': 'hw1',
+                                        'status': 'unknown'}]}, 400),
+    ])
+    def test_rejected(self, server, bot, name, secret, event, code):
+        producer = FakeEventProducer(server.url, name, secret=secret)
+        assert producer.send(event)[0] == code
+        assert bot.sent == []
+
+    @pytest.mark.parametrize('length, code', [
+        ('-1', 400),
+        ('abc', 400),
+        ('1_0', 400),
+        (str(ingest.MAX_BODY + 1), 413),
+    ])
+    def test_invalid_content_length(self, server, bot, length, code):
+        connection = HTTPConnection(*server.httpd.server_address[:2],
+                                    timeout=5)
+        connection.putrequest('POST', '/events/t')
+        connection.putheader('Authorization', 'Bearer secret')
+        connection.putheader('Content-Length', length)
+        connection.endheaders(b'{}')
+        assert connection.getresponse().status == code
+        connection.close()
+        assert bot.sent == []
+
+    @pytest.mark.parametrize('host', ['0.0.0.0', '', '192.168.1.10'])
+    def test_secret_required_off_loopback(self, host):
+        with pytest.raises(ValueError):
+            ingest.IngestServer(lambda tenant, event: 0, [], secret=None,
+                                host=host, port=0)
+
+    def test_loopback_without_secret(self):
+        server = ingest.IngestServer(lambda tenant, event: 0, [],
+                                     secret=None, host='127.0.0.1', port=0)
+        server.httpd.server_close()
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+import requests
+
+import jsonstream
+import utils
+from tenants import Tenant
+
+
+def chunked(data, size):
+    encoded = json.dumps(data, ensure_ascii=False).encode('UTF-8')
+    return [encoded[index:index + size]
+            for index in range(0, len(encoded), size)]
+
+
+class TestHomeworksStream:
+    RESPONSE = {
+        'current_date': 1234567890,
+        'homeworks': [
+            {'id': index, 'homework_name': f'работа {index}',
+             'status': 'approved'}
+            for index in range(50)
+        ],
+        'extra': {'nested': [1, 2, 3]},
+    }
+
+    @pytest.mark.parametrize('size', [1, 3, 7, 64, 100000])
+    def test_items_and_fields(self, size):
+        stream = jsonstream.HomeworksStream(chunked(self.RESPONSE, size))
+        assert list(stream) == self.RESPONSE['homeworks']
+        assert stream.fields == {
+            'current_date': 1234567890,
+            'homeworks': [],
+            'extra': {'nested': [1, 2, 3]},
+        }
+
+    def test_homeworks_not_list(self):
+        stream = jsonstream.HomeworksStream(
+            chunked({'homeworks': {'id': 1}, 'current_date': 1}, 5)
+        )
+        assert list(stream) == []
+        assert stream.fields['homeworks'] == {'id': 1}
+
+    def test_item_not_dict(self):
+        stream = jsonstream.HomeworksStream(
+            chunked({'homeworks': [1, 2]}, 5)
+        )
+        with pytest.raises(TypeError):
+            list(stream)
+
+    def test_truncated(self):
+        chunks = chunked(self.RESPONSE, 16)[:-3]
+        with pytest.raises(ValueError):
+            list(jsonstream.HomeworksStream(chunks))
+
+    def test_items_yielded_before_body_read(self):
+        chunks = chunked(self.RESPONSE, 32)
+        consumed = []
+
+        def tracked():
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        first = next(iter(jsonstream.HomeworksStream(tracked())))
+        assert first == self.RESPONSE['homeworks'][0]
+        assert len(consumed) < len(chunks) / 4
+
+
+class MockStreamResponse:
+    status_code = 200
+
+    def __init__(self, data):
+        self.data = data
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        return chunked(self.data, 10)
+
+    def close(self):
+        self.closed = True
+
+
+class TestPollStream:
+
+    def test_poll_stream(self, monkeypatch, homework_module):
+        response = MockStreamResponse({
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'rejected'},
+            ],
+            'current_date': 500,
+        })
+        requested = []
+
+        def mock_get(**kwargs):
+            requested.append(kwargs)
+            return response
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        monkeypatch.setattr(homework_module, 'STREAM_RESPONSES', True)
+        bot = utils.RecordingBot()
+        tenant = Tenant('t', 'token', '1', timestamp=100)
+        homework_module.poll_tenant(bot, tenant)
+        assert requested[0]['stream'] is True
+        assert len(bot.sent) == 2
+        assert tenant.timestamp == 500
+        assert response.closed
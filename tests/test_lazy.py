@@ -0,0 +1,69 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from lazy import LazyObject, is_loaded, lazy_import
+
+
+@pytest.fixture
+def module_path(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    sys.modules.pop('lazy_probe', None)
+
+
+class TestLazyImport:
+
+    def test_executed_on_first_attribute(self, module_path):
+        (module_path / 'lazy_probe.py').write_text(
+            'import builtins\nbuiltins.lazy_probe_loaded = True\nVALUE = 1\n'
+        )
+        import builtins
+        builtins.lazy_probe_loaded = False
+        module = lazy_import('lazy_probe')
+        assert not builtins.lazy_probe_loaded
+        assert not is_loaded('lazy_probe')
+        assert module.VALUE == 1
+        assert builtins.lazy_probe_loaded
+        assert is_loaded('lazy_probe')
+        del builtins.lazy_probe_loaded
+
+    def test_first_access_from_many_threads(self, module_path):
+        (module_path / 'lazy_probe.py').write_text(
+            'import time\ntime.sleep(0.2)\nVALUE = 1\n'
+        )
+        module = lazy_import('lazy_probe')
+        threads = 16
+        barrier = threading.Barrier(threads)
+
+        def touch(_):
+            barrier.wait()
+            return module.VALUE
+
+        with ThreadPoolExecutor(threads) as executor:
+            assert list(executor.map(touch, range(threads))) == [1] * threads
+
+    def test_loaded_module_returned(self):
+        assert lazy_import('sys') is sys
+
+    def test_missing_module(self):
+        with pytest.raises(ModuleNotFoundError):
+            lazy_import('lazy_probe_missing')
+
+
+class TestLazyObject:
+
+    def test_created_once_on_access(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return 'text'
+
+        value = LazyObject(factory)
+        assert calls == []
+        assert value.upper() == 'TEXT'
+        assert value.lower() == 'text'
+        assert calls == [1]
@@ -0,0 +1,135 @@
+import time
+
+import pytest
+
+import leases
+import storage
+from hashring import HashRing
+from records import Status
+from tenants import Tenant
+
+NAMES = [str(index) for index in range(100)]
+
+
+@pytest.fixture(params=['sqlite', 'file'])
+def backend_factory(request, tmp_path):
+    location = str(
+        tmp_path / ('leases.db' if request.param == 'sqlite' else 'leases')
+    )
+    created = []
+
+    def create():
+        backend = leases.create_backend(location)
+        created.append(backend)
+        return backend
+
+    yield create
+    for backend in created:
+        backend.close()
+
+
+def make_manager(backend_factory, owner, ttl=30):
+    return leases.LeaseManager(
+        backend_factory(), owner=owner, ttl=ttl, names=NAMES
+    )
+
+
+class TestLeaseManager:
+
+    def test_replicas_split_tenants(self, backend_factory):
+        first = make_manager(backend_factory, 'a')
+        second = make_manager(backend_factory, 'b')
+        first.refresh()
+        second.refresh()
+        first.refresh()
+        second.refresh()
+        assert first.owned and second.owned
+        assert not first.owned & second.owned, (
+            'Один аккаунт не должен опрашиваться двумя репликами.'
+        )
+        assert first.owned | second.owned == set(NAMES)
+
+    def test_failover_after_expiry(self, backend_factory):
+        first = make_manager(backend_factory, 'a', ttl=0.2)
+        second = make_manager(backend_factory, 'b', ttl=0.2)
+        first.refresh()
+        second.refresh()
+        first.refresh()
+        second.refresh()
+        time.sleep(0.3)
+        second.refresh()
+        assert second.owned == set(NAMES)
+        assert not first.owns(NAMES[0])
+
+    def test_close_releases(self, backend_factory):
+        first = make_manager(backend_factory, 'a')
+        second = make_manager(backend_factory, 'b')
+        first.refresh()
+        first.close()
+        second.refresh()
+        assert second.owned == set(NAMES)
+
+    def test_shard_workers_own_their_tenants(self, backend_factory):
+        shards = HashRing(range(2)).assign(
+            [Tenant(name, f'token{name}', name) for name in NAMES]
+        )
+        managers = [
+            leases.LeaseManager(
+                backend_factory(), owner=f'{replica}:{index}',
+                names=names, group=str(index),
+            )
+            for replica in 'ab' for index, names in shards.items()
+        ]
+        for _ in range(2):
+            for manager in managers:
+                manager.refresh()
+        owned = [name for manager in managers for name in manager.owned]
+        assert sorted(owned) == sorted(NAMES), (
+            'Каждый аккаунт должен принадлежать ровно одному процессу, '
+            'даже если процессы отслеживают разные наборы.'
+        )
+
+
+class TestOwnedPolling:
+
+    def test_not_owned_tenant_skipped(self, monkeypatch, homework_module):
+        manager = leases.LeaseManager(leases.LeaseBackend(), names=['a'])
+        manager.refresh()
+        monkeypatch.setattr(leases, '_manager', manager)
+        polled = []
+        monkeypatch.setattr(
+            homework_module, 'poll_api',
+            lambda bot, tenant, timestamp: polled.append(timestamp)
+        )
+        homework_module.poll_tenant(None, Tenant('b', 'token', '1'))
+        homework_module.poll_tenant(None, Tenant('a', 'token', '1'))
+        assert len(polled) == 1
+
+    def test_takeover_reloads_state(self, tmp_path, monkeypatch,
+                                    homework_module):
+        store = storage.SQLiteStore(str(tmp_path / 'state.db'))
+        monkeypatch.setattr(storage, '_store', store)
+        peer = Tenant('a', 'token', '1', timestamp=500)
+        store.save_tenant(peer)
+        store.save_status(peer, 1, Status.APPROVED)
+        store.flush()
+        manager = leases.LeaseManager(leases.LeaseBackend(), names=['a'])
+        manager.refresh()
+        monkeypatch.setattr(leases, '_manager', manager)
+        polled = []
+        monkeypatch.setattr(
+            homework_module, 'poll_api',
+            lambda bot, tenant, timestamp: polled.append(
+                (timestamp, dict(tenant.statuses))
+            )
+        )
+        tenant = Tenant('a', 'token', '1', timestamp=100)
+        homework_module.poll_tenant(None, tenant)
+        assert polled == [(440, {1: Status.APPROVED})], (
+            'Аккаунт, перешедший от другой реплики, должен опрашиваться '
+            'с её курсором и статусами.'
+        )
+        store.save_tenant(Tenant('a', 'token', '1', timestamp=900))
+        homework_module.poll_tenant(None, tenant)
+        assert polled[-1][0] == 440
+        store.close()
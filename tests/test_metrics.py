@@ -0,0 +1,73 @@
+import requests
+
+import metrics
+from tenants import Tenant
+
+
+class TestMetrics:
+
+    def test_counter_render(self):
+        registry = []
+        counter = metrics.Counter('test_total', 'Тест.', registry=registry)
+        counter.inc(type='ConnectionError', tenant='a')
+        counter.inc(2, type='ConnectionError', tenant='a')
+        assert counter.value(tenant='a', type='ConnectionError') == 3
+        assert metrics.render(registry) == (
+            '# HELP test_total Тест.\n'
+            '# TYPE test_total counter\n'
+            'test_total{tenant="a",type="ConnectionError"} 3\n'
+        )
+
+    def test_histogram_cumulative(self):
+        registry = []
+        histogram = metrics.Histogram('test_seconds', 'Тест.',
+                                      buckets=(0.1, 1), registry=registry)
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value, stage='x')
+        text = metrics.render(registry)
+        assert 'test_seconds_bucket{stage="x",le="0.1"} 1' in text
+        assert 'test_seconds_bucket{stage="x",le="1"} 2' in text
+        assert 'test_seconds_bucket{stage="x",le="+Inf"} 3' in text
+        assert 'test_seconds_count{stage="x"} 3' in text
+        assert histogram.count(stage='x') == 3
+
+    def test_poll_errors_counted(self, monkeypatch, homework_module):
+        def mock_request_get_with_exception(*args, **kwargs):
+            raise requests.RequestException('Something wrong')
+
+        monkeypatch.setattr(requests, 'get', mock_request_get_with_exception)
+
+        class Bot:
+            def send_message(self, chat_id=None, text=None):
+                pass
+
+        tenant = Tenant('metrics-tenant', 'token', '1')
+        before = metrics.ERRORS.value(type='ConnectionError',
+                                      tenant=tenant.name)
+        homework_module.poll_tenant(Bot(), tenant)
+        assert metrics.ERRORS.value(
+            type='ConnectionError', tenant=tenant.name
+        ) == before + 1
+        assert metrics.POLLS.value(tenant=tenant.name) >= 1
+
+    def test_http_endpoint(self, homework_module):
+        homework_module.parse_status(
+            {'homework_name': 'hw', 'status': 'approved'}
+        )
+        server = metrics.start_server(port=0)
+        try:
+            response = requests.get(
+                f'http://127.0.0.1:{server.server_port}/metrics', timeout=5
+            )
+            missing = requests.get(
+                f'http://127.0.0.1:{server.server_port}/', timeout=5
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert response.status_code == 200
+        assert 'homework_stage_seconds_count{stage="parse_status"}' in (
+            response.text
+        )
+        assert 'homework_outbox_depth 0' in response.text
+        assert missing.status_code == 404
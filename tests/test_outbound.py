@@ -0,0 +1,150 @@
+import sqlite3
+import threading
+import time
+
+import telegram
+
+import outbound
+import storage
+import utils
+from ratelimit import TokenBucket
+from tenants import Tenant
+
+
+class TestTokenBucket:
+
+    def test_reserve_waits_when_empty(self):
+        clock = utils.FakeClock()
+        bucket = TokenBucket(2, clock=clock)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0.5
+        clock.now = 10
+        assert bucket.reserve() == 0
+
+    def test_pause(self):
+        clock = utils.FakeClock()
+        bucket = TokenBucket(100, clock=clock)
+        bucket.pause(3)
+        assert bucket.reserve() == 3
+
+
+class TestOutboundQueue:
+
+    def test_messages_delivered_in_background(self):
+        delivered = []
+        lock = threading.Lock()
+
+        def deliver(bot, tenant, message_ids, message):
+            with lock:
+                delivered.append((tenant.chat_id, message_ids[0]))
+
+        sender = outbound.OutboundQueue(deliver, workers=3,
+                                        global_rate=1000, chat_rate=1000)
+        tenants = [Tenant(str(index), 'token', str(index))
+                   for index in range(5)]
+        for message_id, tenant in enumerate(tenants * 2):
+            sender.submit(None, tenant, [message_id], 'text')
+        sender.join()
+        sender.close()
+        assert sorted(delivered) == sorted(
+            (tenant.chat_id, message_id)
+            for message_id, tenant in enumerate(tenants * 2)
+        )
+
+    def test_retry_after_requeues(self):
+        attempts = []
+
+        def deliver(bot, tenant, message_ids, message):
+            attempts.extend(message_ids)
+            if len(attempts) == 1:
+                raise telegram.error.RetryAfter(0.01)
+
+        sender = outbound.OutboundQueue(deliver, workers=1,
+                                        global_rate=1000, chat_rate=1000)
+        sender.submit(None, Tenant('t', 'token', '1'), [7], 'text')
+        sender.join()
+        sender.close()
+        assert attempts == [7, 7]
+        assert sender.chat_bucket('1').paused_until > 0
+
+    def test_paused_chat_does_not_block_others(self):
+        delivered = []
+
+        def deliver(bot, tenant, message_ids, message):
+            delivered.append((tenant.chat_id, time.monotonic()))
+
+        sender = outbound.OutboundQueue(deliver, workers=1,
+                                        global_rate=1000, chat_rate=1000)
+        sender.chat_bucket('slow').pause(0.3)
+        started = time.monotonic()
+        for message_id in range(4):
+            sender.submit(None, Tenant('s', 'token', 'slow'), [message_id],
+                          'text')
+        sender.submit(None, Tenant('f', 'token', 'fast'), [4], 'text')
+        sender.join()
+        sender.close()
+        assert delivered[0][0] == 'fast'
+        assert delivered[0][1] - started < 0.2
+        assert [chat_id for chat_id, _ in delivered[1:]] == ['slow'] * 4
+        assert delivered[1][1] - started >= 0.3
+
+    def test_worker_survives_delivery_error(self, monkeypatch):
+        failed = []
+
+        class Store(storage.StateStore):
+            def mark_failed(self, message_ids):
+                failed.extend(message_ids)
+
+        monkeypatch.setattr(storage, '_store', Store())
+        delivered = []
+
+        def deliver(bot, tenant, message_ids, message):
+            if message_ids == [1]:
+                raise sqlite3.OperationalError('database is locked')
+            delivered.extend(message_ids)
+
+        sender = outbound.OutboundQueue(deliver, workers=1,
+                                        global_rate=1000, chat_rate=1000)
+        tenant = Tenant('t', 'token', '1')
+        for message_id in range(1, 4):
+            sender.submit(None, tenant, [message_id], 'text')
+        sender.join()
+        sender.close()
+        assert failed == [1]
+        assert delivered == [2, 3]
+
+    def test_status_messages_coalesced(self):
+        delivered = []
+
+        def deliver(bot, tenant, message_ids, message):
+            delivered.append((message_ids, message))
+
+        sender = outbound.OutboundQueue(deliver, workers=1,
+                                        global_rate=1000, chat_rate=1000,
+                                        coalesce_window=60)
+        tenant = Tenant('t', 'token', '1')
+        for message_id in range(3):
+            sender.submit(None, tenant, [message_id], f'status {message_id}',
+                          coalesce=True)
+        sender.submit(None, tenant, [3], 'error')
+        sender.join()
+        sender.close()
+        assert sorted(delivered) == [
+            ([0, 1, 2], 'status 0\nstatus 1\nstatus 2'), ([3], 'error')
+        ]
+        assert sender.saved_calls == 2
+
+
+class TestMergeMessages:
+
+    def test_split_at_limit(self):
+        items = [([index], 'x' * 6) for index in range(3)]
+        assert outbound.merge_messages(items, limit=13) == [
+            ([0, 1], 'xxxxxx\nxxxxxx'), ([2], 'xxxxxx')
+        ]
+
+    def test_long_message_split(self):
+        assert outbound.merge_messages([([1], 'x' * 25)], limit=10) == [
+            ([], 'x' * 10), ([], 'x' * 10), ([1], 'x' * 5)
+        ]
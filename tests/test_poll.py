@@ -0,0 +1,335 @@
+import json
+
+import requests
+
+import utils
+from records import Status
+from tenants import Tenant
+
+
+def mock_get_returning(monkeypatch, *payloads):
+    responses = iter(payloads)
+
+    def mock_response_get(*args, **kwargs):
+        response = utils.MockResponseGET(*args, **kwargs)
+        data = next(responses)
+        response.json = lambda: data
+        return response
+
+    monkeypatch.setattr(requests, 'get', mock_response_get)
+
+
+class TestPollTenant:
+    HOMEWORKS = [
+        {'id': 1, 'homework_name': 'hw1', 'status': 'reviewing'},
+        {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+        {'id': 3, 'homework_name': 'hw3', 'status': 'rejected'},
+    ]
+
+    def make_tenant(self):
+        return Tenant(name='t', practicum_token='token', chat_id='1',
+                      timestamp=100)
+
+    def test_all_homeworks_processed(self, monkeypatch, homework_module):
+        mock_get_returning(
+            monkeypatch, {'homeworks': self.HOMEWORKS, 'current_date': 200}
+        )
+        bot = utils.RecordingBot()
+        tenant = self.make_tenant()
+        homework_module.poll_tenant(bot, tenant)
+        assert len(bot.sent) == len(self.HOMEWORKS), (
+            'Все изменения статусов из ответа должны быть отправлены.'
+        )
+        assert tenant.statuses == {1: Status.REVIEWING, 2: Status.APPROVED,
+                                   3: Status.REJECTED}
+
+    def test_known_statuses_skipped(self, monkeypatch, homework_module):
+        changed = dict(self.HOMEWORKS[0], status='approved')
+        mock_get_returning(
+            monkeypatch,
+            {'homeworks': self.HOMEWORKS, 'current_date': 200},
+            {'homeworks': [changed] + self.HOMEWORKS[1:],
+             'current_date': 300},
+        )
+        bot = utils.RecordingBot()
+        tenant = self.make_tenant()
+        homework_module.poll_tenant(bot, tenant)
+        homework_module.poll_tenant(bot, tenant)
+        assert len(bot.sent) == len(self.HOMEWORKS) + 1
+        assert bot.texts[-1].startswith(
+            'Изменился статус проверки работы "hw1"'
+        )
+
+    def test_cursor_advances_without_changes(self, monkeypatch,
+                                             homework_module):
+        from_dates = []
+
+        def mock_response_get(*args, **kwargs):
+            from_dates.append(kwargs['params']['from_date'])
+            response = utils.MockResponseGET(*args, **kwargs)
+            response.json = lambda: {
+                'homeworks': [], 'current_date': 1000 + len(from_dates)
+            }
+            return response
+
+        monkeypatch.setattr(requests, 'get', mock_response_get)
+        tenant = self.make_tenant()
+        tenant.timestamp = 1000
+        bot = utils.RecordingBot()
+        homework_module.poll_tenant(bot, tenant)
+        homework_module.poll_tenant(bot, tenant)
+        overlap = homework_module.CURSOR_OVERLAP
+        assert from_dates == [1000 - overlap, 1001 - overlap], (
+            'Курсор должен сдвигаться после каждого успешного опроса.'
+        )
+        assert tenant.timestamp == 1002
+
+    def test_overlap_duplicates_skipped(self, monkeypatch, homework_module):
+        payload = {'homeworks': self.HOMEWORKS[:1], 'current_date': 200}
+        mock_get_returning(monkeypatch, payload, payload)
+        bot = utils.RecordingBot()
+        tenant = self.make_tenant()
+        homework_module.poll_tenant(bot, tenant)
+        homework_module.poll_tenant(bot, tenant)
+        assert len(bot.sent) == 1
+
+    def test_status_kept_unknown_until_outbox_write(self, monkeypatch,
+                                                    homework_module):
+        import sqlite3
+
+        import storage
+
+        class LockedOnce(storage.StateStore):
+            failures = 1
+
+            def add_message(self, tenant, text):
+                if self.failures:
+                    self.failures -= 1
+                    raise sqlite3.OperationalError('database is locked')
+
+        monkeypatch.setattr(storage, '_store', LockedOnce())
+        payload = {'homeworks': self.HOMEWORKS[:1], 'current_date': 200}
+        mock_get_returning(monkeypatch, payload, payload)
+        bot = utils.RecordingBot()
+        tenant = self.make_tenant()
+        homework_module.poll_tenant(bot, tenant)
+        assert tenant.statuses == {}, (
+            'Статус не должен считаться известным, пока уведомление о нём '
+            'не записано в outbox.'
+        )
+        homework_module.poll_tenant(bot, tenant)
+        assert bot.texts[-1].startswith(
+            'Изменился статус проверки работы "hw1"'
+        )
+        assert tenant.statuses == {1: Status.REVIEWING}
+
+
+class TestRetryOutbox:
+
+    def test_failed_messages_sent_in_bulk_after_recovery(
+            self, tmp_path, homework_module, monkeypatch):
+        import storage
+        import telegram
+
+        store = storage.SQLiteStore(str(tmp_path / 'state.db'))
+        monkeypatch.setattr(storage, '_store', store)
+        monkeypatch.setattr(storage, 'OUTBOX_RETRY_BASE', 0)
+        tenant = Tenant(name='t', practicum_token='token', chat_id='1')
+
+        class DownBot(utils.RecordingBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                raise telegram.error.TelegramError('down')
+
+        homework_module.notify(DownBot(), tenant, 'first')
+        monkeypatch.setattr(storage, 'OUTBOX_RETRY_BASE', 3600)
+        for text in ('second', 'third'):
+            homework_module.notify(DownBot(), tenant, text)
+        assert store.outbox_stats()[0] == 3
+        bot = utils.RecordingBot()
+        homework_module.retry_outbox(bot)
+        assert bot.texts == ['first', 'second', 'third'], (
+            'После восстановления Telegram все отложенные сообщения '
+            'должны уйти одной пачкой.'
+        )
+        assert store.outbox_stats()[0] == 0
+        store.close()
+
+    def test_rejected_message_dropped(self, tmp_path, homework_module,
+                                      monkeypatch):
+        import storage
+        import telegram
+
+        store = storage.SQLiteStore(str(tmp_path / 'state.db'))
+        monkeypatch.setattr(storage, '_store', store)
+        tenant = Tenant(name='t', practicum_token='token', chat_id='1')
+        monkeypatch.setattr(storage, 'OUTBOX_RETRY_BASE', 0)
+        store.mark_failed([store.add_message(tenant, 'blocked')])
+        monkeypatch.setattr(storage, 'OUTBOX_RETRY_BASE', 3600)
+        store.mark_failed([store.add_message(tenant, 'pending')])
+
+        class BlockedBot(utils.RecordingBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if text == 'blocked':
+                    raise telegram.error.Unauthorized('bot was blocked')
+                super().send_message(chat_id=chat_id, text=text)
+
+        bot = BlockedBot()
+        homework_module.retry_outbox(bot)
+        assert bot.texts == ['pending'], (
+            'Отказ Telegram в пробной отправке не должен задерживать '
+            'остальные сообщения.'
+        )
+        assert store.outbox_stats()[0] == 0
+        assert store.claim_due(release=True) == []
+        store.close()
+
+    def test_storage_error_does_not_stop_loop(self, homework_module,
+                                              monkeypatch, caplog):
+        import sqlite3
+
+        import runner
+        import storage
+
+        class LockedStore(storage.StateStore):
+            def claim_due(self, limit=100, release=False):
+                raise sqlite3.OperationalError('database is locked')
+
+            flush = claim_due
+
+        monkeypatch.setattr(storage, '_store', LockedStore())
+        homework_module.housekeeping(utils.RecordingBot())
+        tenant_runner = runner.TenantRunner(utils.RecordingBot(), [])
+        tenant_runner.run_due()
+        tenant_runner.close()
+        logged = [record for record in caplog.records
+                  if 'database is locked' in record.getMessage()]
+        assert len(logged) == 4, (
+            'Сбой хранилища при обслуживании outbox должен журналироваться, '
+            'а не останавливать цикл опроса.'
+        )
+
+
+class TestRunOnce:
+    HOMEWORKS = [{'id': 1, 'homework_name': 'hw1', 'status': 'reviewing'}]
+
+    def test_state_persists_between_runs(self, tmp_path, homework_module,
+                                         monkeypatch):
+        import storage
+
+        path = str(tmp_path / 'state.db')
+        mock_get_returning(
+            monkeypatch,
+            {'homeworks': self.HOMEWORKS, 'current_date': 200},
+            {'homeworks': self.HOMEWORKS, 'current_date': 300},
+        )
+        sent = []
+        for _ in range(2):
+            store = storage.SQLiteStore(path)
+            monkeypatch.setattr(storage, '_store', store)
+            bot = utils.RecordingBot()
+            assert homework_module.run_once(bot)
+            sent.append(bot.sent)
+            store.close()
+        assert len(sent[0]) == 1 and sent[1] == [], (
+            'Повторный запуск должен брать известные статусы из хранилища.'
+        )
+
+    def test_bot_not_created_without_changes(self, homework_module,
+                                             monkeypatch):
+        import telegram
+
+        def fail_bot(*args, **kwargs):
+            raise AssertionError('Бот не должен создаваться.')
+
+        monkeypatch.setattr(telegram, 'Bot', fail_bot)
+        mock_get_returning(monkeypatch, {'homeworks': [], 'current_date': 1})
+        assert homework_module.run_once()
+
+
+class BodyResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.content = json.dumps(payload).encode()
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class TestPayloadHash:
+    HOMEWORKS = [{'id': 1, 'homework_name': 'hw1', 'status': 'reviewing'}]
+
+    def mock_bodies(self, monkeypatch, *payloads):
+        responses = iter(payloads)
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: BodyResponse(next(responses))
+        )
+
+    def test_hash_ignores_current_date(self, homework_module):
+        first = BodyResponse({'homeworks': self.HOMEWORKS,
+                              'current_date': 100})
+        second = BodyResponse({'homeworks': self.HOMEWORKS,
+                               'current_date': 200})
+        changed = BodyResponse({'homeworks': [], 'current_date': 100})
+        first_hash, current_date = homework_module.hash_payload(first)
+        assert current_date == 100
+        assert homework_module.hash_payload(second) == (first_hash, 200)
+        assert homework_module.hash_payload(changed)[0] != first_hash
+
+    def test_unchanged_response_skips_parsing(self, monkeypatch,
+                                              homework_module):
+        import metrics
+
+        self.mock_bodies(
+            monkeypatch,
+            {'homeworks': self.HOMEWORKS, 'current_date': 200},
+            {'homeworks': self.HOMEWORKS, 'current_date': 300},
+        )
+        tenant = Tenant(name='t', practicum_token='token', chat_id='1',
+                        timestamp=100)
+        bot = utils.RecordingBot()
+        homework_module.poll_tenant(bot, tenant)
+        checked = []
+        monkeypatch.setattr(homework_module, 'check_response', checked.append)
+        before = metrics.UNCHANGED.value()
+        homework_module.poll_tenant(bot, tenant)
+        assert checked == [], (
+            'Ответ, совпавший с предыдущим, не должен проверяться заново.'
+        )
+        assert metrics.UNCHANGED.value() == before + 1
+        assert tenant.timestamp == 300
+        assert len(bot.sent) == 1
+
+    def test_failed_response_not_remembered(self, monkeypatch,
+                                            homework_module):
+        invalid = {'homeworks': [{'homework_name': 'hw1'}],
+                   'current_date': 200}
+        self.mock_bodies(monkeypatch, invalid, invalid)
+        tenant = Tenant(name='t', practicum_token='token', chat_id='1',
+                        timestamp=100)
+        homework_module.poll_tenant(utils.RecordingBot(), tenant)
+        homework_module.poll_tenant(utils.RecordingBot(), tenant)
+        assert tenant.errors == 2
+        assert tenant.timestamp == 100
+
+    def test_ingested_change_clears_hash(self, monkeypatch, homework_module):
+        self.mock_bodies(
+            monkeypatch,
+            {'homeworks': self.HOMEWORKS, 'current_date': 200},
+            {'homeworks': self.HOMEWORKS, 'current_date': 300},
+        )
+        tenant = Tenant(name='t', practicum_token='token', chat_id='1',
+                        timestamp=100)
+        bot = utils.RecordingBot()
+        homework_module.poll_tenant(bot, tenant)
+        event = {'homeworks': [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'approved'}
+        ]}
+        assert homework_module.ingest_event(bot, tenant, event) == 1
+        homework_module.poll_tenant(bot, tenant)
+        assert tenant.statuses == {1: Status.REVIEWING}, (
+            'Ответ, совпавший с опросом до события, должен проверяться '
+            'заново: статусы уже изменены событием.'
+        )
+        assert len(bot.sent) == 3
@@ -0,0 +1,86 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+import ratelimit
+import utils
+from exceptions import ApiRateLimitError
+from tenants import Tenant, use_tenant
+
+
+class TestRetryAfter:
+
+    def test_seconds(self):
+        assert ratelimit.retry_after_seconds('120') == 120
+
+    def test_http_date(self):
+        date = format_datetime(
+            datetime.fromtimestamp(1000, tz=timezone.utc), usegmt=True
+        )
+        assert ratelimit.retry_after_seconds(date, now=lambda: 970) == 30
+
+    def test_missing_or_invalid(self):
+        assert ratelimit.retry_after_seconds(None, default=5) == 5
+        assert ratelimit.retry_after_seconds('soon', default=5) == 5
+
+
+class TestEndpointLimiter:
+
+    def test_key_pause(self):
+        clock = utils.FakeClock()
+        limiter = ratelimit.EndpointLimiter(rate=100, clock=clock)
+        limiter.pause(10, 'a')
+        with pytest.raises(ApiRateLimitError):
+            limiter.acquire('a')
+        limiter.acquire('b')
+        clock.now = 10
+        limiter.acquire('a')
+        assert limiter.paused == {}
+
+    def test_endpoint_pause(self):
+        clock = utils.FakeClock()
+        limiter = ratelimit.EndpointLimiter(rate=100, clock=clock)
+        limiter.pause(10)
+        with pytest.raises(ApiRateLimitError):
+            limiter.acquire('b')
+
+    def test_share_divides_rate(self):
+        clock = utils.FakeClock()
+        limiter = ratelimit.EndpointLimiter(10, clock=clock)
+        limiter.share(4, rate=10)
+        assert limiter.bucket.rate == 2.5
+        assert limiter.bucket.capacity == 2.5
+        limiter.share(20, rate=10)
+        assert limiter.bucket.capacity == 1.0, (
+            'Каждому процессу доступен хотя бы один запрос без ожидания.'
+        )
+
+    def test_429_pauses_token(self, monkeypatch, homework_module):
+        calls = []
+
+        def mock_response_get(*args, **kwargs):
+            calls.append(kwargs['headers']['Authorization'])
+            response = utils.MockResponseGET(*args, **kwargs)
+            response.status_code = 429
+            response.headers = {'Retry-After': '30'}
+            return response
+
+        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            ratelimit, '_limiter', ratelimit.EndpointLimiter(rate=100)
+        )
+        limited = Tenant(name='a', practicum_token='a', chat_id='1')
+        other = Tenant(name='b', practicum_token='b', chat_id='2')
+        with use_tenant(limited):
+            with pytest.raises(homework_module.ApiAnswerError):
+                homework_module.get_api_answer(0)
+            with pytest.raises(ApiRateLimitError):
+                homework_module.get_api_answer(0)
+        with use_tenant(other):
+            with pytest.raises(homework_module.ApiAnswerError):
+                homework_module.get_api_answer(0)
+        assert calls == ['OAuth a', 'OAuth b'], (
+            'После 429 запросы с этим токеном не должны уходить в сеть.'
+        )
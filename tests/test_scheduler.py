@@ -0,0 +1,90 @@
+import random
+import statistics
+
+import pytest
+
+import scheduler
+from records import Status
+from tenants import Tenant
+
+
+def make_tenant(name='t', **kwargs):
+    return Tenant(name=name, practicum_token='token', chat_id='1', **kwargs)
+
+
+class TestAdaptiveScheduler:
+    NOW = 10 ** 9
+
+    def test_interval_by_status(self):
+        planner = scheduler.AdaptiveScheduler()
+        reviewing = make_tenant('r', statuses={1: Status.REVIEWING})
+        active = make_tenant('a', statuses={1: Status.APPROVED},
+                             changed_at=self.NOW - 60)
+        idle = make_tenant('i', statuses={1: Status.APPROVED},
+                           changed_at=self.NOW - scheduler.IDLE_AFTER - 1)
+        assert (planner.interval(reviewing, self.NOW)
+                == scheduler.REVIEWING_PERIOD)
+        assert planner.interval(active, self.NOW) == scheduler.ACTIVE_PERIOD
+        assert planner.interval(idle, self.NOW) == scheduler.IDLE_PERIOD
+
+    def test_backoff_grows_with_jitter(self):
+        planner = scheduler.AdaptiveScheduler(rng=random.Random(1))
+        tenant = make_tenant()
+        delays = []
+        for errors in (1, 2, 3):
+            tenant.errors = errors
+            delays.append(planner.interval(tenant, self.NOW))
+            cap = min(scheduler.MAX_BACKOFF,
+                      scheduler.ACTIVE_PERIOD * 2 ** (errors - 1))
+            assert cap / 2 <= delays[-1] <= cap
+        assert delays[0] < delays[-1]
+
+    def test_budget_stretches_intervals(self):
+        planner = scheduler.AdaptiveScheduler(requests_per_hour=60)
+        tenants = [make_tenant(str(index)) for index in range(20)]
+        intervals = [planner.interval(tenant, self.NOW) for tenant in tenants]
+        assert planner.requests_per_hour_planned == 60
+        assert intervals[-1] == scheduler.ACTIVE_PERIOD * 2
+
+    def test_pop_due(self):
+        planner = scheduler.AdaptiveScheduler()
+        first, second = make_tenant('1'), make_tenant('2')
+        planner.add(first, self.NOW)
+        planner.schedule(second, self.NOW)
+        assert planner.pop_due(self.NOW) == [first]
+        assert planner.next_delay(self.NOW) == scheduler.ACTIVE_PERIOD
+        planner.schedule(first, self.NOW)
+        due = planner.pop_due(self.NOW + 3600)
+        assert sorted(tenant.name for tenant in due) == ['1', '2']
+
+    def test_reschedule_and_remove(self):
+        planner = scheduler.AdaptiveScheduler()
+        first, second = make_tenant('1'), make_tenant('2')
+        planner.add(first, self.NOW)
+        planner.add(second, self.NOW)
+        planner.schedule(first, self.NOW)
+        planner.remove(second)
+        assert planner.pop_due(self.NOW) == []
+        assert planner.next_delay(self.NOW) == scheduler.ACTIVE_PERIOD
+        assert planner.pop_due(self.NOW + 3600, limit=1) == [first]
+
+    def test_median_delay_from_counts(self):
+        planner = scheduler.AdaptiveScheduler()
+        tenants = [
+            make_tenant('r', statuses={1: Status.REVIEWING}),
+            make_tenant('a', statuses={1: Status.APPROVED},
+                        changed_at=self.NOW - 60),
+            make_tenant('i', statuses={1: Status.APPROVED},
+                        changed_at=self.NOW - scheduler.IDLE_AFTER - 1),
+            make_tenant('j', statuses={1: Status.APPROVED},
+                        changed_at=self.NOW - scheduler.IDLE_AFTER - 1),
+        ]
+        for tenant in tenants:
+            planner.add(tenant, self.NOW)
+            planner.interval(tenant, self.NOW)
+        expected = statistics.median(planner.intervals.values()) / 2
+        assert planner.median_delay == pytest.approx(expected)
+        planner.remove(tenants[0])
+        expected = statistics.median(planner.intervals.values()) / 2
+        assert planner.median_delay == pytest.approx(expected)
+        assert sum(planner.interval_counts.values()) == 3
@@ -0,0 +1,65 @@
+import utils
+from records import Homework, Status
+from statuscache import StatusCache
+
+
+def record(key, status=Status.REVIEWING):
+    return Homework(key=key, name=f'hw{key}', status=status)
+
+
+class TestStatusCache:
+
+    def test_records_merged_between_responses(self):
+        cache = StatusCache(clock=utils.FakeClock(1000.0))
+        cache.update('1', [record(1), record(2)], [record(1)])
+        cache.update('1', [record(2, Status.APPROVED)],
+                     [record(2, Status.APPROVED)])
+        entry = cache.get('1')
+        assert entry.homeworks == {
+            1: record(1), 2: record(2, Status.APPROVED)
+        }
+        assert [item for _, item in entry.history] == [
+            record(1), record(2, Status.APPROVED)
+        ]
+
+    def test_entry_expires_after_ttl(self):
+        clock = utils.FakeClock(1000.0)
+        cache = StatusCache(ttl=60, clock=clock)
+        cache.update('1', [record(1)])
+        clock.now += 59
+        assert cache.get('1') is not None
+        clock.now += 1
+        assert cache.get('1') is None, (
+            'Запись без обновления дольше ttl не должна отдаваться.'
+        )
+        assert len(cache) == 0
+
+    def test_stale_entry_merged_on_update(self):
+        clock = utils.FakeClock(1000.0)
+        cache = StatusCache(ttl=60, clock=clock)
+        cache.update('1', [record(1)])
+        clock.now += 120
+        cache.update('1', [])
+        assert cache.get('1').homeworks == {1: record(1)}, (
+            'Ответ без работ не должен стирать известные статусы.'
+        )
+
+    def test_least_recently_used_evicted(self):
+        cache = StatusCache(maxsize=2, clock=utils.FakeClock(1000.0))
+        cache.update('1', [record(1)])
+        cache.update('2', [record(2)])
+        assert cache.get('1') is not None
+        cache.update('3', [record(3)])
+        assert cache.get('2') is None, (
+            'При переполнении вытесняется чат, к которому дольше всего '
+            'не обращались.'
+        )
+        assert cache.get('1') is not None
+        assert cache.get('3') is not None
+
+    def test_snapshot_not_changed_by_update(self):
+        cache = StatusCache(clock=utils.FakeClock(1000.0))
+        cache.update('1', [record(1)])
+        entry = cache.get('1')
+        cache.update('1', [record(2)])
+        assert list(entry.homeworks) == [1]
@@ -0,0 +1,183 @@
+import sqlite3
+
+import pytest
+
+import storage
+from records import Status
+from tenants import Tenant
+
+
+class FailingCommit:
+    """Соединение, фиксация транзакции в котором не удаётся."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def execute(self, query, *args):
+        if query == 'COMMIT':
+            raise sqlite3.OperationalError('database is locked')
+        return self.connection.execute(query, *args)
+
+
+class TestSQLiteStore:
+
+    def make_tenant(self):
+        return Tenant(name='t', practicum_token='token', chat_id='1')
+
+    def test_state_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        store = storage.SQLiteStore(path)
+        tenant = self.make_tenant()
+        tenant.timestamp = 123
+        tenant.last_message = 'message'
+        store.save_tenant(tenant)
+        store.save_status(tenant, 1, Status.APPROVED)
+        store.save_status(tenant, 'hw2', Status.REVIEWING)
+        store.close()
+
+        restored = self.make_tenant()
+        store = storage.SQLiteStore(path)
+        assert store.load_tenant(restored)
+        assert restored.timestamp == 123
+        assert restored.last_message == 'message'
+        assert restored.statuses == {
+            1: Status.APPROVED, 'hw2': Status.REVIEWING
+        }, (
+            'Ключи работ должны восстанавливаться с исходным типом.'
+        )
+        assert not store.load_tenant(Tenant('other', 'token', '2'))
+        store.close()
+
+    def test_writes_batched(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        store = storage.SQLiteStore(path, batch_size=3)
+        reader = sqlite3.connect(path)
+        tenant = self.make_tenant()
+        store.save_tenant(tenant)
+        store.save_tenant(tenant)
+        assert len(store.pending) == 2
+        assert not store.connection.in_transaction, (
+            'Накопленные записи не должны держать транзакцию открытой.'
+        )
+        assert reader.execute('SELECT * FROM tenant_state').fetchall() == []
+        store.save_tenant(tenant)
+        assert store.pending == []
+        rows = reader.execute('SELECT * FROM tenant_state').fetchall()
+        assert len(rows) == 1
+        reader.close()
+        store.close()
+
+    def test_pending_writes_do_not_lock_other_writers(self, tmp_path,
+                                                      monkeypatch):
+        monkeypatch.setattr(storage, 'BUSY_TIMEOUT', 0.1)
+        path = str(tmp_path / 'state.db')
+        first = storage.SQLiteStore(path)
+        second = storage.SQLiteStore(path)
+        first.save_tenant(self.make_tenant())
+        second.save_tenant(Tenant('other', 'token', '2'))
+        second.add_message(Tenant('other', 'token', '2'), 'text')
+        second.flush()
+        first.flush()
+        assert first.load_tenant(Tenant('other', 'token', '2'))
+        first.close()
+        second.close()
+
+    def test_locked_flush_keeps_writes(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(storage, 'BUSY_TIMEOUT', 0.1)
+        path = str(tmp_path / 'state.db')
+        store = storage.SQLiteStore(path)
+        store.save_tenant(self.make_tenant())
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute('BEGIN IMMEDIATE')
+        with pytest.raises(sqlite3.OperationalError):
+            store.flush()
+        assert len(store.pending) == 1, (
+            'Изменения не должны теряться, если база занята.'
+        )
+        other.execute('ROLLBACK')
+        other.close()
+        assert store.load_tenant(self.make_tenant())
+        store.close()
+
+    def test_failed_commit_keeps_writes(self, tmp_path):
+        store = storage.SQLiteStore(str(tmp_path / 'state.db'))
+        store.save_tenant(self.make_tenant())
+        store.connection = FailingCommit(store.connection)
+        with pytest.raises(sqlite3.OperationalError):
+            store.flush()
+        assert len(store.pending) == 1
+        assert not store.connection.in_transaction
+        store.connection = store.connection.connection
+        assert store.load_tenant(self.make_tenant())
+        store.close()
+
+    def test_outbox(self, tmp_path, monkeypatch):
+        store = storage.SQLiteStore(str(tmp_path / 'state.db'))
+        tenant = self.make_tenant()
+        first = store.add_message(tenant, 'first')
+        second = store.add_message(tenant, 'second')
+        assert store.claim_due() == [], (
+            'Только что записанные сообщения не должны выдаваться повторно.'
+        )
+        store.mark_sent([first])
+        store.mark_failed([second])
+        assert store.outbox_stats()[0] == 1
+        assert store.claim_due() == []
+        assert [row[3] for row in store.claim_due(release=True)] == [
+            'second'
+        ]
+        assert store.claim_due(release=True) == []
+        store.close()
+
+    def test_prune_outbox(self, tmp_path):
+        store = storage.SQLiteStore(str(tmp_path / 'state.db'))
+        tenant = self.make_tenant()
+        sent = store.add_message(tenant, 'sent')
+        store.add_message(tenant, 'pending')
+        store.mark_sent([sent])
+        assert store.prune_outbox(retention=3600) == 0
+        assert store.prune_outbox(retention=-1) == 1
+        rows = store.connection.execute('SELECT text FROM outbox').fetchall()
+        assert rows == [('pending',)]
+        store.close()
+
+    def test_outbox_gives_up(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(storage, 'OUTBOX_MAX_ATTEMPTS', 2)
+        monkeypatch.setattr(storage, 'OUTBOX_RETRY_BASE', 0)
+        store = storage.SQLiteStore(str(tmp_path / 'state.db'))
+        tenant = self.make_tenant()
+        retried = store.add_message(tenant, 'retried')
+        rejected = store.add_message(tenant, 'rejected')
+        store.mark_dead([rejected])
+        store.mark_failed([retried])
+        assert [row[3] for row in store.claim_due()] == ['retried'], (
+            'Отклонённое Telegram сообщение не должно отправляться снова.'
+        )
+        store.mark_failed([retried])
+        assert store.claim_due(release=True) == []
+        assert store.outbox_stats()[0] == 0, (
+            'Брошенные сообщения не должны учитываться в глубине outbox.'
+        )
+        assert store.prune_outbox(retention=-1) == 2
+        store.close()
+
+    def test_outbox_migration(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        connection = sqlite3.connect(path)
+        connection.execute(
+            'CREATE TABLE outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'tenant TEXT NOT NULL, chat_id TEXT NOT NULL, '
+            'text TEXT NOT NULL, created REAL NOT NULL, sent REAL)'
+        )
+        connection.execute(
+            "INSERT INTO outbox (tenant, chat_id, text, created) "
+            "VALUES ('t', '1', 'old', 0)"
+        )
+        connection.commit()
+        connection.close()
+        store = storage.SQLiteStore(path)
+        assert [row[3] for row in store.claim_due()] == ['old']
+        store.close()
@@ -0,0 +1,103 @@
+import json
+
+import runner
+import scheduler
+import supervisor
+from hashring import HashRing
+from records import Status
+from tenants import Tenant
+
+
+def make_tenants(count):
+    return [
+        Tenant(name=str(index), practicum_token=f'token{index}',
+               chat_id=str(index))
+        for index in range(count)
+    ]
+
+
+def owners(shards):
+    return {name: node for node, names in shards.items() for name in names}
+
+
+class TestHashRing:
+
+    def test_balanced(self):
+        shards = HashRing(range(4)).assign(make_tenants(4000))
+        sizes = [len(names) for names in shards.values()]
+        assert min(sizes) > 700 and max(sizes) < 1300
+
+    def test_minimal_movement(self):
+        tenants = make_tenants(4000)
+        before = owners(HashRing(range(4)).assign(tenants))
+        after = owners(HashRing(range(5)).assign(tenants))
+        moved = [name for name in before if before[name] != after[name]]
+        assert all(after[name] == 4 for name in moved), (
+            'При добавлении процесса аккаунты переезжают только в него.'
+        )
+        assert len(moved) < len(tenants) / 3
+
+
+class TestAssign:
+
+    def test_assign_keeps_state(self):
+        tenants = make_tenants(3)
+        tenant_runner = runner.TenantRunner(None, tenants, max_workers=1)
+        try:
+            tenants[0].statuses = {1: Status.APPROVED}
+            new_tenants = make_tenants(4)[1:]
+            added = tenant_runner.assign(new_tenants)
+            assert [tenant.name for tenant in added] == ['3']
+            assert tenant_runner.tenants[0] is tenants[1]
+            assert tenants[0].next_poll is None
+            due = tenant_runner.scheduler.pop_due(now=float('inf'))
+            assert sorted(tenant.name for tenant in due) == ['1', '2', '3']
+        finally:
+            tenant_runner.close()
+
+    def test_scheduler_remove_releases_budget(self):
+        planner = scheduler.AdaptiveScheduler()
+        tenant = make_tenants(1)[0]
+        planner.schedule(tenant, now=0)
+        planner.remove(tenant)
+        assert planner.demand == 0
+        assert planner.pop_due(now=float('inf')) == []
+
+
+class FakeControl:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+
+class TestSupervisorResize:
+
+    def test_resize_shares_rate(self, tmp_path, monkeypatch):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'name': str(index), 'practicum_token': f'token{index}',
+             'chat_id': str(index)}
+            for index in range(50)
+        ]))
+        started = {}
+
+        def start_worker(self, index):
+            started[index] = len(self.shards)
+            self.workers[index] = (None, FakeControl(), 0)
+
+        monkeypatch.setattr(supervisor.Supervisor, 'start_worker',
+                            start_worker)
+        monkeypatch.setattr(supervisor.Supervisor, 'stop_worker',
+                            lambda self, index: self.workers.pop(index))
+        manager = supervisor.Supervisor(str(path), processes=2)
+        assert started == {0: 2, 1: 2}
+        manager.resize(3)
+        assert started[2] == 3
+        for index in (0, 1):
+            names, processes = manager.workers[index][1].sent[-1]
+            assert processes == 3, (
+                'Все процессы должны узнать новое число процессов.'
+            )
+            assert names == manager.shards[index]
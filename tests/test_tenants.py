@@ -0,0 +1,85 @@
+import json
+import sqlite3
+
+import pytest
+import requests
+
+import runner
+import tenants
+import utils
+
+
+class TestTenants:
+    TENANTS = [
+        {'name': 'first', 'practicum_token': 'token1', 'chat_id': 1},
+        {'name': 'second', 'practicum_token': 'token2', 'chat_id': 2,
+         'timestamp': 100, 'last_message': 'old'},
+    ]
+
+    def test_load_json(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps(self.TENANTS), encoding='UTF-8')
+        loaded = tenants.load_tenants(path)
+        assert [tenant.name for tenant in loaded] == ['first', 'second']
+        assert loaded[0].chat_id == '1'
+        assert loaded[1].timestamp == 100
+        assert loaded[1].last_message == 'old'
+
+    def test_load_sqlite(self, tmp_path):
+        path = str(tmp_path / 'tenants.db')
+        connection = sqlite3.connect(path)
+        connection.execute(
+            'CREATE TABLE tenants (name TEXT, practicum_token TEXT, '
+            'chat_id TEXT, timestamp INTEGER, last_message TEXT)'
+        )
+        connection.execute(
+            "INSERT INTO tenants VALUES ('first', 'token1', '1', 5, '')"
+        )
+        connection.commit()
+        connection.close()
+        loaded = tenants.load_tenants(path)
+        assert len(loaded) == 1
+        assert loaded[0].timestamp == 5
+
+    @pytest.mark.parametrize('data', [
+        [{'name': 'first', 'chat_id': 1}],
+        [TENANTS[0], TENANTS[0]],
+        {'name': 'first'},
+    ])
+    def test_load_invalid(self, tmp_path, data):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps(data), encoding='UTF-8')
+        with pytest.raises((ValueError, TypeError)):
+            tenants.load_tenants(path)
+
+    def test_runner_polls_each_tenant(self, monkeypatch, random_timestamp,
+                                      homework_module):
+        calls = []
+
+        def mock_response_get(*args, **kwargs):
+            calls.append(kwargs['headers']['Authorization'])
+            response = utils.MockResponseGET(
+                *args, random_timestamp=random_timestamp, **kwargs
+            )
+            response.json = lambda: {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': random_timestamp,
+            }
+            return response
+
+        monkeypatch.setattr(requests, 'get', mock_response_get)
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id=None, text=None):
+                sent.append(chat_id)
+
+        registry = [tenants.tenant_from_dict(item) for item in self.TENANTS]
+        tenant_runner = runner.TenantRunner(Bot(), registry, max_workers=2)
+        tenant_runner.run_round()
+        tenant_runner.close()
+        assert sorted(calls) == ['OAuth token1', 'OAuth token2']
+        assert sorted(sent) == ['1', '2']
+        assert all(tenant.timestamp == random_timestamp
+                   for tenant in registry)
+        assert tenant_runner.polls == 2
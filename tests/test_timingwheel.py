@@ -0,0 +1,67 @@
+import math
+import random
+
+import pytest
+
+from timingwheel import TimingWheel
+
+
+class TestTimingWheel:
+
+    def test_due_not_early(self):
+        wheel = TimingWheel(start=0)
+        wheel.schedule('a', 10.5, 'a')
+        assert wheel.pop_due(10) == []
+        assert wheel.next_deadline() == 11
+        assert wheel.pop_due(11) == ['a']
+        assert len(wheel) == 0
+
+    def test_cancel_and_reschedule(self):
+        wheel = TimingWheel(start=0)
+        wheel.schedule('a', 5, 'a')
+        wheel.schedule('b', 5, 'b')
+        wheel.schedule('a', 500, 'a')
+        assert wheel.cancel('b')
+        assert not wheel.cancel('b')
+        assert wheel.pop_due(100) == []
+        assert wheel.pop_due(500) == ['a']
+
+    def test_batches(self):
+        wheel = TimingWheel(start=0)
+        for key in range(5):
+            wheel.schedule(key, 1, key)
+        assert wheel.pop_due(1, limit=2) == [0, 1]
+        assert wheel.pop_due(1, limit=2) == [2, 3]
+        assert wheel.pop_due(1, limit=2) == [4]
+
+    @pytest.mark.parametrize('bits, levels', [(2, 2), (3, 3), (6, 4)])
+    def test_matches_sorted_deadlines(self, bits, levels):
+        rng = random.Random(bits)
+        wheel = TimingWheel(bits=bits, levels=levels, start=0)
+        deadlines = {}
+        for key in range(300):
+            deadlines[key] = rng.uniform(0, 10 ** 5)
+            wheel.schedule(key, deadlines[key], key)
+        for key in range(0, 300, 7):
+            wheel.cancel(key)
+            del deadlines[key]
+        now = 0
+        while deadlines:
+            expected = min(math.ceil(value) for value in deadlines.values())
+            assert wheel.next_deadline() == expected
+            now = expected + rng.randrange(50)
+            due = wheel.pop_due(now)
+            assert sorted(due) == sorted(
+                key for key, value in deadlines.items()
+                if math.ceil(value) <= now
+            )
+            for key in due:
+                del deadlines[key]
+        assert wheel.next_deadline() is None
+
+    def test_infinity_drains_everything(self):
+        wheel = TimingWheel(bits=2, levels=2, start=0)
+        for key in range(20):
+            wheel.schedule(key, 10 ** key, key)
+        assert sorted(wheel.pop_due(float('inf'))) == list(range(20))
+        assert len(wheel) == 0
@@ -101,5 +101,29 @@ class MockTelegramBot:
         self.text = text
 
 
+class RecordingBot:
+    """Bot recording every sent message as a (chat_id, text) pair."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+    @property
+    def texts(self):
+        return [text for _, text in self.sent]
+
+
+class FakeClock:
+    """Clock returning a manually set time, for injectable clocks."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
 class BreakInfiniteLoop(Exception):
     pass
@@ -1,14 +1,14 @@
 LOG_DEBUG_START_CHECK_TOKENS = 'Проверка наличия всех токенов.'
-LOG_CRITICAL_CHECK_TOKENS = ('Отсутствует токен_ы {none_tokens}. '
+LOG_CRITICAL_CHECK_TOKENS = ('Отсутствует токен_ы %(none_tokens)s. '
                              'Бот не может продолжить работу.')
 NONE_TOKENS_ERROR_CHECK_TOKENS = ('Список недоступных токенов: '
                                   '{none_tokens}.')
 LOG_INFO_START_SEND_MESSAGE = ('Начало отправки сообщения '
-                               '"{message}" в Telegram')
-LOG_DEBAG_SEND_MESSAGE = ('Сообщениe "{message}" '
+                               '"%(message)s" в Telegram')
+LOG_DEBAG_SEND_MESSAGE = ('Сообщениe "%(message)s" '
                           'отправлено в Telegram.')
 LOG_EXCEPT_SEND_MESSAGE = ('Ошибка отправки сообщения '
-                           '"{message}" в Telegram: {error}')
+                           '"%(message)s" в Telegram: %(error)s')
 TELEGRAM_ERROR_SEND_MESSAGE = ('Ошибка отправки сообщения '
                                'в Telegram: {error}')
 CONNECTION_ERROR_GET_API_ANSWER = 'Ошибка соединения: {error}.'
@@ -33,6 +33,66 @@ MESSAGE_PARSE_STATUS = ('Изменился статус проверки раб
 STATUS_ERROR_PARSE_STATUS = 'Неизвестный статус работы - {status}'
 LOG_DEBAG_PARSE_STATUS = 'Информация о статусе работы получена.'
 LOG_INFO_MAIN = 'Бот начал работу.'
+LOG_INFO_RUN_ONCE = 'Бот выполняет один опрос и завершает работу.'
 LOG_DEBUG_MAIN = 'Бот успешно отправил статус в Telegram.'
 LOG_DEBUG_NO_STATUS_MAIN = 'Нет новых статусов.'
 MAIN_ERROR_MESSAGE = 'Сбой в работе программы: {error}'
+TENANT_KEYS_ERROR = 'В описании аккаунта {name} отсутствуют ключи {missing}.'
+TENANTS_NOT_LIST_ERROR = 'Реестр аккаунтов содержит не список, а {type}.'
+TENANTS_DUPLICATE_ERROR = 'В реестре повторяются аккаунты: {names}.'
+LOG_INFO_RUNNER = 'Начат опрос аккаунтов: %(count)s.'
+LOG_INFO_RUNNER_ROUND = ('Опрошено аккаунтов: %(polls)s за %(elapsed).3f с, '
+                         '%(throughput).1f опросов/с.')
+LOG_INFO_SESSION_STATS = ('HTTP-соединений открыто: %(handshakes)s, '
+                          'запросов: %(requests)s, '
+                          'средняя задержка: %(latency).1f мс.')
+LOG_INFO_SCHEDULER_STATS = ('План опросов: %(requests).0f запросов/ч, '
+                            'медианная задержка уведомления %(delay).0f с.')
+LOG_WARNING_RETRY_AFTER = ('Telegram ограничил отправку в чат %(chat_id)s, '
+                           'повтор через %(seconds)s с.')
+LOG_EXCEPT_SENDER = ('Сбой отправителя сообщений в чат %(chat_id)s: '
+                     '%(error)s')
+LOG_INFO_OUTBOX_STATS = ('Неотправленных сообщений в outbox: %(depth)s, '
+                         'старейшему %(age).0f с.')
+LOG_INFO_COALESCE_STATS = ('Склеено сообщений о статусах: %(messages)s, '
+                           'сэкономлено вызовов Telegram: %(saved)s.')
+CIRCUIT_OPEN_ERROR = ('API {name} недоступен, запросы приостановлены '
+                      'автоматом защиты.')
+LOG_WARNING_DEAD_MESSAGE = ('Telegram не примет сообщение для чата '
+                            '%(chat_id)s, отправка прекращена: %(error)s')
+LOG_WARNING_CIRCUIT_STATE = ('Автомат защиты %(name)s: %(previous)s -> '
+                             '%(state)s.')
+RATE_LIMITED_ERROR_GET_API_ANSWER = ('API ограничил частоту запросов, '
+                                     'запрос отложен до окончания паузы.')
+LOG_WARNING_RETRY_AFTER_API = ('API вернул код %(status_code)s, пауза '
+                               '%(seconds).0f с для %(scope)s.')
+ERROR_DIGEST_HEADER = 'Сводка ошибок за последние {minutes} мин:'
+ERROR_DIGEST_LINE = '{name} ×{count}, аккаунтов: {tenants}. {cause}'
+ERROR_DIGEST_MORE = 'И ещё видов ошибок: {count}.'
+LOG_INFO_SUPERVISOR_RESIZE = ('Процессов: %(processes)s, аккаунтов: '
+                              '%(tenants)s, переехало: %(moved)s.')
+LOG_ERROR_WORKER_DIED = ('Процесс %(name)s завершился с кодом '
+                         '%(exitcode)s и будет перезапущен.')
+LOG_INFO_LEASES = ('Реплика %(owner)s удерживает аккаунтов: %(owned)s '
+                   'из %(total)s, реплик: %(members)s.')
+LOG_EXCEPT_LEASES = 'Ошибка продления аренд: %(error)s'
+LOG_EXCEPT_HOUSEKEEPING = 'Ошибка обслуживания outbox и состояния: %(error)s'
+STREAM_TRUNCATED_ERROR = 'Ответ API оборвался до конца JSON.'
+STREAM_UNEXPECTED_ERROR = ('Неожиданный символ {char!r} в ответе API, '
+                           'позиция {position}.')
+NOT_DICT_HOMEWORK_ERROR = 'Элемент homeworks является не словарём, а {type}.'
+LOG_INFO_COMMANDS = 'Бот принимает команды: %(commands)s.'
+LOG_EXCEPT_COMMANDS = 'Ошибка получения команд: %(error)s'
+COMMAND_NO_DATA = ('Свежих данных о работах нет, они появятся после '
+                   'следующей проверки.')
+COMMAND_STATUS_HEADER = 'Статусы работ на {time}:'
+COMMAND_STATUS_LINE = '{name}: {verdict}'
+COMMAND_HISTORY_EMPTY = 'Изменений статусов пока не было.'
+COMMAND_HISTORY_LINE = '{time} {name}: {verdict}'
+LOG_INFO_INGEST = 'Сервер приёма событий слушает %(url)s.'
+INGEST_LENGTH_ERROR = 'Неверный заголовок Content-Length: {value!r}.'
+LOG_EXCEPT_INGEST = 'Ошибка обработки события аккаунта %(name)s: %(error)s'
+LOG_CRITICAL_INGEST_SECRET = ('Сервер приёма на адресе %(host)s требует '
+                              'INGEST_SECRET.')
+INGEST_SECRET_ERROR = ('Без INGEST_SECRET сервер приёма слушает только '
+                       'loopback-адрес, а не {host}.')
@@ -0,0 +1,165 @@
+"""Иерархическое колесо таймеров для сроков опроса аккаунтов.
+
+Время делится на такты по tick секунд. Уровень 0 хранит сроки
+ближайших 2**bits тактов, каждый следующий уровень — в 2**bits раз
+более крупные интервалы; сроки дальше верхнего уровня лежат в
+переполнении. Ячейки — словари по ключу, поэтому постановка, отмена и
+перенос срока стоят O(1), а при продвижении времени каждая запись
+спускается по уровням не больше levels раз.
+"""
+import math
+from collections import OrderedDict
+
+TICK = 1.0
+SLOT_BITS = 6
+LEVELS = 4
+
+READY = -1
+OVERFLOW = -2
+
+
+class TimingWheel:
+    """Колесо таймеров: сроки по ключам и выдача наступивших пачками.
+
+    Без start отсчёт начинается с первого advance или, если раньше был
+    вызван schedule, со срока первой записи.
+    """
+
+    def __init__(self, tick=TICK, bits=SLOT_BITS, levels=LEVELS,
+                 start=None):
+        self.tick = tick
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.levels = levels
+        self.wheels = [
+            [{} for _ in range(1 << bits)] for _ in range(levels)
+        ]
+        self.counts = [0] * levels
+        self.overflow = {}
+        self.ready = OrderedDict()
+        self.where = {}
+        self.current = None if start is None else math.floor(start / tick)
+
+    def __len__(self):
+        return len(self.where)
+
+    def __contains__(self, key):
+        return key in self.where
+
+    def schedule(self, key, deadline, item):
+        """Постановка или перенос срока записи с ключом key."""
+        self.cancel(key)
+        expires = math.ceil(deadline / self.tick)
+        if self.current is None:
+            self.current = expires
+        self._place(key, (expires, item))
+
+    def cancel(self, key):
+        """Снятие записи; False, если её не было."""
+        location = self.where.pop(key, None)
+        if location is None:
+            return False
+        level, index = location
+        if level == READY:
+            del self.ready[key]
+        elif level == OVERFLOW:
+            del self.overflow[key]
+        else:
+            del self.wheels[level][index][key]
+            self.counts[level] -= 1
+        return True
+
+    def _place(self, key, entry):
+        expires = entry[0]
+        if expires <= self.current:
+            self.ready[key] = entry
+            self.where[key] = (READY, 0)
+            return
+        for level in range(self.levels):
+            shift = self.bits * (level + 1)
+            if expires >> shift == self.current >> shift:
+                index = (expires >> (self.bits * level)) & self.mask
+                self.wheels[level][index][key] = entry
+                self.counts[level] += 1
+                self.where[key] = (level, index)
+                return
+        self.overflow[key] = entry
+        self.where[key] = (OVERFLOW, 0)
+
+    def _next_tick(self, target):
+        """Следующий такт, на котором что-то может наступить."""
+        for level in range(self.levels):
+            if self.counts[level]:
+                break
+        else:
+            level = self.levels
+        shift = self.bits * level
+        boundary = ((self.current >> shift) + 1) << shift
+        if level == self.levels:
+            earliest = min(expires for expires, _ in self.overflow.values())
+            boundary = max(boundary, earliest >> shift << shift)
+        return min(target, boundary)
+
+    def _cascade(self):
+        """Спуск записей ячеек, граница которых наступила."""
+        if self.current & ((1 << self.bits * self.levels) - 1) == 0:
+            overflow, self.overflow = self.overflow, {}
+            for key, entry in overflow.items():
+                self._place(key, entry)
+        for level in range(self.levels - 1, -1, -1):
+            shift = self.bits * level
+            if self.current & ((1 << shift) - 1):
+                continue
+            index = (self.current >> shift) & self.mask
+            slot = self.wheels[level][index]
+            if not slot:
+                continue
+            self.wheels[level][index] = {}
+            self.counts[level] -= len(slot)
+            for key, entry in slot.items():
+                self._place(key, entry)
+
+    def advance(self, now):
+        """Продвижение времени: наступившие записи переходят в готовые."""
+        target = now if math.isinf(now) else math.floor(now / self.tick)
+        if self.current is None:
+            if not math.isinf(now):
+                self.current = target
+            return
+        while self.current < target:
+            if len(self.ready) == len(self.where):
+                if not math.isinf(target):
+                    self.current = target
+                return
+            self.current = self._next_tick(target)
+            self._cascade()
+
+    def pop_due(self, now, limit=None):
+        """Наступившие записи в порядке готовности, не больше limit."""
+        self.advance(now)
+        due = []
+        while self.ready and (limit is None or len(due) < limit):
+            key, (_, item) = self.ready.popitem(last=False)
+            del self.where[key]
+            due.append(item)
+        return due
+
+    def next_deadline(self):
+        """Время, когда наступит ближайшая запись, или None."""
+        if self.ready:
+            return self.current * self.tick
+        for level in range(self.levels):
+            if not self.counts[level]:
+                continue
+            shift = self.bits * level
+            digit = (self.current >> shift) & self.mask
+            for index in range(digit + 1, self.mask + 1):
+                slot = self.wheels[level][index]
+                if slot:
+                    return self._earliest(slot)
+        if self.overflow:
+            return self._earliest(self.overflow)
+        return None
+
+    def _earliest(self, entries):
+        return min(expires for expires, _ in entries.values()) * self.tick